@@ -8,6 +8,7 @@ import {
 	getMarketCorrelation,
 	getCategoryFlow,
 	getContrarianTimeline,
+	getContrarianTimelineBuckets,
 	getDatabaseStats,
 } from '../services/neo4j.service.js';
 import { z } from 'zod';
@@ -43,6 +44,12 @@ const timelineSchema = z.object({
 	maxEntryPrice: z.coerce.number().min(0).max(1).default(0.2),
 });
 
+const timelineBucketsSchema = z.object({
+	maxEntryPrice: z.coerce.number().min(0).max(1).default(0.2),
+	interval: z.enum(['hour', 'day', 'week']).default('day'),
+	category: z.string().optional(),
+});
+
 export async function contrarianRoutes(fastify: FastifyInstance) {
 	// GET /api/contrarians/leaderboard
 	fastify.get('/api/contrarians/leaderboard', async (request, reply) => {
@@ -210,6 +217,27 @@ export async function contrarianRoutes(fastify: FastifyInstance) {
 		}
 	});
 
+	// GET /api/timeline/contrarian/buckets - Contrarian Timeline per hour, day or week
+	fastify.get('/api/timeline/contrarian/buckets', async (request, reply) => {
+		try {
+			const params = timelineBucketsSchema.parse(request.query);
+			const data = await getContrarianTimelineBuckets(params);
+
+			return {
+				success: true,
+				count: data.length,
+				filters: params,
+				data,
+			};
+		} catch (error) {
+			fastify.log.error(error);
+			reply.status(500).send({
+				success: false,
+				error: 'Failed to fetch contrarian timeline buckets',
+			});
+		}
+	});
+
 	// GET /api/stats/database - Database Statistics and Health
 	fastify.get('/api/stats/database', async (request, reply) => {
 		try {
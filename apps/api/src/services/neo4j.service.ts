@@ -20,6 +20,17 @@ export async function closeNeo4jDriver() {
 	}
 }
 
+// Entry-price thresholds with stats precomputed by the import (python/graph_aggregates.py).
+const PRECOMPUTED_THRESHOLDS = [0.1, 0.2, 0.3];
+
+async function hasPrecomputedAggregates(session: Session, maxEntryPrice?: number) {
+	if (maxEntryPrice !== undefined && !PRECOMPUTED_THRESHOLDS.includes(maxEntryPrice)) {
+		return false;
+	}
+	const result = await session.run('MATCH (s:CategoryStats) RETURN count(s) > 0 as ready');
+	return result.records[0]?.get('ready') === true;
+}
+
 export async function getContrariansLeaderboard(
 	options: {
 		limit?: number;
@@ -35,8 +46,20 @@ export async function getContrariansLeaderboard(
 	try {
 		const categoryFilter = category && category !== 'All' ? 'AND e.category = $category' : '';
 
-		const result = await session.run(
-			`
+		// Precomputed Trade.won / Trade.roi_percent turn the path scan into an index lookup.
+		const matchClause = (await hasPrecomputedAggregates(session))
+			? `
+      MATCH (t:Trade)
+      WHERE t.won = true
+        AND t.roi_percent >= $minRoi
+        AND t.side = 'BUY'
+        AND t.price < $maxEntryPrice
+        AND t.price > 0.0
+      MATCH (u:User)-[:PLACED_TRADE]->(t)-[:FOR_OUTCOME]->(o:Outcome)
+      MATCH (o)<-[:HAS_OUTCOME]-(m:Market)-[:PART_OF_EVENT]->(e:Event)
+      WHERE true
+        ${categoryFilter}`
+			: `
       MATCH (u:User)-[:PLACED_TRADE]->(t:Trade)-[:FOR_OUTCOME]->(o:Outcome)
       MATCH (o)<-[:HAS_OUTCOME]-(m:Market)-[:PART_OF_EVENT]->(e:Event)
       WHERE m.resolved = true
@@ -44,7 +67,10 @@ export async function getContrariansLeaderboard(
         AND t.side = 'BUY'
         AND t.price < $maxEntryPrice
         AND t.price > 0.0
-        ${categoryFilter}
+        ${categoryFilter}`;
+
+		const result = await session.run(
+			`${matchClause}
       WITH u, t, m, e, o,
            (1.0 - t.price) / t.price as roi_multiplier,
            t.size_usdc / t.price as potential_payout
@@ -62,7 +88,8 @@ export async function getContrariansLeaderboard(
              potential_payout as payout_usd,
              roi_multiplier * 100 as roi_percent,
              t.timestamp as trade_time,
-             t.transaction_hash as tx_hash
+             t.transaction_hash as tx_hash,
+             t.fill_key as fill_key
       ORDER BY roi_percent DESC, investment_usd DESC
       LIMIT $limit
       `,
@@ -112,8 +139,22 @@ export async function getSuccessRateByCategory(maxEntryPrice: number = 0.2) {
 	const session = driver.session();
 
 	try {
+		const precomputed = await hasPrecomputedAggregates(session, maxEntryPrice);
 		const result = await session.run(
-			`
+			precomputed
+				? `
+      MATCH (s:CategoryStats {max_entry_price: $maxEntryPrice})
+      WHERE s.total_contrarian_bets > 0
+      RETURN s.category as category,
+             s.total_contrarian_bets as total_contrarian_bets,
+             s.winning_bets as winning_bets,
+             s.success_rate as success_rate,
+             s.winning_volume as winning_volume,
+             s.total_volume as total_volume,
+             s.avg_entry_price as avg_entry_price
+      ORDER BY success_rate DESC
+      `
+				: `
       MATCH (u:User)-[:PLACED_TRADE]->(t:Trade)-[:FOR_OUTCOME]->(o:Outcome)
       MATCH (o)<-[:HAS_OUTCOME]-(m:Market)-[:PART_OF_EVENT]->(e:Event)
       WHERE m.resolved = true
@@ -172,8 +213,29 @@ export async function getTopContrarianTraders(
 	const session = driver.session();
 
 	try {
+		const precomputed = await hasPrecomputedAggregates(session, maxEntryPrice);
 		const result = await session.run(
-			`
+			precomputed
+				? `
+      MATCH (s:TraderContrarianStats)
+      WHERE s.max_entry_price = $maxEntryPrice
+        AND s.contrarian_wins >= $minWins
+      MATCH (u:User {address: s.address})
+      RETURN u.address as trader_address,
+             u.name as trader_name,
+             u.pseudonym as trader_pseudonym,
+             u.profile_image as trader_image,
+             s.contrarian_wins as contrarian_wins,
+             s.total_investment as total_investment,
+             s.total_payout as total_payout,
+             s.profit as profit,
+             s.roi_percent as roi_percent,
+             s.avg_entry_price as avg_entry_price,
+             s.best_entry_price as best_entry_price
+      ORDER BY contrarian_wins DESC, profit DESC
+      LIMIT $limit
+      `
+				: `
       MATCH (u:User)-[:PLACED_TRADE]->(t:Trade)-[:FOR_OUTCOME]->(o:Outcome)
       MATCH (o)<-[:HAS_OUTCOME]-(m:Market)
       WHERE m.resolved = true
@@ -237,8 +299,30 @@ export async function getTraderNetwork(minSharedMarkets: number = 3, limit: numb
 	const session = driver.session();
 
 	try {
+		// CO_TRADES_WITH edges (python/trader_network.py) cover every trader and market.
+		const hasEdges = await session.run('MATCH ()-[r:CO_TRADES_WITH]->() RETURN count(r) > 0 as ready');
 		const result = await session.run(
-			`
+			hasEdges.records[0]?.get('ready') === true
+				? `
+  MATCH (u1:User)-[r:CO_TRADES_WITH]->(u2:User)
+  WHERE r.shared_markets >= $minSharedMarkets
+  WITH u1, u2, r.shared_markets as shared_markets
+  ORDER BY shared_markets DESC
+  LIMIT $limit
+  RETURN u1.address as trader1_address,
+         u1.name as trader1_name,
+         u1.pseudonym as trader1_pseudonym,
+         u1.profile_image as trader1_image,
+         count{(u1)-[:PLACED_TRADE]->()} as u1_trades,
+         u2.address as trader2_address,
+         u2.name as trader2_name,
+         u2.pseudonym as trader2_pseudonym,
+         u2.profile_image as trader2_image,
+         count{(u2)-[:PLACED_TRADE]->()} as u2_trades,
+         shared_markets
+  ORDER BY shared_markets DESC
+  `
+				: `
   // Start with top 10 most-traded markets only
   MATCH (m:Market)<-[:ON_MARKET]-(:Trade)
   WITH m, count(*) as trade_count
@@ -318,12 +402,43 @@ export async function getMarketCorrelation(minSharedTraders: number = 10, limit:
 	const session = driver.session();
 
 	try {
+		// CORRELATED_WITH edges (python/market_correlation.py) cover every resolved market.
+		const hasEdges = await session.run('MATCH ()-[r:CORRELATED_WITH]->() RETURN count(r) > 0 as ready');
+
+		// User.resolved_market_count is maintained by the import; count the paths otherwise.
+		const activeTraders = (await hasPrecomputedAggregates(session))
+			? `MATCH (u:User)
+  WITH u, u.resolved_market_count as market_count`
+			: `MATCH (u:User)-[:PLACED_TRADE]->(:Trade)-[:ON_MARKET]->(m:Market)
+  WHERE m.resolved = true
+  WITH u, count(DISTINCT m) as market_count`;
+
 		const result = await session.run(
-			`
+			hasEdges.records[0]?.get('ready') === true
+				? `
+  MATCH (m1:Market)-[r:CORRELATED_WITH]->(m2:Market)
+  WHERE r.shared_traders >= $minSharedTraders
+  WITH m1, m2, r.shared_traders as shared_traders
+  ORDER BY shared_traders DESC
+  LIMIT $limit
+
+  MATCH (m1)-[:PART_OF_EVENT]->(e1:Event)
+  MATCH (m2)-[:PART_OF_EVENT]->(e2:Event)
+
+  RETURN m1.condition_id as market1_id,
+         m1.question as market1_question,
+         m1.slug as market1_slug,
+         e1.category as market1_category,
+         m2.condition_id as market2_id,
+         m2.question as market2_question,
+         m2.slug as market2_slug,
+         e2.category as market2_category,
+         shared_traders
+  ORDER BY shared_traders DESC
+  `
+				: `
   // Find active traders with multiple market participation
-  MATCH (u:User)-[:PLACED_TRADE]->(:Trade)-[:ON_MARKET]->(m:Market)
-  WHERE m.resolved = true
-  WITH u, count(DISTINCT m) as market_count
+  ${activeTraders}
   WHERE market_count >= 2
   ORDER BY market_count DESC
   LIMIT 30
@@ -386,8 +501,19 @@ export async function getCategoryFlow() {
 	const session = driver.session();
 
 	try {
+		// CategoryTransition nodes (python/category_flow.py) count every switch of every trader.
+		const hasFlow = await session.run('MATCH (c:CategoryTransition) RETURN count(c) > 0 as ready');
 		const result = await session.run(
-			`
+			hasFlow.records[0]?.get('ready') === true
+				? `
+  MATCH (c:CategoryTransition)
+  RETURN c.from_category as from_category,
+         c.to_category as to_category,
+         c.transitions as transitions
+  ORDER BY transitions DESC
+  LIMIT 50
+  `
+				: `
   // Only analyze top 200 most active traders
   MATCH (u:User)-[:PLACED_TRADE]->(:Trade)
   WITH u, count(*) as trade_count
@@ -473,6 +599,89 @@ export async function getContrarianTimeline(maxEntryPrice: number = 0.2) {
 	}
 }
 
+// Entry-price bucket edges of the TimelineBucket cube (python/graph_aggregates.py).
+const TIMELINE_PRICE_EDGES = [0.05, 0.1, 0.2, 0.3, 0.5, 0.7, 1.0];
+
+const TIMELINE_INTERVALS = { hour: 3600, day: 86400, week: 604800 };
+
+// Query 8b: Contrarian Timeline - Contrarian trades rolled up per hour, day or week
+export async function getContrarianTimelineBuckets(
+	options: {
+		maxEntryPrice?: number;
+		interval?: keyof typeof TIMELINE_INTERVALS;
+		category?: string;
+	} = {}
+) {
+	const { maxEntryPrice = 0.2, interval = 'day', category } = options;
+	const driver = initNeo4jDriver();
+	const session = driver.session();
+
+	try {
+		// The hourly cube is exact when the threshold is one of its bucket edges.
+		const hasCube = TIMELINE_PRICE_EDGES.includes(maxEntryPrice)
+			? await session.run('MATCH (b:TimelineBucket) RETURN count(b) > 0 as ready')
+			: null;
+		const result = await session.run(
+			hasCube?.records[0]?.get('ready') === true
+				? `
+  MATCH (b:TimelineBucket)
+  WHERE b.max_price <= $maxEntryPrice
+    AND ($category IS NULL OR b.category = $category)
+  WITH b.hour - b.hour % $interval as timestamp, b
+  RETURN timestamp,
+         sum(b.trades) as trades,
+         sum(CASE WHEN b.won THEN b.trades ELSE 0 END) as winning_trades,
+         sum(b.volume) as volume,
+         sum(CASE WHEN b.won THEN b.volume ELSE 0.0 END) as winning_volume,
+         sum(b.payout) as payout
+  ORDER BY timestamp
+  `
+				: `
+  MATCH (t:Trade)-[:FOR_OUTCOME]->(o:Outcome)<-[:HAS_OUTCOME]-(m:Market)-[:PART_OF_EVENT]->(e:Event)
+  WHERE m.resolved = true
+    AND t.side = 'BUY'
+    AND t.price < $maxEntryPrice
+    AND t.price > 0.0
+    AND ($category IS NULL OR e.category = $category)
+  WITH t.timestamp.epochSeconds - t.timestamp.epochSeconds % $interval as timestamp, t,
+       m.winning_outcome = o.outcome_name as won
+  RETURN timestamp,
+         count(t) as trades,
+         sum(CASE WHEN won THEN 1 ELSE 0 END) as winning_trades,
+         sum(t.size_usdc) as volume,
+         sum(CASE WHEN won THEN t.size_usdc ELSE 0.0 END) as winning_volume,
+         sum(CASE WHEN won THEN t.size_usdc / t.price ELSE 0.0 END) as payout
+  ORDER BY timestamp
+  `,
+			{
+				maxEntryPrice,
+				interval: neo4j.int(TIMELINE_INTERVALS[interval]),
+				category: category && category !== 'All' ? category : null,
+			}
+		);
+
+		return result.records.map((record: any) => {
+			const obj = record.toObject();
+			const trades = Number(obj.trades);
+			const volume = Number(obj.volume);
+			const payout = Number(obj.payout);
+			return {
+				timestamp: Number(obj.timestamp),
+				date: new Date(Number(obj.timestamp) * 1000).toISOString(),
+				trades,
+				winning_trades: Number(obj.winning_trades),
+				win_rate: trades > 0 ? (Number(obj.winning_trades) / trades) * 100 : 0,
+				volume,
+				winning_volume: Number(obj.winning_volume),
+				payout,
+				roi_percent: volume > 0 ? ((payout - volume) / volume) * 100 : 0,
+			};
+		});
+	} finally {
+		await session.close();
+	}
+}
+
 // Query 9: Database Statistics and Health
 export async function getDatabaseStats() {
 	const driver = initNeo4jDriver();
@@ -19,6 +19,7 @@ interface ContrarianTrade {
 	roi_percent: number;
 	trade_time: string;
 	tx_hash: string;
+	fill_key: string;
 }
 
 interface ApiResponse<T> {
@@ -26,6 +26,7 @@ interface ContrarianTrade {
 	roi_percent: number;
 	trade_time: string;
 	tx_hash: string;
+	fill_key: string;
 }
 
 interface LeaderboardTableProps {
@@ -57,7 +58,7 @@ export function LeaderboardTable({ trades }: LeaderboardTableProps) {
 			</TableHeader>
 			<TableBody>
 				{trades.map((trade, idx) => (
-					<TableRow key={trade.tx_hash}>
+					<TableRow key={`${trade.tx_hash}:${trade.fill_key}`}>
 						<TableCell>
 							<RankBadge rank={idx} />
 						</TableCell>
@@ -13,6 +13,7 @@ export interface ContrarianTrade {
 	roi_percent: number;
 	trade_time: string;
 	tx_hash: string;
+	fill_key: string;
 }
 
 export interface LeaderboardResponse {
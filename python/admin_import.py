@@ -0,0 +1,233 @@
+"""Offline bulk-load backend: CSV files for `neo4j-admin database import`."""
+import csv
+import os
+from typing import List, Dict, Any, Iterable, Optional, Set, Tuple
+
+from neo4j_import import prepare_trade_row, collect_user_profiles
+
+# (property, neo4j-admin type) per node file. The first column is the node ID,
+# using the same key as the uniqueness constraints in step-7's create_schema.
+EVENT_COLUMNS = [
+    ('slug', 'ID(Event)'), ('title', ''), ('description', ''), ('category', ''),
+    ('start_date', 'datetime'), ('end_date', 'datetime'), ('closed', 'boolean'),
+    ('volume', 'float'), ('liquidity', 'float'), ('open_interest', 'float'),
+    ('icon', ''), ('image', ''), ('comment_count', 'long'), ('tags', 'string[]'),
+    ('restricted', 'boolean'), ('featured', 'boolean'), ('content_hash', ''),
+]
+
+MARKET_COLUMNS = [
+    ('condition_id', 'ID(Market)'), ('question', ''), ('slug', ''), ('description', ''),
+    ('question_id', ''), ('start_date', 'datetime'), ('end_date', 'datetime'),
+    ('closed', 'boolean'), ('closed_time', 'datetime'), ('resolved', 'boolean'),
+    ('winning_outcome', ''), ('resolved_by', ''), ('uma_resolution_status', ''),
+    ('volume', 'float'), ('volume_clob', 'float'), ('liquidity', 'float'),
+    ('last_trade_price', 'float'), ('best_ask', 'float'), ('best_bid', 'float'),
+    ('spread', 'float'), ('neg_risk', 'boolean'), ('neg_risk_market_id', ''),
+    ('group_item_title', ''), ('group_item_threshold', ''), ('restricted', 'boolean'),
+    ('active', 'boolean'), ('content_hash', ''), ('trade_watermark', 'long'),
+]
+
+# Outcomes are keyed by (condition_id, outcome_index); the combined ID is not stored.
+OUTCOME_COLUMNS = [
+    ('outcome_key', 'ID(Outcome)'), ('condition_id', ''), ('outcome_index', 'long'),
+    ('outcome_name', ''), ('current_price', 'float'), ('token_id', ''), ('content_hash', ''),
+]
+
+USER_COLUMNS = [
+    ('address', 'ID(User)'), ('role', ''), ('name', ''), ('pseudonym', ''), ('bio', ''),
+    ('profile_image', ''), ('profile_image_optimized', ''),
+]
+
+# Trades are keyed by (transaction_hash, fill_key); the combined ID is not stored.
+TRADE_COLUMNS = [
+    ('trade_key', 'ID(Trade)'), ('transaction_hash', ''), ('fill_key', ''), ('timestamp', 'datetime'), ('side', ''),
+    ('size_usdc', 'float'), ('price', 'float'), ('outcome_name', ''), ('outcome_index', 'long'),
+    ('market_title', ''), ('market_slug', ''), ('event_slug', ''),
+]
+
+# (file name, start ID space, end ID space).
+RELATIONSHIP_FILES = {
+    'PART_OF_EVENT': ('rels_part_of_event.csv', 'Market', 'Event'),
+    'HAS_OUTCOME': ('rels_has_outcome.csv', 'Market', 'Outcome'),
+    'PLACED_TRADE': ('rels_placed_trade.csv', 'User', 'Trade'),
+    'ON_MARKET': ('rels_on_market.csv', 'Trade', 'Market'),
+    'FOR_OUTCOME': ('rels_for_outcome.csv', 'Trade', 'Outcome'),
+}
+
+# neo4j-admin has no escaping inside array values, so elements are split on a control
+# character (ASCII unit separator) that tag labels don't contain; it is stripped if they do.
+ARRAY_DELIMITER = '\x1f'
+
+
+def _header(columns: List[Tuple[str, str]]) -> List[str]:
+    header = []
+    for name, kind in columns:
+        if kind.startswith('ID('):
+            # Outcome and trade keys only exist for linking, everything else is stored.
+            header.append(f':{kind}' if name in ('outcome_key', 'trade_key') else f'{name}:{kind}')
+        else:
+            header.append(f'{name}:{kind}' if kind else name)
+    return header
+
+
+def _cell(value: Any) -> Any:
+    """Format a value the way neo4j-admin parses it (empty = property not set)."""
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, (list, tuple)):
+        return ARRAY_DELIMITER.join(str(item).replace(ARRAY_DELIMITER, '') for item in value)
+    return value
+
+
+def outcome_key(condition_id: str, outcome_index: Any) -> str:
+    return f'{condition_id}:{int(outcome_index)}'
+
+
+def trade_key(row: Dict[str, Any]) -> str:
+    return f'{row["transaction_hash"]}|{row["fill_key"]}'
+
+
+class _NodeFile:
+    """Streaming node CSV writer that drops duplicate IDs (first one wins)."""
+
+    def __init__(self, path: str, columns: List[Tuple[str, str]]):
+        self.file = open(path, 'w', newline='', encoding='utf-8')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(_header(columns))
+        self.columns = [name for name, _ in columns]
+        self.ids = set()
+        self.duplicates = 0
+
+    def write(self, node_id: str, row: Dict[str, Any]) -> bool:
+        if node_id in self.ids:
+            self.duplicates += 1
+            return False
+        self.ids.add(node_id)
+        self.writer.writerow([_cell(row.get(column)) for column in self.columns])
+        return True
+
+    def close(self):
+        self.file.close()
+
+
+class _RelationshipFile:
+    """Streaming relationship CSV writer."""
+
+    def __init__(self, path: str, rel_type: str, start_space: str, end_space: str):
+        self.file = open(path, 'w', newline='', encoding='utf-8')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow([f':START_ID({start_space})', f':END_ID({end_space})', ':TYPE'])
+        self.rel_type = rel_type
+        self.count = 0
+
+    def write(self, start_id: str, end_id: str):
+        self.writer.writerow([start_id, end_id, self.rel_type])
+        self.count += 1
+
+    def close(self):
+        self.file.close()
+
+
+def write_admin_import_csvs(out_dir: str, event_rows: List[Dict[str, Any]], market_rows: List[Dict[str, Any]],
+                            outcome_rows: List[Dict[str, Any]], users: Optional[Iterable[Dict[str, Any]]],
+                            trades: Iterable[Dict[str, Any]], failed_markets: Set[str] = None) -> Dict[str, int]:
+    """Stream all nodes and relationships into neo4j-admin import CSV files.
+
+    `trades` is consumed once, so it can be a generator. When `users` is None
+    the User nodes are taken from the trades as they stream by. Relationships
+    are only written when both ends exist, like the MATCH-based driver import.
+    Markets in `failed_markets` get no trade watermark, so the next sync
+    fetches their whole history.
+    """
+    failed_markets = failed_markets or set()
+    os.makedirs(out_dir, exist_ok=True)
+
+    def path(name: str) -> str:
+        return os.path.join(out_dir, name)
+
+    events = _NodeFile(path('nodes_event.csv'), EVENT_COLUMNS)
+    outcomes = _NodeFile(path('nodes_outcome.csv'), OUTCOME_COLUMNS)
+    user_nodes = _NodeFile(path('nodes_user.csv'), USER_COLUMNS)
+    trade_nodes = _NodeFile(path('nodes_trade.csv'), TRADE_COLUMNS)
+    rels = {rel_type: _RelationshipFile(path(name), rel_type, start, end)
+            for rel_type, (name, start, end) in RELATIONSHIP_FILES.items()}
+
+    for row in event_rows:
+        events.write(row['slug'], row)
+
+    market_ids = {row['condition_id'] for row in market_rows}
+
+    for row in outcome_rows:
+        key = outcome_key(row['condition_id'], row['outcome_index'])
+        if outcomes.write(key, dict(row, outcome_key=key)) and row['condition_id'] in market_ids:
+            rels['HAS_OUTCOME'].write(row['condition_id'], key)
+
+    for user in users or []:
+        user_nodes.write(user['address'], dict(user, role='trader'))
+
+    # Trades stream through once; watermarks are collected for the Market file.
+    watermarks = {}
+    skipped = 0
+    for trade in trades:
+        row = prepare_trade_row(trade)
+        if row is None:
+            skipped += 1
+            continue
+
+        trade_id = trade_key(row)
+        if not trade_nodes.write(trade_id, dict(row, trade_key=trade_id)):
+            continue
+
+        if users is None and row['trader_address'] not in user_nodes.ids:
+            for user in collect_user_profiles([trade]).values():
+                user_nodes.write(user['address'], user)
+
+        condition_id = row['condition_id']
+        if row['trader_address'] in user_nodes.ids:
+            rels['PLACED_TRADE'].write(row['trader_address'], trade_id)
+        if condition_id in market_ids:
+            rels['ON_MARKET'].write(trade_id, condition_id)
+        key = outcome_key(condition_id, row['outcome_index'])
+        if key in outcomes.ids:
+            rels['FOR_OUTCOME'].write(trade_id, key)
+
+        try:
+            timestamp = int(trade.get('timestamp') or 0)
+        except (TypeError, ValueError):
+            timestamp = 0
+        if timestamp > watermarks.get(condition_id, 0):
+            watermarks[condition_id] = timestamp
+
+    markets = _NodeFile(path('nodes_market.csv'), MARKET_COLUMNS)
+    for row in market_rows:
+        condition_id = row['condition_id']
+        watermark = None if condition_id in failed_markets else watermarks.get(condition_id)
+        if markets.write(condition_id, dict(row, trade_watermark=watermark)) \
+                and row.get('event_slug') in events.ids:
+            rels['PART_OF_EVENT'].write(condition_id, row['event_slug'])
+
+    node_files = {'Event': events, 'Market': markets, 'Outcome': outcomes, 'User': user_nodes, 'Trade': trade_nodes}
+    for node_file in list(node_files.values()) + list(rels.values()):
+        node_file.close()
+
+    counts = {label: len(node_file.ids) for label, node_file in node_files.items()}
+    counts.update({rel_type: rel_file.count for rel_type, rel_file in rels.items()})
+    counts['duplicate_trades'] = trade_nodes.duplicates
+    counts['skipped_trades'] = skipped
+    return counts
+
+
+def admin_import_command(out_dir: str, database: str = 'neo4j') -> str:
+    """The neo4j-admin command that builds a fresh database from the CSV files."""
+    # Descriptions and bios contain line breaks inside quoted fields.
+    lines = [f'neo4j-admin database import full {database} --overwrite-destination',
+             f'  --array-delimiter="U+{ord(ARRAY_DELIMITER):04X}"', '  --multiline-fields=true']
+    for label, name in [('Event', 'nodes_event.csv'), ('Market', 'nodes_market.csv'),
+                        ('Outcome', 'nodes_outcome.csv'), ('User', 'nodes_user.csv'),
+                        ('Trade', 'nodes_trade.csv')]:
+        lines.append(f'  --nodes={label}={os.path.join(out_dir, name)}')
+    for name, _, _ in RELATIONSHIP_FILES.values():
+        lines.append(f'  --relationships={os.path.join(out_dir, name)}')
+    return ' \\\n'.join(lines)
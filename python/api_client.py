@@ -0,0 +1,195 @@
+"""Shared HTTP client for the Gamma and Data APIs: pooled connections, retries and metrics."""
+import asyncio
+import email.utils
+import importlib.util
+import math
+import random
+import threading
+import time
+from collections import defaultdict
+from datetime import timezone
+from typing import Dict, Any, Optional
+from urllib.parse import urlparse
+
+import httpx
+
+# Transient statuses worth retrying; anything else is returned to the caller.
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+DEFAULT_TIMEOUT = 30
+MAX_BACKOFF_SECONDS = 60
+
+
+def http2_available() -> bool:
+    """HTTP/2 needs the optional `h2` package (`pip install httpx[http2]`)."""
+    return importlib.util.find_spec('h2') is not None
+
+
+def retry_delay(response: Optional[httpx.Response], attempt: int, base: float = 0.5) -> float:
+    """Seconds to wait before retry `attempt` (1-based).
+
+    A valid Retry-After header (seconds or an HTTP date, UTC when it has no
+    zone) wins; otherwise, or when it can't be parsed, the delay grows
+    exponentially with full jitter.
+    """
+    retry_after = response.headers.get('Retry-After') if response is not None else None
+    if retry_after:
+        seconds = _retry_after_seconds(retry_after)
+        if seconds is not None:
+            return min(max(seconds, 0.0), MAX_BACKOFF_SECONDS)
+
+    return random.uniform(0, min(base * 2 ** attempt, MAX_BACKOFF_SECONDS))
+
+
+def _retry_after_seconds(value: str) -> Optional[float]:
+    try:
+        seconds = float(value)
+        return seconds if not math.isnan(seconds) else None
+    except ValueError:
+        pass
+
+    # parsedate_to_datetime raises on malformed dates (Python 3.10+) and may return a naive datetime.
+    try:
+        parsed = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        return None
+    if parsed is None:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp() - time.time()
+
+
+class ApiMetrics:
+    """Per-endpoint request counts, retries, failures, bytes and latency (thread-safe)."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.endpoints = defaultdict(lambda: {
+            'requests': 0, 'retries': 0, 'failures': 0, 'bytes': 0, 'seconds': 0.0, 'max_seconds': 0.0,
+            'statuses': defaultdict(int),
+        })
+
+    @staticmethod
+    def endpoint(url: str) -> str:
+        parsed = urlparse(url)
+        return f'{parsed.netloc}{parsed.path}'
+
+    def record(self, url: str, status: Optional[int], seconds: float, size: int = 0, retry: bool = False):
+        with self.lock:
+            stats = self.endpoints[self.endpoint(url)]
+            stats['requests'] += 1
+            stats['retries'] += int(retry)
+            stats['bytes'] += size
+            stats['seconds'] += seconds
+            stats['max_seconds'] = max(stats['max_seconds'], seconds)
+            stats['statuses'][status if status is not None else 'error'] += 1
+
+    def record_failure(self, url: str):
+        """A request that still failed after all retries."""
+        with self.lock:
+            self.endpoints[self.endpoint(url)]['failures'] += 1
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        with self.lock:
+            summary = {}
+            for endpoint, stats in self.endpoints.items():
+                summary[endpoint] = {
+                    **{key: value for key, value in stats.items() if key != 'statuses'},
+                    'statuses': dict(stats['statuses']),
+                    'avg_seconds': stats['seconds'] / stats['requests'] if stats['requests'] else 0.0,
+                }
+            return summary
+
+    def print_summary(self):
+        for endpoint, stats in sorted(self.summary().items()):
+            print(f'  • {endpoint}: {stats["requests"]:,} requests, {stats["retries"]} retries, '
+                  f'{stats["failures"]} failed, avg {stats["avg_seconds"] * 1000:.0f} ms '
+                  f'(max {stats["max_seconds"] * 1000:.0f} ms), {stats["bytes"] / 1e6:,.1f} MB')
+
+
+def _client_options(concurrency: int, http2: bool, timeout: float) -> Dict[str, Any]:
+    # httpx asks for gzip/deflate and decodes responses transparently.
+    return {
+        'http2': http2 and http2_available(),
+        'limits': httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency),
+        'timeout': timeout,
+        'follow_redirects': True,
+    }
+
+
+class ApiClient:
+    """Blocking client with keep-alive pooling, optional HTTP/2 and retry/backoff on 429/5xx."""
+
+    def __init__(self, concurrency: int = 16, http2: bool = True, max_retries: int = 5,
+                 timeout: float = DEFAULT_TIMEOUT, metrics: ApiMetrics = None):
+        self.client = httpx.Client(**_client_options(concurrency, http2, timeout))
+        self.max_retries = max_retries
+        self.metrics = metrics if metrics is not None else ApiMetrics()
+
+    def get(self, url: str, params: Dict[str, Any] = None, timeout: float = None) -> httpx.Response:
+        """GET with retries. Returns the last response, or raises after repeated network errors."""
+        for attempt in range(self.max_retries + 1):
+            start = time.perf_counter()
+            response = None
+            try:
+                response = self.client.get(url, params=params,
+                                           timeout=timeout if timeout is not None else httpx.USE_CLIENT_DEFAULT)
+                self.metrics.record(url, response.status_code, time.perf_counter() - start,
+                                    len(response.content), retry=attempt > 0)
+                if response.status_code not in RETRY_STATUSES:
+                    return response
+            except httpx.TransportError:
+                self.metrics.record(url, None, time.perf_counter() - start, retry=attempt > 0)
+                if attempt == self.max_retries:
+                    self.metrics.record_failure(url)
+                    raise
+
+            if attempt == self.max_retries:
+                self.metrics.record_failure(url)
+                return response
+            time.sleep(retry_delay(response, attempt + 1))
+
+    def close(self):
+        self.client.close()
+
+
+class AsyncApiClient:
+    """asyncio counterpart of ApiClient for the concurrent fetch engines."""
+
+    def __init__(self, concurrency: int = 16, http2: bool = True, max_retries: int = 5,
+                 timeout: float = DEFAULT_TIMEOUT, metrics: ApiMetrics = None):
+        self.client = httpx.AsyncClient(**_client_options(concurrency, http2, timeout))
+        self.max_retries = max_retries
+        self.metrics = metrics if metrics is not None else ApiMetrics()
+
+    async def get(self, url: str, params: Dict[str, Any] = None) -> httpx.Response:
+        """GET with retries. Returns the last response, or raises after repeated network errors."""
+        for attempt in range(self.max_retries + 1):
+            start = time.perf_counter()
+            response = None
+            try:
+                response = await self.client.get(url, params=params)
+                self.metrics.record(url, response.status_code, time.perf_counter() - start,
+                                    len(response.content), retry=attempt > 0)
+                if response.status_code not in RETRY_STATUSES:
+                    return response
+            except httpx.TransportError:
+                self.metrics.record(url, None, time.perf_counter() - start, retry=attempt > 0)
+                if attempt == self.max_retries:
+                    self.metrics.record_failure(url)
+                    raise
+
+            if attempt == self.max_retries:
+                self.metrics.record_failure(url)
+                return response
+            await asyncio.sleep(retry_delay(response, attempt + 1))
+
+    async def aclose(self):
+        await self.client.aclose()
+
+    async def __aenter__(self) -> 'AsyncApiClient':
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
@@ -0,0 +1,344 @@
+"""Local stand-in for the Gamma (/events, /markets) and Data API (/trades) endpoints.
+
+    python api_standin.py --trades 100000 --port 8765 --latency-ms 80 --rate-limit 50 --error-rate 0.01
+    python api_standin.py --snapshot polymarket_snapshot --port 8765
+
+Then point GAMMA_API_BASE and DATA_API_BASE (step-2) at http://127.0.0.1:8765.
+Data comes from a SyntheticDataset or a recorded trade_store snapshot;
+latency, rate limiting (429 + Retry-After) and error injection are seeded,
+so fetcher runs are repeatable.
+"""
+import argparse
+import gzip
+import json
+import math
+import random
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import List, Dict, Any, Optional
+from urllib.parse import urlparse, parse_qs
+
+import numpy as np
+
+from synthetic_data import SyntheticDataset
+from trade_fetcher import PAGE_SIZE, WINDOW_START_PARAM, WINDOW_END_PARAM
+
+DEFAULT_EVENTS_LIMIT = 100
+
+
+class RecordedData:
+    """A trade_store snapshot served in the Data API shapes (same interface as SyntheticDataset)."""
+
+    def __init__(self, root: str):
+        from trade_store import load_events, load_trades, load_users
+
+        self.events = load_events(root)
+        self.condition_ids = [market['conditionId'] for event in self.events
+                              for market in event.get('markets', []) if market.get('conditionId')]
+        self.market_index = {condition_id: i for i, condition_id in enumerate(self.condition_ids)}
+
+        table = load_trades(root)
+        columns = {name: table.column(name).to_pylist() for name in table.column_names}
+        self.columns = columns
+        self.profiles = {row['address']: row for row in load_users(root).to_pylist()}
+
+        # Trades of markets missing from events.json sort last and are never served.
+        unknown = len(self.condition_ids)
+        market = np.array([self.market_index.get(cid, unknown) for cid in columns['condition_id']], dtype=np.int64)
+        self.timestamp = np.array(columns['timestamp'], dtype=np.int64)
+        order = np.lexsort((-self.timestamp, market))
+        self.order = order
+        self.timestamp = self.timestamp[order]
+        self.n_trades = len(order)
+        self.market_start = np.searchsorted(market[order], np.arange(len(self.condition_ids) + 1))
+
+    def market_rows(self, condition_id: str) -> np.ndarray:
+        m = self.market_index.get(condition_id)
+        if m is None:
+            return np.arange(0)
+        return np.arange(self.market_start[m], self.market_start[m + 1])
+
+    def raw_trades(self, condition_id: str, offset: int = 0, limit: int = None,
+                   rows: Optional[np.ndarray] = None) -> List[Dict[str, Any]]:
+        rows = self.market_rows(condition_id) if rows is None else rows
+        rows = rows[offset:] if limit is None else rows[offset:offset + limit]
+        return [self.raw_trade(int(row)) for row in rows]
+
+    def raw_trade(self, row: int) -> Dict[str, Any]:
+        """Invert transform_trade for one snapshot row."""
+        source = int(self.order[row])
+        value = lambda name: self.columns[name][source]
+        profile = self.profiles.get(value('from'), {})
+        return {
+            'proxyWallet': value('from'),
+            'side': value('side'),
+            'asset': value('asset'),
+            'conditionId': value('condition_id'),
+            'size': value('size'),
+            'price': value('price'),
+            'timestamp': value('timestamp'),
+            'title': value('market_title'),
+            'slug': value('market_slug'),
+            'icon': value('market_icon'),
+            'eventSlug': value('event_slug'),
+            'outcome': value('outcome'),
+            'outcomeIndex': value('outcome_index'),
+            'name': profile.get('user_name', ''),
+            'pseudonym': profile.get('user_pseudonym', ''),
+            'bio': profile.get('user_bio', ''),
+            'profileImage': profile.get('user_profile_image', ''),
+            'profileImageOptimized': profile.get('user_profile_image_optimized', ''),
+            'transactionHash': value('hash'),
+        }
+
+
+def _int_param(params: Dict[str, List[str]], name: str, default: Optional[int]) -> Optional[int]:
+    try:
+        return int(params[name][0])
+    except (KeyError, IndexError, ValueError):
+        return default
+
+
+def _time_param(params: Dict[str, List[str]], name: str) -> Optional[datetime]:
+    value = params.get(name, [None])[0]
+    if not value:
+        return None
+    if len(value) == 10:
+        value += 'T00:00:00'
+    return datetime.fromisoformat(value.replace('Z', '+00:00')).replace(tzinfo=None)
+
+
+class PolymarketStandIn:
+    """Threaded HTTP server answering /events, /markets and /trades from `data`.
+
+    - `latency_ms` (+ uniform `jitter_ms`) is added to every response.
+    - `rate_limit` requests/second (token bucket, burst `rate_limit`) are
+      served; the rest get 429 with a Retry-After header.
+    - `error_rate` of the requests fail with `error_status`.
+    - `max_page_size` caps `limit` like the real APIs (500 for /trades).
+    """
+
+    def __init__(self, data, host: str = '127.0.0.1', port: int = 0, latency_ms: float = 0.0,
+                 jitter_ms: float = 0.0, rate_limit: float = None, error_rate: float = 0.0,
+                 error_status: int = 503, max_page_size: int = PAGE_SIZE, seed: int = 0):
+        self.data = data
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.rate_limit = rate_limit
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.max_page_size = max_page_size
+
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.tokens = rate_limit or 0.0
+        self.updated_at = time.monotonic()
+        self.stats = defaultdict(lambda: defaultdict(int))
+
+        self.markets = [market for event in data.events for market in event.get('markets', [])]
+        # Gamma lists events by id.
+        self.events_by_id = sorted(data.events, key=lambda event: int(event.get('id') or 0))
+
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'  # Keep-alive, so client pooling behaves as in production
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                standin.handle(self)
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self) -> str:
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self.base_url
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self) -> 'PolymarketStandIn':
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    # ------------------------------------------------------------------------
+    # Fault injection
+    # ------------------------------------------------------------------------
+
+    def _take_token(self) -> float:
+        """0 when the request may proceed, else seconds until the next token."""
+        if not self.rate_limit:
+            return 0.0
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.rate_limit, self.tokens + (now - self.updated_at) * self.rate_limit)
+            self.updated_at = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) / self.rate_limit
+
+    def _draw(self):
+        with self.lock:
+            delay = self.latency_ms + self.random.uniform(0, self.jitter_ms)
+            failed = self.random.random() < self.error_rate
+        return delay / 1000, failed
+
+    # ------------------------------------------------------------------------
+    # Endpoints
+    # ------------------------------------------------------------------------
+
+    def handle(self, request: BaseHTTPRequestHandler):
+        url = urlparse(request.path)
+        params = parse_qs(url.query)
+        endpoints = {'/events': self.events, '/markets': self.markets_page, '/trades': self.trades}
+        stats = self.stats[url.path]
+        stats['requests'] += 1
+
+        delay, failed = self._draw()
+        if delay:
+            time.sleep(delay)
+
+        wait = self._take_token()
+        if url.path not in endpoints:
+            status, body, headers = 404, {'error': 'not found'}, {}
+        elif wait:
+            status, body, headers = 429, {'error': 'rate limited'}, {'Retry-After': str(math.ceil(wait))}
+        elif failed:
+            status, body, headers = self.error_status, {'error': 'injected failure'}, {}
+        else:
+            try:
+                status, body, headers = 200, endpoints[url.path](params), {}
+            except ValueError as e:
+                status, body, headers = 400, {'error': str(e)}, {}
+        stats[status] += 1
+
+        payload = json.dumps(body).encode('utf-8')
+        if 'gzip' in (request.headers.get('Accept-Encoding') or ''):
+            payload = gzip.compress(payload, compresslevel=1)
+            headers['Content-Encoding'] = 'gzip'
+
+        request.send_response(status)
+        request.send_header('Content-Type', 'application/json')
+        request.send_header('Content-Length', str(len(payload)))
+        for name, value in headers.items():
+            request.send_header(name, value)
+        request.end_headers()
+        request.wfile.write(payload)
+
+    def _page(self, params: Dict[str, List[str]], default_limit: int):
+        limit = min(_int_param(params, 'limit', default_limit), self.max_page_size)
+        offset = _int_param(params, 'offset', 0)
+        if limit < 0 or offset < 0:
+            raise ValueError('limit and offset must be non-negative')
+        return limit, offset
+
+    def events(self, params: Dict[str, List[str]]) -> List[Dict[str, Any]]:
+        limit, offset = self._page(params, DEFAULT_EVENTS_LIMIT)
+        events = self.events_by_id
+        if params.get('ascending', ['true'])[0] == 'false':
+            events = events[::-1]
+
+        closed = params.get('closed', [None])[0]
+        tag_slug = params.get('tag_slug', [None])[0]
+        tag_id = params.get('tag_id', [None])[0]
+        bounds = {name: _time_param(params, name)
+                  for name in ['start_date_min', 'start_date_max', 'end_date_min', 'end_date_max']}
+
+        def keep(event: Dict[str, Any]) -> bool:
+            if closed is not None and bool(event.get('closed')) != (closed == 'true'):
+                return False
+            tags = event.get('tags', [])
+            if tag_slug and not any((tag.get('slug') or tag.get('label', '').lower()) == tag_slug for tag in tags):
+                return False
+            if tag_id and not any(str(tag.get('id')) == tag_id for tag in tags):
+                return False
+            for prefix in ['start_date', 'end_date']:
+                low, high = bounds[f'{prefix}_min'], bounds[f'{prefix}_max']
+                if low or high:
+                    field = 'startDate' if prefix == 'start_date' else 'endDate'
+                    value = datetime.fromisoformat(event[field].replace('Z', '+00:00')).replace(tzinfo=None)
+                    if (low and value < low) or (high and value > high):
+                        return False
+            return True
+
+        matching = [event for event in events if keep(event)]
+        return matching[offset:offset + limit]
+
+    def markets_page(self, params: Dict[str, List[str]]) -> List[Dict[str, Any]]:
+        limit, offset = self._page(params, DEFAULT_EVENTS_LIMIT)
+        closed = params.get('closed', [None])[0]
+        markets = self.markets
+        if closed is not None:
+            markets = [market for market in markets if bool(market.get('closed')) == (closed == 'true')]
+        return markets[offset:offset + limit]
+
+    def trades(self, params: Dict[str, List[str]]) -> List[Dict[str, Any]]:
+        limit, offset = self._page(params, 100)
+        start = _int_param(params, WINDOW_START_PARAM, None)
+        end = _int_param(params, WINDOW_END_PARAM, None)
+        markets = [cid for value in params.get('market', []) for cid in value.split(',') if cid]
+        if not markets:
+            markets = self.data.condition_ids
+
+        # Newest first across all requested markets.
+        rows = np.concatenate([self.data.market_rows(cid) for cid in markets] or [np.arange(0)])
+        timestamps = self.data.timestamp[rows]
+        keep = np.ones(len(rows), dtype=bool)
+        if start is not None:
+            keep &= timestamps >= start
+        if end is not None:
+            keep &= timestamps <= end
+        rows = rows[keep]
+        if len(markets) > 1:
+            rows = rows[np.argsort(-self.data.timestamp[rows], kind='stable')]
+
+        return [self.data.raw_trade(int(row)) for row in rows[offset:offset + limit]]
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--snapshot', help='serve a recorded trade_store snapshot instead of synthetic data')
+    parser.add_argument('--trades', type=int, default=100000, help='synthetic dataset size')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    parser.add_argument('--jitter-ms', type=float, default=0.0)
+    parser.add_argument('--rate-limit', type=float, help='requests per second before 429s')
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--error-status', type=int, default=503)
+    args = parser.parse_args(argv)
+
+    data = RecordedData(args.snapshot) if args.snapshot else SyntheticDataset(args.trades, seed=args.seed)
+    standin = PolymarketStandIn(data, args.host, args.port, args.latency_ms, args.jitter_ms, args.rate_limit,
+                                args.error_rate, args.error_status, seed=args.seed)
+    print(f'Serving {len(data.events)} events and {data.n_trades:,} trades on {standin.base_url}')
+    print(f'  GAMMA_API_BASE = DATA_API_BASE = \'{standin.base_url}\'')
+    try:
+        standin.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        standin.server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,244 @@
+"""Benchmark extract, transform, import and analytics on synthetic data.
+
+    python benchmark.py                                # 10k, 100k and 1M trades, in-process only
+    python benchmark.py --trades 10000 100000 --neo4j-uri bolt://localhost:7687 --neo4j-password secret
+    python benchmark.py --trades 100000 --fetch --latency-ms 80 --rate-limit 50 --error-rate 0.01
+
+With `--neo4j-uri` the import and aggregate stages run against that
+database, which is CLEARED before every size: only point it at a scratch
+instance. `--fetch` also crawls events and fetches every market's trades
+from a local api_standin server with the given latency and faults. Results
+are written as one run report per size (run_profiler).
+"""
+import argparse
+import json
+import time
+from typing import List, Dict, Any
+
+from events_crawler import extract_category_from_tags, extract_outcomes_from_market
+from neo4j_import import (
+    prepare_event_rows, prepare_market_rows, prepare_outcome_rows, prepare_trade_row, TradeDeduplicator,
+    collect_user_profiles, write_users, write_trades_parallel,
+)
+from graph_aggregates import AGGREGATE_SCHEMA, refresh_aggregates, refresh_holdings
+from category_flow import CategoryFlow
+from contrarian_analytics import ContrarianAnalytics
+from market_correlation import MarketCorrelation
+from api_client import ApiMetrics
+from api_standin import PolymarketStandIn
+from events_crawler import EventCrawler
+from run_profiler import RunProfiler
+from synthetic_data import SyntheticDataset
+from trade_fetcher import transform_trade, fetch_markets_concurrently, run_async
+from trade_table import TradeTable
+from trader_network import TraderNetwork
+
+DEFAULT_SIZES = [10000, 100000, 1000000]
+
+BENCHMARK_SCHEMA = [
+    'CREATE CONSTRAINT user_address IF NOT EXISTS FOR (u:User) REQUIRE u.address IS UNIQUE',
+    'CREATE CONSTRAINT event_slug IF NOT EXISTS FOR (e:Event) REQUIRE e.slug IS UNIQUE',
+    'CREATE CONSTRAINT market_condition_id IF NOT EXISTS FOR (m:Market) REQUIRE m.condition_id IS UNIQUE',
+    'CREATE CONSTRAINT outcome_id IF NOT EXISTS FOR (o:Outcome) REQUIRE (o.condition_id, o.outcome_index) IS UNIQUE',
+    'CREATE CONSTRAINT trade_id IF NOT EXISTS FOR (t:Trade) REQUIRE (t.transaction_hash, t.fill_key) IS UNIQUE',
+] + AGGREGATE_SCHEMA
+
+# Just the Event/Market/Outcome properties the trade import and aggregates read.
+SEED_MARKETS_QUERY = '''
+    UNWIND $markets as market
+    MERGE (e:Event {slug: market.event_slug})
+    SET e.category = market.category
+    MERGE (m:Market {condition_id: market.condition_id})
+    SET m.question = market.question,
+        m.slug = market.slug,
+        m.resolved = market.resolved,
+        m.winning_outcome = market.winning_outcome,
+        m.neg_risk_market_id = market.neg_risk_market_id
+    MERGE (m)-[:PART_OF_EVENT]->(e)
+'''
+
+SEED_OUTCOMES_QUERY = '''
+    UNWIND $outcomes as outcome
+    MATCH (m:Market {condition_id: outcome.condition_id})
+    MERGE (o:Outcome {condition_id: outcome.condition_id, outcome_index: outcome.outcome_index})
+    SET o.outcome_name = outcome.outcome_name,
+        o.current_price = toFloat(outcome.current_price)
+    MERGE (m)-[:HAS_OUTCOME]->(o)
+'''
+
+
+def _reset_database(driver):
+    with driver.session() as session:
+        session.run('MATCH (n) CALL { WITH n DETACH DELETE n } IN TRANSACTIONS OF 10000 ROWS').consume()
+        for stmt in BENCHMARK_SCHEMA:
+            session.run(stmt).consume()
+
+
+def run_fetch_benchmark(profiler: RunProfiler, dataset: SyntheticDataset, concurrency: int = 16,
+                        windowed: bool = False, **standin_options) -> int:
+    """Crawl events and fetch all trades from a local stand-in; returns the trades fetched."""
+    fetched = 0
+    with PolymarketStandIn(dataset, **standin_options) as standin:
+        with profiler.stage('fetch_events') as stage:
+            crawler = EventCrawler(standin.base_url, requests_per_second=1000,
+                                   metrics=profiler.api_metrics)
+            crawler.run()
+            stage.add_rows(len(crawler.events))
+
+        def count_trades(condition_id, trades):
+            nonlocal fetched
+            fetched += len(trades)
+
+        with profiler.stage('fetch_trades') as stage:
+            run_async(fetch_markets_concurrently(
+                sorted(crawler.condition_ids), concurrency=concurrency, requests_per_second=1000,
+                base_url=standin.base_url, on_market_done=count_trades, keep_trades=False,
+                windowed=windowed, max_retries=10, metrics=profiler.api_metrics,
+            ))
+            stage.add_rows(fetched)
+    return fetched
+
+
+def run_benchmark(n_trades: int, driver=None, workers: int = 4, seed: int = 0, fetch: bool = False,
+                  fetch_options: Dict[str, Any] = None) -> Dict[str, Any]:
+    """Time every pipeline stage on `n_trades` synthetic trades; returns the run report."""
+    profiler = RunProfiler(ApiMetrics(), run_name=f'benchmark-{n_trades}')
+
+    with profiler.stage('generate', rows=n_trades):
+        dataset = SyntheticDataset(n_trades, seed=seed)
+        events = dataset.events
+
+    fetched = run_fetch_benchmark(profiler, dataset, **(fetch_options or {})) if fetch else None
+
+    # step-5: categories, outcomes and condition IDs from the events.
+    with profiler.stage('extract', rows=len(dataset.condition_ids)):
+        outcomes = []
+        for event in events:
+            event['category'] = extract_category_from_tags(event)
+            for market in event.get('markets', []):
+                outcomes.extend(extract_outcomes_from_market(market))
+        event_rows = prepare_event_rows(events)
+        market_rows = prepare_market_rows(events)
+        outcome_rows = prepare_outcome_rows(events)
+
+    # step-6/step-7: Data API dicts -> trade dicts -> TradeTable -> deduplicated Trade rows.
+    with profiler.stage('transform', rows=n_trades):
+        trades = TradeTable(transform_trade(raw) for raw in dataset.iter_raw_trades())
+        prepared = [row for row in map(prepare_trade_row, trades) if row is not None]
+        trade_rows = TradeDeduplicator().filter(prepared)
+        users = collect_user_profiles(trades)
+
+    if driver is not None:
+        instrumented = profiler.instrument(driver)
+        categories = {event['slug']: event['category'] for event in events}
+
+        with profiler.stage('import', rows=len(trade_rows)):
+            _reset_database(instrumented)
+            with instrumented.session() as session:
+                session.run(SEED_MARKETS_QUERY, {'markets': [
+                    {**row, 'category': categories.get(row['event_slug'], 'Unknown')} for row in market_rows
+                ]}).consume()
+                session.run(SEED_OUTCOMES_QUERY, {'outcomes': outcome_rows}).consume()
+            write_users(instrumented, list(users.values()))
+            write_trades_parallel(instrumented, trade_rows, workers)
+
+        with profiler.stage('holdings', rows=len(market_rows)):
+            refresh_holdings(instrumented)
+
+        with profiler.stage('aggregates', rows=len(trade_rows)):
+            refresh_aggregates(instrumented)
+
+    # step-8: the API's contrarian queries, in-process.
+    with profiler.stage('analytics_load', rows=n_trades):
+        analytics = ContrarianAnalytics(events, dataset.arrow_table(), dataset.user_profiles())
+
+    with profiler.stage('analytics_queries'):
+        analytics.leaderboard(limit=20)
+        analytics.success_rate_by_category()
+        analytics.top_contrarian_traders(limit=20)
+        analytics.roi_by_entry_bucket()
+        analytics.contrarian_timeline()
+
+    with profiler.stage('trader_network', rows=n_trades):
+        TraderNetwork.from_analytics(analytics).edges(k=50)
+
+    with profiler.stage('market_correlation', rows=n_trades):
+        MarketCorrelation.from_analytics(analytics).correlated_pairs(min_shared_traders=10)
+
+    with profiler.stage('category_flow', rows=n_trades):
+        CategoryFlow.from_analytics(analytics).transition_rows()
+
+    report = profiler.report()
+    report['dataset'] = {
+        'trades': n_trades,
+        'events': len(event_rows),
+        'markets': len(market_rows),
+        'outcomes': len(outcome_rows),
+        'traders': len(users),
+        'unique_trades': len(trade_rows),
+        'fetched_trades': fetched,
+    }
+    return report
+
+
+def print_report(report: Dict[str, Any]):
+    dataset = report['dataset']
+    print(f'{dataset["trades"]:,} trades ({dataset["markets"]:,} markets, {dataset["traders"]:,} traders):')
+    for name, stats in report['stages'].items():
+        line = f'  • {name:<18} {stats["seconds"]:8.2f}s'
+        if stats['rows']:
+            line += f'  {stats["rows_per_second"]:>12,.0f} rows/s'
+        if stats['neo4j_round_trips']:
+            line += f'  {stats["neo4j_round_trips"]:,} round-trips'
+        if stats['api_requests']:
+            line += f'  {stats["api_requests"]:,} requests ({stats["api_retries"]} retries)'
+        print(line)
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--trades', type=int, nargs='+', default=DEFAULT_SIZES, help='dataset sizes to run')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=4, help='parallel trade writers')
+    parser.add_argument('--neo4j-uri', help='scratch database for the import stages (it is cleared)')
+    parser.add_argument('--neo4j-user', default='neo4j')
+    parser.add_argument('--neo4j-password', default='')
+    parser.add_argument('--fetch', action='store_true', help='also benchmark the fetchers against api_standin')
+    parser.add_argument('--windowed', action='store_true', help='fetch by time window instead of offset')
+    parser.add_argument('--concurrency', type=int, default=16, help='markets fetched at the same time')
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    parser.add_argument('--jitter-ms', type=float, default=0.0)
+    parser.add_argument('--rate-limit', type=float, help='stand-in requests per second before 429s')
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--output', default='benchmark_results.json')
+    args = parser.parse_args(argv)
+
+    fetch_options = {
+        'concurrency': args.concurrency, 'windowed': args.windowed, 'latency_ms': args.latency_ms,
+        'jitter_ms': args.jitter_ms, 'rate_limit': args.rate_limit, 'error_rate': args.error_rate,
+        'seed': args.seed,
+    }
+
+    driver = None
+    if args.neo4j_uri:
+        from neo4j import GraphDatabase
+        driver = GraphDatabase.driver(args.neo4j_uri, auth=(args.neo4j_user, args.neo4j_password))
+
+    reports = []
+    try:
+        for n_trades in args.trades:
+            report = run_benchmark(n_trades, driver, args.workers, args.seed, args.fetch, fetch_options)
+            print_report(report)
+            reports.append(report)
+    finally:
+        if driver is not None:
+            driver.close()
+
+    with open(args.output, 'w') as f:
+        json.dump({'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()), 'runs': reports},
+                  f, indent=2, default=str)
+    print(f'✓ Results written to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
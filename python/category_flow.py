@@ -0,0 +1,320 @@
+"""Exact category-to-category transitions of every trader, from trades sorted by (trader, timestamp) (getCategoryFlow at full scale)."""
+import os
+import shutil
+import tempfile
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# Trades sorted in memory per run (trader key, timestamp and category: ~20 bytes each).
+DEFAULT_MEMORY_ROWS = 20_000_000
+
+# Dwell time in the from-category before a switch, bucketed (seconds).
+DWELL_BUCKETS = [0, 3600, 86400, 7 * 86400, 30 * 86400]
+DWELL_LABELS = ['<1h', '1h-1d', '1d-7d', '7d-30d', '30d+']
+
+CATEGORY_FLOW_SCHEMA = [
+    'CREATE CONSTRAINT category_transition_id IF NOT EXISTS FOR (c:CategoryTransition) REQUIRE (c.from_category, c.to_category) IS UNIQUE',
+]
+
+CLEAR_CATEGORY_FLOW_QUERY = 'MATCH (c:CategoryTransition) DETACH DELETE c'
+
+CATEGORY_FLOW_QUERY = '''
+    UNWIND $transitions as transition
+    MERGE (c:CategoryTransition {from_category: transition.from_category, to_category: transition.to_category})
+    SET c.transitions = transition.transitions,
+        c.traders = transition.traders,
+        c.avg_gap_seconds = transition.avg_gap_seconds,
+        c.avg_dwell_seconds = transition.avg_dwell_seconds
+'''
+
+SortedColumns = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+
+def _trader_key(address: Optional[str]) -> int:
+    """64-bit trader key from the last 16 hex digits of an address (0 for missing or null addresses)."""
+    try:
+        return int(address[-16:], 16) if address else 0
+    except ValueError:
+        return 0
+
+
+def _sort(trader: np.ndarray, timestamp: np.ndarray, category: np.ndarray) -> SortedColumns:
+    # Same-second trades are ordered by category so every sort path gives the same sequence.
+    order = np.lexsort((category, timestamp, trader))
+    return trader[order], timestamp[order], category[order]
+
+
+class CategoryFlow:
+    """Transition counts, distinct traders, gaps and dwell times per (from, to) category pair.
+
+    Trades are fed in chunks sorted by (trader, timestamp) that hold all of a
+    trader's trades, so every transition is counted once: each switch from
+    one category to the next in a trader's history, repeats included.
+    `max_gap_seconds` only counts switches made within that time, and
+    `since`/`until` restrict the trades considered.
+    """
+
+    def __init__(self, category_names: List[str], max_gap_seconds: int = None, min_trades: int = 1,
+                 since: int = None, until: int = None):
+        self.category_names = list(category_names)
+        self.max_gap_seconds = max_gap_seconds
+        self.min_trades = min_trades
+        self.since = since
+        self.until = until
+
+        n = len(self.category_names)
+        self.transitions = np.zeros((n, n), dtype=np.int64)
+        self.traders = np.zeros((n, n), dtype=np.int64)
+        self.gap_seconds = np.zeros((n, n), dtype=np.float64)
+        self.dwell_seconds = np.zeros((n, n), dtype=np.float64)
+        self.dwell_buckets = np.zeros((n, n, len(DWELL_BUCKETS)), dtype=np.int64)
+        self.trader_count = 0
+        self.trade_count = 0
+
+    @classmethod
+    def from_arrays(cls, trader: np.ndarray, timestamp: np.ndarray, category: np.ndarray,
+                    category_names: List[str], **options) -> 'CategoryFlow':
+        """In-memory path: one sort of all trades."""
+        flow = cls(category_names, **options)
+        flow.add_sorted(*_sort(trader, timestamp, category))
+        return flow
+
+    @classmethod
+    def from_analytics(cls, analytics, **options) -> 'CategoryFlow':
+        """Reuse the trades of a ContrarianAnalytics engine."""
+        return cls.from_arrays(analytics.trader, analytics.timestamp, analytics.category,
+                               analytics.category_names, **options)
+
+    @classmethod
+    def from_snapshot(cls, root: str, memory_rows: int = DEFAULT_MEMORY_ROWS, spill_dir: str = None,
+                      **options) -> 'CategoryFlow':
+        """External merge sort of a trade_store snapshot: at most `memory_rows` trades are sorted at once.
+
+        Sorted runs are spilled to `spill_dir` (a temporary directory by
+        default) as .npy files and merged block by block.
+        """
+        categories = {}
+        runs = _SpilledRuns(spill_dir)
+        try:
+            buffered, rows = [], 0
+            for batch in _snapshot_batches(root, categories):
+                buffered.append(batch)
+                rows += len(batch[0])
+                if rows >= memory_rows:
+                    runs.add(*_sort(*(np.concatenate(column) for column in zip(*buffered))))
+                    buffered, rows = [], 0
+
+            columns = [np.concatenate(column) for column in zip(*buffered)] if buffered else None
+            flow = cls(list(categories), **options)
+            if not runs.paths:
+                if columns is not None:
+                    flow.add_sorted(*_sort(*columns))
+                return flow
+
+            if columns is not None:
+                runs.add(*_sort(*columns))
+            for chunk in runs.merge(memory_rows):
+                flow.add_sorted(*chunk)
+            return flow
+        finally:
+            runs.cleanup()
+
+    # ------------------------------------------------------------------------
+    # Counting
+    # ------------------------------------------------------------------------
+
+    def add_sorted(self, trader: np.ndarray, timestamp: np.ndarray, category: np.ndarray):
+        """Count the transitions in a chunk sorted by (trader, timestamp) holding complete traders."""
+        keep = category >= 0
+        if self.since is not None:
+            keep &= timestamp >= self.since
+        if self.until is not None:
+            keep &= timestamp <= self.until
+        trader, timestamp, category = trader[keep], timestamp[keep], category[keep]
+        if not len(trader):
+            return
+
+        # Traders with fewer than `min_trades` trades are left out.
+        trader_start = np.concatenate([[True], trader[1:] != trader[:-1]])
+        starts = np.nonzero(trader_start)[0]
+        trade_counts = np.diff(np.append(starts, len(trader)))
+        if self.min_trades > 1:
+            keep = np.repeat(trade_counts >= self.min_trades, trade_counts)
+            trader, timestamp, category = trader[keep], timestamp[keep], category[keep]
+            trader_start = trader_start[keep]
+            trade_counts = trade_counts[trade_counts >= self.min_trades]
+        self.trader_count += len(trade_counts)
+        self.trade_count += len(trader)
+        if len(trader) < 2:
+            return
+
+        # A category run is a trader's consecutive trades in one category; dwell is measured from its first trade.
+        run_start = trader_start | np.concatenate([[True], category[1:] != category[:-1]])
+        run_id = np.cumsum(run_start) - 1
+        run_first_timestamp = timestamp[run_start][run_id]
+
+        # A switch is the last trade of a run followed by the same trader's next run.
+        switch = np.nonzero(run_start[1:] & ~trader_start[1:])[0]
+        source, target = category[switch], category[switch + 1]
+        gap = timestamp[switch + 1] - timestamp[switch]
+        dwell = timestamp[switch + 1] - run_first_timestamp[switch]
+        if self.max_gap_seconds is not None:
+            within = gap <= self.max_gap_seconds
+            switch, source, target, gap, dwell = switch[within], source[within], target[within], gap[within], dwell[within]
+
+        n = len(self.category_names)
+        pair = source.astype(np.int64) * n + target
+        self.transitions += np.bincount(pair, minlength=n * n).reshape(n, n)
+        self.gap_seconds += np.bincount(pair, weights=gap, minlength=n * n).reshape(n, n)
+        self.dwell_seconds += np.bincount(pair, weights=dwell, minlength=n * n).reshape(n, n)
+
+        bucket = np.searchsorted(DWELL_BUCKETS, dwell, side='right') - 1
+        self.dwell_buckets += np.bincount(pair * len(DWELL_BUCKETS) + bucket,
+                                          minlength=n * n * len(DWELL_BUCKETS)).reshape(n, n, len(DWELL_BUCKETS))
+
+        # Distinct traders per pair: one (trader, pair) combination each.
+        trader_of_switch = np.cumsum(trader_start)[switch]
+        distinct_pairs = np.unique(trader_of_switch.astype(np.int64) * n * n + pair) % (n * n)
+        self.traders += np.bincount(distinct_pairs, minlength=n * n).reshape(n, n)
+
+    # ------------------------------------------------------------------------
+    # Results
+    # ------------------------------------------------------------------------
+
+    def transition_rows(self, limit: int = None) -> List[Dict[str, Any]]:
+        """Every (from, to) pair with transitions, most first, with trader, gap and dwell stats."""
+        source, target = np.nonzero(self.transitions)
+        counts = self.transitions[source, target]
+        order = np.lexsort((target, source, -counts))[:limit]
+
+        results = []
+        for s, t in zip(source[order], target[order]):
+            count = int(self.transitions[s, t])
+            results.append({
+                'from_category': self.category_names[s],
+                'to_category': self.category_names[t],
+                'transitions': count,
+                'traders': int(self.traders[s, t]),
+                'avg_gap_seconds': float(self.gap_seconds[s, t] / count),
+                'avg_dwell_seconds': float(self.dwell_seconds[s, t] / count),
+                'dwell_buckets': dict(zip(DWELL_LABELS, self.dwell_buckets[s, t].tolist())),
+            })
+        return results
+
+    def category_flow(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """getCategoryFlow: category switches over all traders, most frequent first."""
+        return [{key: row[key] for key in ['from_category', 'to_category', 'transitions']}
+                for row in self.transition_rows(limit)]
+
+
+def write_category_flow(driver, flow: CategoryFlow) -> int:
+    """Replace the stored CategoryTransition nodes with the flow's transitions."""
+    rows = flow.transition_rows()
+    for row in rows:
+        row.pop('dwell_buckets')
+    with driver.session() as session:
+        for stmt in CATEGORY_FLOW_SCHEMA:
+            session.run(stmt).consume()
+        session.run(CLEAR_CATEGORY_FLOW_QUERY).consume()
+        session.run(CATEGORY_FLOW_QUERY, {'transitions': rows}).consume()
+    return len(rows)
+
+
+# ============================================================================
+# Snapshot scan and external merge sort
+# ============================================================================
+
+def _used_values(column: pa.Array) -> Tuple[np.ndarray, List[Any]]:
+    """Codes into the values that occur in a batch column (-1 for nulls).
+
+    Batches of a dictionary column share the file's whole dictionary, so
+    only the entries the batch uses are converted.
+    """
+    if not pa.types.is_dictionary(column.type):
+        column = column.dictionary_encode()
+    codes = pc.fill_null(column.indices, -1).to_numpy(zero_copy_only=False).astype(np.int64)
+    used = np.unique(codes[codes >= 0])
+    remap = np.full(len(column.dictionary) + 1, -1, dtype=np.int64)
+    remap[used] = np.arange(len(used))
+    return remap[codes], column.dictionary.take(pa.array(used, type=pa.int64())).to_pylist()
+
+
+def _snapshot_batches(root: str, categories: Dict[str, int]) -> Iterator[SortedColumns]:
+    """(trader key, timestamp, category code) per snapshot batch; `categories` grows as names appear."""
+    from trade_store import trade_dataset
+
+    trader_keys = {}
+    for batch in trade_dataset(root).to_batches(columns=['from', 'timestamp', 'category']):
+        trader_codes, addresses = _used_values(batch.column('from'))
+        category_codes, names = _used_values(batch.column('category'))
+
+        trader_lookup = np.array([trader_keys.setdefault(address, _trader_key(address)) for address in addresses]
+                                 + [0], dtype=np.uint64)
+        category_lookup = np.array([categories.setdefault(name or 'Unknown', len(categories)) for name in names]
+                                   + [-1], dtype=np.int64)
+        trader = trader_lookup[trader_codes]
+        timestamp = batch.column('timestamp').to_numpy(zero_copy_only=False).astype(np.int64)
+        keep = trader != 0
+        yield trader[keep], timestamp[keep], category_lookup[category_codes][keep]
+
+
+class _SpilledRuns:
+    """Sorted runs on disk, merged back into chunks of complete traders."""
+
+    def __init__(self, spill_dir: str = None):
+        self.spill_dir = spill_dir
+        self.directory = None
+        self.paths = []
+
+    def add(self, trader: np.ndarray, timestamp: np.ndarray, category: np.ndarray):
+        if self.directory is None:
+            if self.spill_dir:
+                os.makedirs(self.spill_dir, exist_ok=True)
+            self.directory = tempfile.mkdtemp(prefix='category_flow_', dir=self.spill_dir)
+        run = os.path.join(self.directory, f'run-{len(self.paths)}')
+        for name, column in zip(['trader', 'timestamp', 'category'], [trader, timestamp, category]):
+            np.save(f'{run}-{name}.npy', column)
+        self.paths.append(run)
+
+    def cleanup(self):
+        if self.directory:
+            shutil.rmtree(self.directory, ignore_errors=True)
+
+    def merge(self, memory_rows: int) -> Iterator[SortedColumns]:
+        """K-way merge: take every row up to the smallest block end across runs, sort, emit complete traders."""
+        runs = [tuple(np.load(f'{run}-{name}.npy', mmap_mode='r') for name in ['trader', 'timestamp', 'category'])
+                for run in self.paths]
+        block_rows = max(memory_rows // (len(runs) + 1), 1)
+        positions = [0] * len(runs)
+        carry = None
+
+        while True:
+            active = [i for i, run in enumerate(runs) if positions[i] < len(run[0])]
+            if not active:
+                break
+            blocks = {i: tuple(np.asarray(column[positions[i]:positions[i] + block_rows]) for column in runs[i])
+                      for i in active}
+
+            # Rows after the bound may still be followed by smaller rows from another run.
+            bound = min((int(blocks[i][0][-1]), int(blocks[i][1][-1])) for i in active)
+            bound_trader, bound_timestamp = np.uint64(bound[0]), bound[1]
+            taken = [] if carry is None else [carry]
+            for i in active:
+                trader, timestamp, category = blocks[i]
+                count = int(((trader < bound_trader) | ((trader == bound_trader) & (timestamp <= bound_timestamp))).sum())
+                taken.append((trader[:count], timestamp[:count], category[:count]))
+                positions[i] += count
+
+            trader, timestamp, category = _sort(*(np.concatenate(column) for column in zip(*taken)))
+
+            # The last trader may continue in the next block; hold its rows back.
+            split = np.searchsorted(trader, trader[-1], side='left')
+            carry = (trader[split:], timestamp[split:], category[split:])
+            if split:
+                yield trader[:split], timestamp[:split], category[:split]
+
+        if carry is not None and len(carry[0]):
+            yield carry
@@ -0,0 +1,335 @@
+"""Vectorized, in-process versions of the contrarian queries in apps/api's neo4j.service.ts."""
+from datetime import datetime, timezone
+from typing import List, Dict, Any, Optional, Sequence, Union
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from neo4j_import import prepare_market_rows, prepare_outcome_rows, collect_user_profiles, NULL_ADDRESS
+from trade_store import TRADE_SCHEMA
+
+TRADE_COLUMNS = ['hash', 'from', 'side', 'condition_id', 'outcome_index', 'size', 'price', 'timestamp']
+TRADE_COLUMNS_SCHEMA = pa.schema([TRADE_SCHEMA.field(name) for name in TRADE_COLUMNS])
+
+# Entry-price buckets used for the ROI breakdown (upper bounds are exclusive).
+DEFAULT_PRICE_BUCKETS = [0.0, 0.05, 0.1, 0.2, 0.3, 0.5, 0.7, 1.0]
+
+
+def _encode(column: pa.ChunkedArray):
+    """Dictionary-encode a string column into (codes, values); nulls get code -1."""
+    if pa.types.is_dictionary(column.type):
+        # Chunks of a dictionary column can carry different dictionaries.
+        encoded = column.unify_dictionaries().combine_chunks()
+    else:
+        encoded = column.combine_chunks().dictionary_encode()
+    codes = pc.fill_null(encoded.indices, -1).to_numpy(zero_copy_only=False).astype(np.int64)
+    return codes, encoded.dictionary.to_pylist()
+
+
+class ContrarianAnalytics:
+    """Trades, outcomes and market resolutions held as NumPy arrays.
+
+    A trade takes part in the analytics when its market and outcome exist in
+    `events`, like the MATCH chain User-Trade-Outcome-Market-Event in Cypher.
+    """
+
+    def __init__(self, events: List[Dict[str, Any]], trades: Union[pa.Table, List[Dict[str, Any]]],
+                 users: Optional[Dict[str, Dict[str, Any]]] = None):
+        if not isinstance(trades, pa.Table):
+            users = users if users is not None else collect_user_profiles(trades)
+            # The explicit schema keeps the column types when there are no trades.
+            rows = [{name: trade.get(name) for name in TRADE_COLUMNS} for trade in trades]
+            trades = pa.Table.from_pylist(rows, schema=TRADE_COLUMNS_SCHEMA)
+        self.users = users or {}
+
+        self._load_markets(events)
+        self._load_trades(trades)
+
+    @classmethod
+    def from_snapshot(cls, root: str) -> 'ContrarianAnalytics':
+        """Build the engine from a trade_store snapshot without touching Neo4j."""
+        from trade_store import load_events, load_trades, load_users
+
+        users = {}
+        for row in load_users(root).to_pylist():
+            users[row['address']] = {
+                'name': row['user_name'],
+                'pseudonym': row['user_pseudonym'],
+                'profile_image': row['user_profile_image'],
+            }
+        return cls(load_events(root), load_trades(root, columns=TRADE_COLUMNS), users)
+
+    # ------------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------------
+
+    def _load_markets(self, events: List[Dict[str, Any]]):
+        categories = {event.get('slug'): event.get('category', 'Unknown') for event in events}
+        market_rows = {}
+        for row in prepare_market_rows(events):
+            market_rows.setdefault(row['condition_id'], row)
+        markets = list(market_rows.values())
+
+        self.market_ids = [market['condition_id'] for market in markets]
+        self.market_index = {condition_id: i for i, condition_id in enumerate(self.market_ids)}
+        self.market_question = [market['question'] for market in markets]
+        self.market_slug = [market['slug'] for market in markets]
+        self.market_resolved = np.array([bool(market['resolved']) for market in markets], dtype=bool)
+
+        self.category_names = sorted(set(categories.get(market['event_slug'], 'Unknown') for market in markets))
+        category_index = {name: i for i, name in enumerate(self.category_names)}
+        self.market_category = np.array([category_index[categories.get(market['event_slug'], 'Unknown')]
+                                         for market in markets], dtype=np.int64)
+
+        # Outcomes are flattened to one slot per (market, outcome_index).
+        names = [[] for _ in markets]
+        for outcome in prepare_outcome_rows(events):
+            i = self.market_index.get(outcome['condition_id'])
+            if i is not None and outcome['outcome_index'] == len(names[i]):
+                names[i].append(outcome['outcome_name'])
+
+        self.outcome_count = np.array([len(n) for n in names], dtype=np.int64)
+        self.outcome_offset = np.concatenate([[0], np.cumsum(self.outcome_count)[:-1]]).astype(np.int64)
+        self.outcome_names = [name for market_names in names for name in market_names]
+        self.outcome_wins = np.array([
+            markets[m]['resolved'] and markets[m]['winning_outcome'] == name
+            for m, market_names in enumerate(names) for name in market_names
+        ], dtype=bool)
+
+    def _load_trades(self, trades: pa.Table):
+        market_codes, market_values = _encode(trades.column('condition_id'))
+        lookup = np.array([self.market_index.get(value, -1) for value in market_values] + [-1], dtype=np.int64)
+        market = lookup[market_codes]
+
+        trader_codes, self.trader_addresses = _encode(trades.column('from'))
+        side_codes, side_values = _encode(trades.column('side'))
+        is_buy = np.array([value == 'BUY' for value in side_values] + [False], dtype=bool)[side_codes]
+
+        outcome_index = trades.column('outcome_index').to_numpy(zero_copy_only=False).astype(np.int64)
+        trader_ok = np.array([bool(value) and value != NULL_ADDRESS for value in self.trader_addresses] + [False],
+                             dtype=bool)
+        hash_ok = pc.fill_null(pc.greater(pc.utf8_length(trades.column('hash')), 0), False)
+
+        linked = (market >= 0) & trader_ok[trader_codes] & hash_ok.to_numpy(zero_copy_only=False)
+        linked &= (outcome_index >= 0) & (outcome_index < np.append(self.outcome_count, 0)[market])
+
+        # Keep only trades that join to a user, market and outcome.
+        keep = np.nonzero(linked)[0]
+        self.trade_row = keep
+        self.market = market[keep]
+        self.trader = trader_codes[keep]
+        self.is_buy = is_buy[keep]
+        self.outcome_slot = self.outcome_offset[self.market] + outcome_index[keep]
+        self.price = trades.column('price').to_numpy(zero_copy_only=False).astype(np.float64)[keep]
+        self.size = trades.column('size').to_numpy(zero_copy_only=False).astype(np.float64)[keep]
+        self.timestamp = trades.column('timestamp').to_numpy(zero_copy_only=False).astype(np.int64)[keep]
+        self.category = self.market_category[self.market]
+        self.resolved = self.market_resolved[self.market]
+        self.is_winner = self.outcome_wins[self.outcome_slot]
+        self.tx_hash = trades.column('hash')
+
+    # ------------------------------------------------------------------------
+    # Building blocks
+    # ------------------------------------------------------------------------
+
+    def contrarian_mask(self, max_entry_price: float = 0.2, winners_only: bool = False) -> np.ndarray:
+        """Resolved-market BUY trades entered below `max_entry_price`."""
+        mask = self.resolved & self.is_buy & (self.price < max_entry_price) & (self.price > 0.0)
+        if winners_only:
+            mask &= self.is_winner
+        return mask
+
+    def roi_multiplier(self) -> np.ndarray:
+        """(1 - price) / price per trade (0 for zero-priced trades)."""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(self.price > 0, (1.0 - self.price) / self.price, 0.0)
+
+    def _category_code(self, category: Optional[str]) -> Optional[int]:
+        if not category or category == 'All':
+            return None
+        return self.category_names.index(category) if category in self.category_names else -1
+
+    def _user(self, trader_code: int) -> Dict[str, Any]:
+        address = self.trader_addresses[trader_code]
+        profile = self.users.get(address, {})
+        return {
+            'trader_address': address,
+            'trader_name': profile.get('name'),
+            'trader_pseudonym': profile.get('pseudonym'),
+            'trader_image': profile.get('profile_image'),
+        }
+
+    # ------------------------------------------------------------------------
+    # Queries (same semantics and output shape as neo4j.service.ts)
+    # ------------------------------------------------------------------------
+
+    def leaderboard(self, limit: int = 20, category: Optional[str] = None, min_roi: float = 0,
+                    max_entry_price: float = 0.2) -> List[Dict[str, Any]]:
+        """getContrariansLeaderboard: winning low-price entries ranked by ROI."""
+        roi_percent = self.roi_multiplier() * 100
+        mask = self.contrarian_mask(max_entry_price, winners_only=True) & (roi_percent >= min_roi)
+        category_code = self._category_code(category)
+        if category_code is not None:
+            mask &= self.category == category_code
+
+        candidates = np.nonzero(mask)[0]
+        order = np.lexsort((-self.size[candidates], -roi_percent[candidates]))[:limit]
+
+        results = []
+        for i in candidates[order]:
+            m = self.market[i]
+            results.append({
+                **self._user(self.trader[i]),
+                'market_question': self.market_question[m],
+                'market_slug': self.market_slug[m],
+                'category': self.category_names[self.category[i]],
+                'outcome': self.outcome_names[self.outcome_slot[i]],
+                'entry_price': float(self.price[i]),
+                'investment_usd': float(self.size[i]),
+                'payout_usd': float(self.size[i] / self.price[i]),
+                'roi_percent': float(roi_percent[i]),
+                'trade_time': datetime.fromtimestamp(int(self.timestamp[i])).isoformat(),
+                'tx_hash': self.tx_hash[int(self.trade_row[i])].as_py(),
+            })
+        return results
+
+    def success_rate_by_category(self, max_entry_price: float = 0.2) -> List[Dict[str, Any]]:
+        """getSuccessRateByCategory: how often low-price entries win, per category."""
+        mask = self.contrarian_mask(max_entry_price)
+        category = self.category[mask]
+        won = self.is_winner[mask]
+        size = self.size[mask]
+        n = len(self.category_names)
+
+        total_bets = np.bincount(category, minlength=n)
+        winning_bets = np.bincount(category, weights=won, minlength=n)
+        winning_volume = np.bincount(category, weights=np.where(won, size, 0.0), minlength=n)
+        total_volume = np.bincount(category, weights=size, minlength=n)
+        price_sum = np.bincount(category, weights=self.price[mask], minlength=n)
+
+        results = []
+        for c in np.nonzero(total_bets)[0]:
+            results.append({
+                'category': self.category_names[c],
+                'total_contrarian_bets': int(total_bets[c]),
+                'winning_bets': int(winning_bets[c]),
+                'success_rate': float(winning_bets[c] / total_bets[c] * 100),
+                'winning_volume': float(winning_volume[c]),
+                'total_volume': float(total_volume[c]),
+                'avg_entry_price': float(price_sum[c] / total_bets[c]),
+            })
+        return sorted(results, key=lambda row: row['success_rate'], reverse=True)
+
+    def top_contrarian_traders(self, limit: int = 20, min_wins: int = 2,
+                               max_entry_price: float = 0.2) -> List[Dict[str, Any]]:
+        """getTopContrarianTraders: traders with the most winning low-price entries."""
+        stats = self.trader_contrarian_stats(max_entry_price)
+        qualified = np.nonzero(stats['contrarian_wins'] >= min_wins)[0]
+        order = np.lexsort((-stats['profit'][qualified], -stats['contrarian_wins'][qualified]))[:limit]
+
+        results = []
+        for t in qualified[order]:
+            results.append({
+                **self._user(t),
+                'contrarian_wins': int(stats['contrarian_wins'][t]),
+                'total_investment': float(stats['total_investment'][t]),
+                'total_payout': float(stats['total_payout'][t]),
+                'profit': float(stats['profit'][t]),
+                'roi_percent': float(stats['profit'][t] / stats['total_investment'][t] * 100)
+                if stats['total_investment'][t] else 0.0,
+                'avg_entry_price': float(stats['avg_entry_price'][t]),
+                'best_entry_price': float(stats['best_entry_price'][t]),
+            })
+        return results
+
+    def trader_contrarian_stats(self, max_entry_price: float = 0.2) -> Dict[str, np.ndarray]:
+        """Per-trader contrarian wins, investment, payout and entry prices (indexed by trader code)."""
+        mask = self.contrarian_mask(max_entry_price, winners_only=True)
+        trader = self.trader[mask]
+        price = self.price[mask]
+        size = self.size[mask]
+        n = len(self.trader_addresses)
+
+        wins = np.bincount(trader, minlength=n)
+        investment = np.bincount(trader, weights=size, minlength=n)
+        payout = np.bincount(trader, weights=size / price, minlength=n)
+        price_sum = np.bincount(trader, weights=price, minlength=n)
+        best_price = np.full(n, np.inf)
+        np.minimum.at(best_price, trader, price)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            avg_price = np.where(wins > 0, price_sum / np.maximum(wins, 1), 0.0)
+
+        return {
+            'contrarian_wins': wins,
+            'total_investment': investment,
+            'total_payout': payout,
+            'profit': payout - investment,
+            'avg_entry_price': avg_price,
+            'best_entry_price': np.where(wins > 0, best_price, 0.0),
+        }
+
+    def contrarian_timeline(self, max_entry_price: float = 0.2, interval_seconds: int = 86400,
+                            category: Optional[str] = None) -> List[Dict[str, Any]]:
+        """getContrarianTimelineBuckets: low-price entries on resolved markets per time bucket, oldest first."""
+        mask = self.contrarian_mask(max_entry_price)
+        category_code = self._category_code(category)
+        if category_code is not None:
+            mask &= self.category == category_code
+
+        start = self.timestamp[mask] - self.timestamp[mask] % interval_seconds
+        buckets, bucket = np.unique(start, return_inverse=True)
+        won = self.is_winner[mask]
+        size = self.size[mask]
+        n = len(buckets)
+
+        trades = np.bincount(bucket, minlength=n)
+        wins = np.bincount(bucket, weights=won, minlength=n)
+        volume = np.bincount(bucket, weights=size, minlength=n)
+        winning_volume = np.bincount(bucket, weights=np.where(won, size, 0.0), minlength=n)
+        payout = np.bincount(bucket, weights=np.where(won, size / self.price[mask], 0.0), minlength=n)
+
+        results = []
+        for b in range(n):
+            results.append({
+                'timestamp': int(buckets[b]),
+                'date': datetime.fromtimestamp(int(buckets[b]), timezone.utc).isoformat(),
+                'trades': int(trades[b]),
+                'winning_trades': int(wins[b]),
+                'win_rate': float(wins[b] / trades[b] * 100),
+                'volume': float(volume[b]),
+                'winning_volume': float(winning_volume[b]),
+                'payout': float(payout[b]),
+                'roi_percent': float((payout[b] - volume[b]) / volume[b] * 100) if volume[b] else 0.0,
+            })
+        return results
+
+    def roi_by_entry_bucket(self, buckets: Sequence[float] = DEFAULT_PRICE_BUCKETS) -> List[Dict[str, Any]]:
+        """Win rate and realized ROI of resolved BUY trades per entry-price bucket."""
+        mask = self.resolved & self.is_buy & (self.price > 0.0)
+        price = self.price[mask]
+        size = self.size[mask]
+        won = self.is_winner[mask]
+
+        edges = np.asarray(buckets, dtype=np.float64)
+        bucket = np.clip(np.searchsorted(edges, price, side='right') - 1, 0, len(edges) - 2)
+        n = len(edges) - 1
+
+        bets = np.bincount(bucket, minlength=n)
+        wins = np.bincount(bucket, weights=won, minlength=n)
+        invested = np.bincount(bucket, weights=size, minlength=n)
+        returned = np.bincount(bucket, weights=np.where(won, size / price, 0.0), minlength=n)
+
+        results = []
+        for b in range(n):
+            results.append({
+                'min_price': float(edges[b]),
+                'max_price': float(edges[b + 1]),
+                'bets': int(bets[b]),
+                'win_rate': float(wins[b] / bets[b] * 100) if bets[b] else 0.0,
+                'invested_usd': float(invested[b]),
+                'payout_usd': float(returned[b]),
+                'roi_percent': float((returned[b] - invested[b]) / invested[b] * 100) if invested[b] else 0.0,
+            })
+        return results
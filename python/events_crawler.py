@@ -0,0 +1,225 @@
+"""Paged, concurrent crawl of Gamma /events with per-page market and outcome extraction."""
+import asyncio
+import json
+from datetime import datetime
+from typing import List, Dict, Any, Optional, AsyncIterator, Union
+
+from api_client import AsyncApiClient, ApiMetrics
+from page_cache import PageCache
+from trade_fetcher import TokenBucket, run_async
+
+GAMMA_API_BASE = 'https://gamma-api.polymarket.com'
+EVENTS_PAGE_SIZE = 100
+
+PRIORITY_CATEGORIES = ['Sports', 'Politics', 'Finance', 'Crypto', 'Science', 'Entertainment']
+IGNORED_TAGS = ['All', 'Hide From New', 'Daily', 'Recurring']
+
+
+def extract_category_from_tags(event: Dict[str, Any]) -> str:
+    """Extract category from event tags."""
+    if event.get('category'):
+        return event['category']
+
+    tags = event.get('tags', [])
+
+    for tag in tags:
+        label = tag.get('label', '')
+        if label in PRIORITY_CATEGORIES:
+            return label
+
+    for tag in tags:
+        label = tag.get('label', '')
+        if label and label not in IGNORED_TAGS:
+            return label
+
+    return 'Unknown'
+
+
+def extract_outcomes_from_market(market: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Extract outcomes with token IDs and prices from market."""
+    outcomes_str = market.get('outcomes', '[]')
+    outcome_names = json.loads(outcomes_str) if isinstance(outcomes_str, str) else (outcomes_str or [])
+
+    prices_str = market.get('outcomePrices', '[]')
+    prices = json.loads(prices_str) if isinstance(prices_str, str) else (prices_str or [])
+
+    token_ids_str = market.get('clobTokenIds', '[]')
+    token_ids = json.loads(token_ids_str) if isinstance(token_ids_str, str) else (token_ids_str or [])
+
+    outcomes = []
+    for i, outcome_name in enumerate(outcome_names):
+        outcomes.append({
+            'token_id': token_ids[i] if i < len(token_ids) else f"unknown_{market['id']}_{i}",
+            'name': outcome_name,
+            'price': prices[i] if i < len(prices) else '0.5',
+            'condition_id': market.get('conditionId'),  # For linking trades to markets
+        })
+
+    return outcomes
+
+
+def _date_param(value: Union[str, datetime, None]) -> Optional[str]:
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%dT%H:%M:%SZ')
+    return value
+
+
+class EventCrawler:
+    """Crawl Gamma /events page by page with several requests in flight.
+
+    Pages are requested at increasing offsets by `concurrency` workers that
+    share one token bucket; the first short page marks the end of the data.
+    Date (`start_date_*`, `end_date_*`, ISO strings or datetimes) and tag
+    (`tag_id`, `tag_slug`) filters are passed through to the API.
+
+    Every page is processed as it arrives: categories are set on the events
+    and outcomes and condition_ids are collected into `events`, `outcomes`
+    and `condition_ids`. `iter_condition_ids()` yields new markets straight
+    away, so the trade fetcher can start on them while the crawl continues.
+    """
+
+    def __init__(self, base_url: str = GAMMA_API_BASE, max_events: int = None, closed: bool = True,
+                 start_date_min: Union[str, datetime] = None, start_date_max: Union[str, datetime] = None,
+                 end_date_min: Union[str, datetime] = None, end_date_max: Union[str, datetime] = None,
+                 tag_id: int = None, tag_slug: str = None, page_size: int = EVENTS_PAGE_SIZE,
+                 concurrency: int = 4, requests_per_second: float = 5.0, cache: PageCache = None,
+                 http2: bool = True, max_retries: int = 5, metrics: ApiMetrics = None):
+        self.url = f'{base_url}/events'
+        self.max_events = max_events
+        self.page_size = page_size
+        self.concurrency = concurrency
+        self.requests_per_second = requests_per_second
+        self.cache = cache
+        self.http2 = http2
+        self.max_retries = max_retries
+        self.metrics = metrics
+
+        filters = {
+            'closed': 'true' if closed else 'false',
+            'start_date_min': _date_param(start_date_min),
+            'start_date_max': _date_param(start_date_max),
+            'end_date_min': _date_param(end_date_min),
+            'end_date_max': _date_param(end_date_max),
+            'tag_id': tag_id,
+            'tag_slug': tag_slug,
+        }
+        self.filters = {key: value for key, value in filters.items() if value is not None}
+
+        self.events = []
+        self.outcomes = []
+        self.condition_ids = set()
+        self.market_count = 0
+        self.pages = 0
+        self.finished = False
+        self.seen_events = set()
+
+    def page_params(self, offset: int, limit: int) -> Dict[str, Any]:
+        # Newest events first, as the single-page fetch did.
+        return {'limit': limit, 'offset': offset, **self.filters, 'order': 'id', 'ascending': 'false'}
+
+    async def fetch_page(self, client: AsyncApiClient, limiter: TokenBucket, offset: int,
+                         limit: int) -> List[Dict[str, Any]]:
+        params = self.page_params(offset, limit)
+
+        if self.cache:
+            cached_events = self.cache.get(self.url, params)
+            if cached_events is not None:
+                return cached_events
+
+        await limiter.acquire()
+        response = await client.get(self.url, params=params)
+        response.raise_for_status()
+
+        events = response.json()
+        if self.cache:
+            self.cache.put(self.url, params, events)
+
+        return events
+
+    async def iter_pages(self) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Yield raw event pages in arrival order (not necessarily offset order)."""
+        limiter = TokenBucket(self.requests_per_second)
+        pages = asyncio.Queue(maxsize=2 * self.concurrency)
+        finished = object()
+        # Offsets at or past `end` hold no more data (max_events or a short page).
+        state = {'next_offset': 0, 'end': self.max_events}
+
+        async with AsyncApiClient(self.concurrency, self.http2, self.max_retries, metrics=self.metrics) as client:
+
+            async def worker():
+                while True:
+                    offset = state['next_offset']
+                    if state['end'] is not None and offset >= state['end']:
+                        return
+                    state['next_offset'] += self.page_size
+
+                    limit = self.page_size
+                    if self.max_events is not None:
+                        limit = min(limit, self.max_events - offset)
+
+                    events = await self.fetch_page(client, limiter, offset, limit)
+                    if len(events) < limit:
+                        end = offset + len(events)
+                        state['end'] = end if state['end'] is None else min(state['end'], end)
+
+                    if events:
+                        await pages.put(events)
+
+            async def crawl():
+                try:
+                    await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+                finally:
+                    await pages.put(finished)
+
+            task = asyncio.create_task(crawl())
+            try:
+                while True:
+                    page = await pages.get()
+                    if page is finished:
+                        break
+                    yield page
+                await task
+            finally:
+                if not task.done():
+                    task.cancel()
+
+    def add_page(self, events: List[Dict[str, Any]]) -> List[str]:
+        """Process one page of events and return the condition_ids not seen before."""
+        new_condition_ids = []
+        for event in events:
+            # New closed events shift the pages during a crawl; skip repeats.
+            event_key = event.get('id') or event.get('slug')
+            if event_key in self.seen_events:
+                continue
+            self.seen_events.add(event_key)
+
+            event['category'] = extract_category_from_tags(event)
+            self.events.append(event)
+
+            for market in event.get('markets', []):
+                self.market_count += 1
+                self.outcomes.extend(extract_outcomes_from_market(market))
+
+                condition_id = market.get('conditionId')
+                if condition_id and condition_id not in self.condition_ids:
+                    self.condition_ids.add(condition_id)
+                    new_condition_ids.append(condition_id)
+
+        self.pages += 1
+        return new_condition_ids
+
+    async def iter_condition_ids(self) -> AsyncIterator[str]:
+        """Crawl and yield each market's condition_id as soon as its page is processed."""
+        async for page in self.iter_pages():
+            for condition_id in self.add_page(page):
+                yield condition_id
+        self.finished = True
+
+    async def crawl(self) -> List[Dict[str, Any]]:
+        async for _ in self.iter_condition_ids():
+            pass
+        return self.events
+
+    def run(self) -> List[Dict[str, Any]]:
+        """Crawl to the end (blocking) and return the events."""
+        return run_async(self.crawl())
@@ -0,0 +1,310 @@
+"""Materialized aggregates (holdings, contrarian stats) stored in the graph, so the API reads them instead of aggregating."""
+from typing import List, Dict, Any, Callable, Iterable, Optional, Set
+
+# Entry-price thresholds with precomputed trader and category stats.
+AGGREGATE_THRESHOLDS = [0.1, 0.2, 0.3]
+
+# Contrarian timeline cube: hourly cells per category, entry-price bucket and won/lost.
+# The API rolls hours up to any coarser interval; price bucket edges must match its list.
+TIMELINE_BUCKET_SECONDS = 3600
+TIMELINE_PRICE_BUCKETS = [0.0, 0.05, 0.1, 0.2, 0.3, 0.5, 0.7, 1.0]
+
+BATCH_SIZE = 1000
+
+AGGREGATE_SCHEMA = [
+    'CREATE CONSTRAINT trader_stats_id IF NOT EXISTS FOR (s:TraderContrarianStats) REQUIRE (s.address, s.max_entry_price) IS UNIQUE',
+    'CREATE CONSTRAINT category_stats_id IF NOT EXISTS FOR (s:CategoryStats) REQUIRE (s.category, s.max_entry_price) IS UNIQUE',
+    'CREATE INDEX trader_stats_wins IF NOT EXISTS FOR (s:TraderContrarianStats) ON (s.max_entry_price, s.contrarian_wins)',
+    'CREATE INDEX trade_won IF NOT EXISTS FOR (t:Trade) ON (t.won)',
+    'CREATE INDEX trade_roi IF NOT EXISTS FOR (t:Trade) ON (t.roi_percent)',
+    'CREATE INDEX user_resolved_market_count IF NOT EXISTS FOR (u:User) ON (u.resolved_market_count)',
+    'CREATE CONSTRAINT timeline_bucket_id IF NOT EXISTS FOR (b:TimelineBucket) REQUIRE (b.hour, b.category, b.price_bucket, b.won) IS UNIQUE',
+    'CREATE INDEX timeline_bucket_max_price IF NOT EXISTS FOR (b:TimelineBucket) ON (b.max_price)',
+]
+
+# Per trade: did it back the winning outcome of a resolved market, and its ROI if it did.
+TRADE_OUTCOME_QUERY = '''
+    UNWIND $condition_ids as condition_id
+    MATCH (m:Market {condition_id: condition_id})-[:HAS_OUTCOME]->(o:Outcome)<-[:FOR_OUTCOME]-(t:Trade)
+    SET t.won = CASE WHEN m.resolved = true THEN m.winning_outcome = o.outcome_name ELSE null END,
+        t.roi_percent = CASE WHEN t.price > 0.0 THEN (1.0 - t.price) / t.price * 100 ELSE null END
+'''
+
+MARKET_STATS_QUERY = '''
+    UNWIND $condition_ids as condition_id
+    MATCH (m:Market {condition_id: condition_id})
+    OPTIONAL MATCH (m)<-[:ON_MARKET]-(t:Trade)<-[:PLACED_TRADE]-(u:User)
+    WITH m, count(DISTINCT u) as trader_count, count(DISTINCT t) as trade_count
+    SET m.trader_count = trader_count,
+        m.trade_count = trade_count
+'''
+
+# Same aggregation as getTopContrarianTraders, for every threshold at once.
+TRADER_STATS_QUERY = '''
+    UNWIND $addresses as address
+    MATCH (u:User {address: address})
+    OPTIONAL MATCH (u)-[:PLACED_TRADE]->(:Trade)-[:ON_MARKET]->(rm:Market {resolved: true})
+    WITH u, count(DISTINCT rm) as resolved_market_count
+    SET u.resolved_market_count = resolved_market_count
+    WITH u
+    UNWIND $thresholds as threshold
+    OPTIONAL MATCH (u)-[:PLACED_TRADE]->(t:Trade)
+    WHERE t.won = true AND t.side = 'BUY' AND t.price < threshold AND t.price > 0.0
+    WITH u, threshold,
+         count(DISTINCT t) as contrarian_wins,
+         sum(t.size_usdc) as total_investment,
+         sum(t.size_usdc / t.price) as total_payout,
+         avg(t.price) as avg_entry_price,
+         min(t.price) as best_entry_price
+    MERGE (s:TraderContrarianStats {address: u.address, max_entry_price: threshold})
+    SET s.contrarian_wins = contrarian_wins,
+        s.total_investment = total_investment,
+        s.total_payout = total_payout,
+        s.profit = total_payout - total_investment,
+        s.roi_percent = CASE WHEN total_investment > 0 THEN (total_payout - total_investment) / total_investment * 100 ELSE 0.0 END,
+        s.avg_entry_price = avg_entry_price,
+        s.best_entry_price = best_entry_price
+    MERGE (u)-[:HAS_CONTRARIAN_STATS]->(s)
+'''
+
+# Same aggregation as getSuccessRateByCategory, for every threshold at once.
+CATEGORY_STATS_QUERY = '''
+    UNWIND $categories as category
+    UNWIND $thresholds as threshold
+    OPTIONAL MATCH (:User)-[:PLACED_TRADE]->(t:Trade)-[:FOR_OUTCOME]->(o:Outcome)
+          <-[:HAS_OUTCOME]-(m:Market)-[:PART_OF_EVENT]->(e:Event {category: category})
+    WHERE m.resolved = true AND t.side = 'BUY' AND t.price < threshold AND t.price > 0.0
+    WITH category, threshold, t, (m.winning_outcome = o.outcome_name) as is_winner
+    WITH category, threshold,
+         count(DISTINCT t) as total_contrarian_bets,
+         sum(CASE WHEN is_winner THEN 1 ELSE 0 END) as winning_bets,
+         sum(CASE WHEN is_winner THEN t.size_usdc ELSE 0 END) as winning_volume,
+         sum(t.size_usdc) as total_volume,
+         avg(t.price) as avg_entry_price
+    MERGE (s:CategoryStats {category: category, max_entry_price: threshold})
+    SET s.total_contrarian_bets = total_contrarian_bets,
+        s.winning_bets = winning_bets,
+        s.success_rate = CASE WHEN total_contrarian_bets > 0 THEN toFloat(winning_bets) / total_contrarian_bets * 100 ELSE 0.0 END,
+        s.winning_volume = winning_volume,
+        s.total_volume = total_volume,
+        s.avg_entry_price = avg_entry_price
+'''
+
+# Adds resolved-market BUY trades that are not in the cube yet (all of them on a rebuild)
+# and records the won flag and category they were counted under, so a sync only rolls up
+# new trades and newly resolved markets. Needs Trade.won, so it runs after
+# TRADE_OUTCOME_QUERY. Buckets are [lo, hi), so the cells at max_price <= x hold exactly
+# the trades with price < x, as in the live timeline query.
+TIMELINE_QUERY = '''
+    UNWIND $condition_ids as condition_id
+    MATCH (m:Market {condition_id: condition_id})<-[:ON_MARKET]-(t:Trade)
+    WHERE t.won IS NOT NULL AND t.side = 'BUY' AND t.price > 0.0 AND t.price < last($price_buckets)
+      AND ($rebuild OR t.timeline_won IS NULL)
+    OPTIONAL MATCH (m)-[:PART_OF_EVENT]->(e:Event)
+    WITH t, coalesce(e.category, 'Unknown') as category
+    SET t.timeline_won = t.won, t.timeline_category = category
+    WITH t, category, size([edge IN $price_buckets WHERE edge <= t.price]) - 1 as price_bucket
+    WITH t.timestamp.epochSeconds - t.timestamp.epochSeconds % $bucket_seconds as hour,
+         category, price_bucket, t.won as won,
+         count(*) as trades,
+         sum(t.size_usdc) as volume,
+         sum(CASE WHEN t.won THEN t.size_usdc / t.price ELSE 0.0 END) as payout
+    MERGE (b:TimelineBucket {hour: hour, category: category, price_bucket: price_bucket, won: won})
+    ON CREATE SET b.trades = 0, b.volume = 0.0, b.payout = 0.0,
+                  b.min_price = $price_buckets[price_bucket], b.max_price = $price_buckets[price_bucket + 1]
+    SET b.trades = b.trades + trades,
+        b.volume = b.volume + volume,
+        b.payout = b.payout + payout
+    RETURN count(b) as buckets
+'''
+
+# Takes counted trades back out of their cells when the market's resolution (won flag) or
+# category changed since, or the market is no longer resolved. TIMELINE_QUERY then counts
+# them again under the new values; emptied cells are deleted.
+TIMELINE_RETRACT_QUERY = '''
+    UNWIND $condition_ids as condition_id
+    MATCH (m:Market {condition_id: condition_id})<-[:ON_MARKET]-(t:Trade)
+    WHERE t.timeline_won IS NOT NULL
+    OPTIONAL MATCH (m)-[:PART_OF_EVENT]->(e:Event)
+    WITH t, coalesce(e.category, 'Unknown') as category
+    WHERE t.won IS NULL OR t.won <> t.timeline_won OR category <> t.timeline_category
+    WITH t, t.timeline_won as won, t.timeline_category as category,
+         size([edge IN $price_buckets WHERE edge <= t.price]) - 1 as price_bucket
+    REMOVE t.timeline_won, t.timeline_category
+    WITH t.timestamp.epochSeconds - t.timestamp.epochSeconds % $bucket_seconds as hour,
+         category, price_bucket, won,
+         count(*) as trades,
+         sum(t.size_usdc) as volume,
+         sum(CASE WHEN won THEN t.size_usdc / t.price ELSE 0.0 END) as payout
+    MATCH (b:TimelineBucket {hour: hour, category: category, price_bucket: price_bucket, won: won})
+    SET b.trades = b.trades - trades,
+        b.volume = b.volume - volume,
+        b.payout = b.payout - payout
+    WITH b WHERE b.trades <= 0
+    DETACH DELETE b
+'''
+
+# Per (user, outcome) position from BUY and SELL trades. Sizes are USDC, so
+# shares = size / price. Sells are booked against the average entry price;
+# the remaining shares settle at 1/0 once the market resolves and are marked
+# to the outcome's current price until then.
+HOLDINGS_QUERY = '''
+    UNWIND $condition_ids as condition_id
+    MATCH (m:Market {condition_id: condition_id})-[:HAS_OUTCOME]->(o:Outcome)<-[:FOR_OUTCOME]-(t:Trade)<-[:PLACED_TRADE]-(u:User)
+    WHERE t.price > 0.0
+    WITH m, o, u,
+         sum(CASE WHEN t.side = 'BUY' THEN t.size_usdc ELSE 0.0 END) as bought_usdc,
+         sum(CASE WHEN t.side = 'BUY' THEN t.size_usdc / t.price ELSE 0.0 END) as bought_shares,
+         sum(CASE WHEN t.side = 'SELL' THEN t.size_usdc ELSE 0.0 END) as sold_usdc,
+         sum(CASE WHEN t.side = 'SELL' THEN t.size_usdc / t.price ELSE 0.0 END) as sold_shares,
+         max(t.timestamp) as last_trade
+    WITH m, o, u, bought_usdc, sold_usdc, sold_shares, last_trade,
+         CASE WHEN bought_shares > 0 THEN bought_usdc / bought_shares ELSE 0.0 END as avg_entry_price,
+         CASE WHEN bought_shares > sold_shares THEN bought_shares - sold_shares ELSE 0.0 END as shares
+    WITH m, o, u, bought_usdc, sold_usdc, last_trade, avg_entry_price, shares,
+         sold_usdc - sold_shares * avg_entry_price as trading_pnl,
+         CASE
+             WHEN m.resolved = true AND m.winning_outcome = o.outcome_name THEN shares * (1.0 - avg_entry_price)
+             WHEN m.resolved = true THEN -shares * avg_entry_price
+             ELSE null
+         END as settlement_pnl
+    MERGE (u)-[h:HOLDS]->(o)
+    SET h.invested_usdc = bought_usdc,
+        h.sold_usdc = sold_usdc,
+        h.shares = shares,
+        h.avg_entry_price = avg_entry_price,
+        h.realized_pnl = trading_pnl + coalesce(settlement_pnl, 0.0),
+        h.unrealized_pnl = CASE WHEN settlement_pnl IS NULL
+                               THEN shares * (coalesce(toFloat(o.current_price), avg_entry_price) - avg_entry_price)
+                               ELSE 0.0 END,
+        h.last_updated = last_trade
+    RETURN count(h) as holdings
+'''
+
+
+def _batches(items: List[Any], size: int = BATCH_SIZE) -> Iterable[List[Any]]:
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def create_aggregate_schema(driver):
+    """Constraints and indexes the API's precomputed lookups rely on."""
+    with driver.session() as session:
+        for stmt in AGGREGATE_SCHEMA:
+            try:
+                session.run(stmt)
+            except Exception:
+                pass  # Constraint/index may already exist
+
+
+def affected_traders(driver, condition_ids: Optional[List[str]]) -> List[str]:
+    """Addresses of traders with trades on the given markets (all traders for None)."""
+    with driver.session() as session:
+        if condition_ids is None:
+            result = session.run('MATCH (u:User) WHERE (u)-[:PLACED_TRADE]->() RETURN u.address as address')
+        else:
+            result = session.run('''
+                UNWIND $condition_ids as condition_id
+                MATCH (:Market {condition_id: condition_id})<-[:ON_MARKET]-(:Trade)<-[:PLACED_TRADE]-(u:User)
+                RETURN DISTINCT u.address as address
+            ''', {'condition_ids': condition_ids})
+        return [record['address'] for record in result]
+
+
+def affected_categories(driver, condition_ids: Optional[List[str]]) -> List[str]:
+    """Categories of the events the given markets belong to (all categories for None)."""
+    with driver.session() as session:
+        if condition_ids is None:
+            result = session.run('MATCH (e:Event) WHERE e.category IS NOT NULL RETURN DISTINCT e.category as category')
+        else:
+            result = session.run('''
+                UNWIND $condition_ids as condition_id
+                MATCH (:Market {condition_id: condition_id})-[:PART_OF_EVENT]->(e:Event)
+                WHERE e.category IS NOT NULL
+                RETURN DISTINCT e.category as category
+            ''', {'condition_ids': condition_ids})
+        return [record['category'] for record in result]
+
+
+def all_market_ids(driver) -> List[str]:
+    with driver.session() as session:
+        result = session.run('MATCH (m:Market) RETURN m.condition_id as condition_id')
+        return [record['condition_id'] for record in result]
+
+
+def refresh_holdings(driver, condition_ids: Optional[Set[str]] = None, markets_per_batch: int = 25,
+                     on_batch: Callable[[int], None] = None) -> int:
+    """Recompute HOLDS positions and P&L, a few markets per transaction.
+
+    Every batch only touches the trades of its markets, so memory per
+    transaction stays bounded and the total work grows linearly. With
+    `condition_ids=None` all markets are processed.
+    """
+    markets = all_market_ids(driver) if condition_ids is None else sorted(condition_ids)
+    holdings = 0
+
+    with driver.session() as session:
+        for batch in _batches(markets, markets_per_batch):
+            holdings += session.run(HOLDINGS_QUERY, {'condition_ids': batch}).single()['holdings']
+            if on_batch:
+                on_batch(len(batch))
+
+    return holdings
+
+
+def refresh_timeline(driver, condition_ids: Optional[Set[str]] = None, markets_per_batch: int = 25) -> int:
+    """Roll contrarian-timeline trades into TimelineBucket cells; returns the cells written.
+
+    Cells are sums, so a sync adds the trades of the given markets that are
+    not counted yet, after taking out the ones whose market resolution or
+    category changed since they were counted. With `condition_ids=None` the
+    cube is rebuilt.
+    """
+    rebuild = condition_ids is None
+    markets = all_market_ids(driver) if rebuild else sorted(condition_ids)
+    buckets = 0
+
+    with driver.session() as session:
+        if rebuild:
+            session.run('MATCH (b:TimelineBucket) DETACH DELETE b').consume()
+        for batch in _batches(markets, markets_per_batch):
+            parameters = {
+                'condition_ids': batch,
+                'rebuild': rebuild,
+                'bucket_seconds': TIMELINE_BUCKET_SECONDS,
+                'price_buckets': TIMELINE_PRICE_BUCKETS,
+            }
+            if not rebuild:
+                session.run(TIMELINE_RETRACT_QUERY, parameters).consume()
+            buckets += session.run(TIMELINE_QUERY, parameters).single()['buckets']
+
+    return buckets
+
+
+def refresh_aggregates(driver, condition_ids: Optional[Set[str]] = None,
+                       thresholds: List[float] = AGGREGATE_THRESHOLDS) -> Dict[str, int]:
+    """Recompute the stored aggregates that depend on the given markets.
+
+    Pass the markets a sync touched (new trades, changed resolution or
+    outcomes); traders and categories with activity on them are refreshed
+    completely. With `condition_ids=None` everything is rebuilt.
+    """
+    markets = all_market_ids(driver) if condition_ids is None else sorted(condition_ids)
+    traders = affected_traders(driver, None if condition_ids is None else markets)
+    categories = affected_categories(driver, None if condition_ids is None else markets)
+
+    with driver.session() as session:
+        # Trade flags first: the trader stats read them.
+        for batch in _batches(markets):
+            session.run(TRADE_OUTCOME_QUERY, {'condition_ids': batch}).consume()
+            session.run(MARKET_STATS_QUERY, {'condition_ids': batch}).consume()
+
+        for batch in _batches(traders):
+            session.run(TRADER_STATS_QUERY, {'addresses': batch, 'thresholds': thresholds}).consume()
+
+        session.run(CATEGORY_STATS_QUERY, {'categories': categories, 'thresholds': thresholds}).consume()
+
+    timeline_buckets = refresh_timeline(driver, condition_ids)
+
+    return {'markets': len(markets), 'traders': len(traders), 'categories': len(categories),
+            'timeline_buckets': timeline_buckets}
@@ -0,0 +1,241 @@
+"""Markets with overlapping trader sets via MinHash signatures and LSH banding (getMarketCorrelation at full scale)."""
+from typing import List, Dict, Any, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+
+DEFAULT_NUM_PERM = 128
+
+# Markets with a Jaccard overlap of at least this are reported.
+DEFAULT_THRESHOLD = 0.2
+
+# Weight of missed pairs against extra candidates when picking LSH bands. Candidates are
+# verified exactly, so a false positive only costs verification time.
+DEFAULT_FALSE_NEGATIVE_WEIGHT = 0.9
+
+# (market, trader) pairs hashed at once; memory is pairs × num_perm × 8 bytes.
+SIGNATURE_BLOCK_PAIRS = 100_000
+
+# Candidate pairs verified at once.
+VERIFY_BLOCK_PAIRS = 200_000
+
+BATCH_SIZE = 5000
+
+# Universal hashing (a·x + b) mod p with p = 2^31 - 1: a, b and trader codes below p keep a·x + b below 2^64.
+_MERSENNE_PRIME = np.uint64((1 << 31) - 1)
+_MAX_HASH = np.iinfo(np.uint32).max
+
+CORRELATION_SCHEMA = [
+    'CREATE INDEX correlated_with_shared_traders IF NOT EXISTS FOR ()-[r:CORRELATED_WITH]-() ON (r.shared_traders)',
+]
+
+CLEAR_CORRELATIONS_QUERY = '''
+    MATCH ()-[r:CORRELATED_WITH]->()
+    CALL { WITH r DELETE r } IN TRANSACTIONS OF 10000 ROWS
+'''
+
+CORRELATIONS_QUERY = '''
+    UNWIND $pairs as pair
+    MATCH (m1:Market {condition_id: pair.market1})
+    MATCH (m2:Market {condition_id: pair.market2})
+    MERGE (m1)-[r:CORRELATED_WITH]->(m2)
+    SET r.shared_traders = pair.shared_traders,
+        r.jaccard = pair.jaccard
+'''
+
+
+def lsh_params(threshold: float, num_perm: int,
+               false_negative_weight: float = DEFAULT_FALSE_NEGATIVE_WEIGHT) -> Tuple[int, int]:
+    """(bands, rows per band) with the least weighted false positive and negative area around `threshold`.
+
+    A pair with Jaccard s becomes a candidate with probability 1 - (1 - s^r)^b.
+    """
+    s = np.linspace(0.0, 1.0, 1001)
+    below, above = s < threshold, s >= threshold
+    best, best_error = (1, num_perm), np.inf
+    for bands in range(1, num_perm + 1):
+        for rows in range(1, num_perm // bands + 1):
+            probability = 1.0 - (1.0 - s ** rows) ** bands
+            false_positive = probability[below].mean() * threshold if below.any() else 0.0
+            false_negative = (1.0 - probability[above]).mean() * (1.0 - threshold) if above.any() else 0.0
+            error = (1.0 - false_negative_weight) * false_positive + false_negative_weight * false_negative
+            if error < best_error:
+                best, best_error = (bands, rows), error
+    return best
+
+
+class MarketCorrelation:
+    """MinHash signature of every market's trader set, built in one pass over the trades.
+
+    Signature slot i of a market is the minimum of hash_i over its traders,
+    and two markets agree on a slot with probability equal to their Jaccard
+    overlap. LSH splits the signature into bands; markets that agree on a
+    whole band share a bucket and become a candidate pair. Only candidates
+    are checked against the exact trader sets, so the cost grows with the
+    number of trades and close pairs instead of markets squared.
+    `num_perm` trades memory for accuracy of the signatures.
+    """
+
+    def __init__(self, market: np.ndarray, trader: np.ndarray, markets: List[Dict[str, Any]],
+                 num_perm: int = DEFAULT_NUM_PERM, seed: int = 0):
+        self.markets = markets
+        self.num_perm = num_perm
+        n_markets = len(markets)
+        n_traders = int(trader.max()) + 1 if len(trader) else 0
+
+        # One (market, trader) pair per trader and market, sorted by market.
+        pair_key = np.unique(market.astype(np.int64) * max(n_traders, 1) + trader)
+        pair_market = pair_key // max(n_traders, 1)
+        pair_trader = (pair_key % max(n_traders, 1)).astype(np.uint64)
+
+        self.incidence = sp.csr_matrix((np.ones(len(pair_key), dtype=np.int32), (pair_market, pair_trader)),
+                                       shape=(n_markets, n_traders))
+        self.trader_count = np.diff(self.incidence.indptr)
+
+        rng = np.random.default_rng(seed)
+        self.hash_a = rng.integers(1, _MERSENNE_PRIME, num_perm, dtype=np.uint64)
+        self.hash_b = rng.integers(0, _MERSENNE_PRIME, num_perm, dtype=np.uint64)
+        self.band_multipliers = rng.integers(1, np.iinfo(np.uint64).max, num_perm, dtype=np.uint64) | np.uint64(1)
+
+        self.signatures = np.full((n_markets, num_perm), _MAX_HASH, dtype=np.uint32)
+        for start in range(0, len(pair_key), SIGNATURE_BLOCK_PAIRS):
+            self._add_pairs(pair_market[start:start + SIGNATURE_BLOCK_PAIRS],
+                            pair_trader[start:start + SIGNATURE_BLOCK_PAIRS])
+
+    @classmethod
+    def from_analytics(cls, analytics, resolved_only: bool = True, num_perm: int = DEFAULT_NUM_PERM,
+                       seed: int = 0) -> 'MarketCorrelation':
+        """Reuse the trades of a ContrarianAnalytics engine; like the API, only resolved markets by default."""
+        mask = analytics.resolved if resolved_only else np.ones(len(analytics.market), dtype=bool)
+        markets = [{
+            'condition_id': condition_id,
+            'question': analytics.market_question[m],
+            'slug': analytics.market_slug[m],
+            'category': analytics.category_names[analytics.market_category[m]],
+        } for m, condition_id in enumerate(analytics.market_ids)]
+        return cls(analytics.market[mask], analytics.trader[mask], markets, num_perm, seed)
+
+    @classmethod
+    def from_snapshot(cls, root: str, resolved_only: bool = True, num_perm: int = DEFAULT_NUM_PERM,
+                      seed: int = 0) -> 'MarketCorrelation':
+        from contrarian_analytics import ContrarianAnalytics
+
+        return cls.from_analytics(ContrarianAnalytics.from_snapshot(root), resolved_only, num_perm, seed)
+
+    def _add_pairs(self, market: np.ndarray, trader: np.ndarray):
+        # Pairs arrive sorted by market; a market split across blocks keeps the minimum of both.
+        hashes = (trader[:, None] * self.hash_a + self.hash_b) % _MERSENNE_PRIME
+        starts = np.concatenate([[0], np.nonzero(np.diff(market))[0] + 1])
+        block_min = np.minimum.reduceat(hashes, starts, axis=0).astype(np.uint32)
+        block_markets = market[starts]
+        self.signatures[block_markets] = np.minimum(self.signatures[block_markets], block_min)
+
+    # ------------------------------------------------------------------------
+    # Candidates and verification
+    # ------------------------------------------------------------------------
+
+    def estimate_jaccard(self, market1: np.ndarray, market2: np.ndarray) -> np.ndarray:
+        """Share of signature slots two markets agree on (standard error ≈ sqrt(J(1-J)/num_perm))."""
+        return (self.signatures[market1] == self.signatures[market2]).mean(axis=1)
+
+    def candidate_pairs(self, threshold: float = DEFAULT_THRESHOLD, min_traders: int = 1,
+                        false_negative_weight: float = DEFAULT_FALSE_NEGATIVE_WEIGHT) -> Tuple[np.ndarray, np.ndarray]:
+        """Market pairs (lower code first) sharing at least one LSH bucket."""
+        bands, rows = lsh_params(threshold, self.num_perm, false_negative_weight)
+        eligible = np.nonzero(self.trader_count >= max(min_traders, 1))[0]
+
+        pair_keys = []
+        for band in range(bands):
+            columns = slice(band * rows, (band + 1) * rows)
+            bucket = (self.signatures[eligible, columns].astype(np.uint64) * self.band_multipliers[columns]).sum(axis=1)
+            order = np.argsort(bucket, kind='stable')
+            starts = np.concatenate([[0], np.nonzero(np.diff(bucket[order]))[0] + 1])
+            sizes = np.diff(np.append(starts, len(order)))
+
+            # All pairs inside every bucket, one bucket size at a time.
+            for size in np.unique(sizes[sizes > 1]):
+                members = eligible[order[starts[sizes == size][:, None] + np.arange(size)]]
+                first, second = np.triu_indices(size, 1)
+                market1 = np.minimum(members[:, first], members[:, second]).ravel()
+                market2 = np.maximum(members[:, first], members[:, second]).ravel()
+                pair_keys.append(market1 * len(self.markets) + market2)
+
+        if not pair_keys:
+            return np.arange(0), np.arange(0)
+        pair_keys = np.unique(np.concatenate(pair_keys))
+        return pair_keys // len(self.markets), pair_keys % len(self.markets)
+
+    def exact_overlap(self, market1: np.ndarray, market2: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Exact shared trader counts and Jaccard overlaps of the given market pairs."""
+        shared = np.zeros(len(market1), dtype=np.int64)
+        for start in range(0, len(market1), VERIFY_BLOCK_PAIRS):
+            block = slice(start, start + VERIFY_BLOCK_PAIRS)
+            both = self.incidence[market1[block]].multiply(self.incidence[market2[block]])
+            shared[block] = np.asarray(both.sum(axis=1)).ravel()
+        union = self.trader_count[market1] + self.trader_count[market2] - shared
+        return shared, shared / np.maximum(union, 1)
+
+    def correlated_pairs(self, threshold: float = DEFAULT_THRESHOLD, min_shared_traders: int = 1,
+                         false_negative_weight: float = DEFAULT_FALSE_NEGATIVE_WEIGHT) -> Dict[str, np.ndarray]:
+        """Verified pairs with Jaccard >= `threshold` and enough shared traders, most shared traders first.
+
+        Raise `num_perm` or `false_negative_weight` to miss fewer pairs near the threshold.
+        """
+        market1, market2 = self.candidate_pairs(threshold, min_shared_traders, false_negative_weight)
+        shared, jaccard = self.exact_overlap(market1, market2)
+        keep = (jaccard >= threshold) & (shared >= min_shared_traders)
+        market1, market2, shared, jaccard = market1[keep], market2[keep], shared[keep], jaccard[keep]
+
+        order = np.lexsort((market2, market1, -jaccard, -shared))
+        return {
+            'market1': market1[order],
+            'market2': market2[order],
+            'shared_traders': shared[order],
+            'jaccard': jaccard[order],
+            'candidates': len(keep),
+        }
+
+    # ------------------------------------------------------------------------
+    # Queries (same output shape as neo4j.service.ts)
+    # ------------------------------------------------------------------------
+
+    def _market(self, prefix: str, market_code: int) -> Dict[str, Any]:
+        market = self.markets[market_code]
+        return {
+            f'{prefix}_id': market['condition_id'],
+            f'{prefix}_question': market['question'],
+            f'{prefix}_slug': market['slug'],
+            f'{prefix}_category': market['category'],
+        }
+
+    def market_correlation(self, min_shared_traders: int = 10, limit: int = 30,
+                           threshold: float = DEFAULT_THRESHOLD) -> List[Dict[str, Any]]:
+        """getMarketCorrelation: market pairs sharing the most traders, among pairs above the Jaccard threshold."""
+        pairs = self.correlated_pairs(threshold, min_shared_traders)
+        results = []
+        for m1, m2, shared in zip(pairs['market1'][:limit], pairs['market2'][:limit], pairs['shared_traders'][:limit]):
+            results.append({
+                **self._market('market1', m1),
+                **self._market('market2', m2),
+                'shared_traders': int(shared),
+            })
+        return results
+
+
+def write_market_correlations(driver, engine: MarketCorrelation, pairs: Dict[str, np.ndarray],
+                              replace: bool = True, batch_size: int = BATCH_SIZE) -> int:
+    """Store verified pairs as weighted CORRELATED_WITH relationships; `replace` drops the previous set first."""
+    condition_ids = [market['condition_id'] for market in engine.markets]
+    rows = [
+        {'market1': condition_ids[m1], 'market2': condition_ids[m2], 'shared_traders': shared, 'jaccard': jaccard}
+        for m1, m2, shared, jaccard in zip(pairs['market1'].tolist(), pairs['market2'].tolist(),
+                                           pairs['shared_traders'].tolist(), pairs['jaccard'].tolist())
+    ]
+    with driver.session() as session:
+        for stmt in CORRELATION_SCHEMA:
+            session.run(stmt).consume()
+        if replace:
+            session.run(CLEAR_CORRELATIONS_QUERY).consume()
+        for i in range(0, len(rows), batch_size):
+            session.run(CORRELATIONS_QUERY, {'pairs': rows[i:i + batch_size]}).consume()
+    return len(rows)
@@ -0,0 +1,693 @@
+"""Row preparation, batched writes and incremental sync helpers for the Neo4j import (step-7)."""
+import hashlib
+import json
+import queue
+import random
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import List, Dict, Any, Callable, Iterable, Optional, Set, Tuple
+
+from neo4j.exceptions import TransientError
+
+from trade_fetcher import fill_key
+
+
+def prepare_event_rows(events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Build Event rows from Gamma API events."""
+    event_data = []
+    for event in events:
+        tags = event.get('tags', [])
+        tag_labels = [tag.get('label', '') for tag in tags if tag.get('label')]
+
+        event_data.append({
+            'slug': event.get('slug'),
+            'title': event.get('title', ''),
+            'description': event.get('description', ''),
+            'category': event.get('category', 'Unknown'),
+            'start_date': event.get('startDate', '2020-01-01T00:00:00Z'),
+            'end_date': event.get('endDate', '2030-01-01T00:00:00Z'),
+            'closed': event.get('closed', False),
+            'volume': event.get('volume', 0),
+            'liquidity': event.get('liquidity', 0) if event.get('liquidity') else 0,
+            'open_interest': event.get('openInterest', 0),
+            'icon': event.get('icon', ''),
+            'image': event.get('image', ''),
+            'comment_count': event.get('commentCount', 0),
+            'tags': tag_labels,
+            'restricted': event.get('restricted', False),
+            'featured': event.get('featured', False),
+        })
+
+    return event_data
+
+
+def prepare_market_rows(events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Build Market rows (with resolution status) from Gamma API events."""
+    market_data = []
+
+    for event in events:
+        event_slug = event.get('slug')
+
+        for market in event.get('markets', []):
+            condition_id = market.get('conditionId')
+            if not condition_id:
+                continue
+
+            # Determine resolution status.
+            closed = market.get('closed', False)
+            uma_resolution_status = market.get('umaResolutionStatus', '')
+            resolved = uma_resolution_status == 'resolved'
+            winning_outcome = None
+
+            if resolved:
+                outcome_prices_str = market.get('outcomePrices', '[]')
+                try:
+                    outcome_prices = json.loads(outcome_prices_str) if isinstance(outcome_prices_str, str) else outcome_prices_str
+                    outcomes_str = market.get('outcomes', '[]')
+                    outcome_names = json.loads(outcomes_str) if isinstance(outcomes_str, str) else outcomes_str
+
+                    for i, price in enumerate(outcome_prices):
+                        if float(price) >= 0.99:
+                            winning_outcome = outcome_names[i] if i < len(outcome_names) else None
+                            break
+                except Exception:
+                    pass
+
+            # Convert closedTime format.
+            closed_time = market.get('closedTime', '')
+            if closed_time:
+                try:
+                    closed_time = closed_time.replace(' ', 'T').replace('+00', 'Z')
+                except Exception:
+                    closed_time = '2020-01-01T00:00:00Z'
+            else:
+                closed_time = '2020-01-01T00:00:00Z'
+
+            market_data.append({
+                'condition_id': condition_id,
+                'question': market.get('question', ''),
+                'slug': market.get('slug', ''),
+                'description': market.get('description', ''),
+                'question_id': market.get('questionID', ''),
+                'start_date': market.get('startDate', '2020-01-01T00:00:00Z'),
+                'end_date': market.get('endDate', '2030-01-01T00:00:00Z'),
+                'closed': closed,
+                'closed_time': closed_time,
+                'resolved': resolved,
+                'winning_outcome': winning_outcome,
+                'resolved_by': market.get('resolvedBy', ''),
+                'uma_resolution_status': uma_resolution_status,
+                'volume': market.get('volumeNum', 0),
+                'volume_clob': market.get('volumeClob', 0),
+                'liquidity': market.get('liquidityNum', 0) if market.get('liquidityNum') else 0,
+                'last_trade_price': market.get('lastTradePrice', 0),
+                'best_ask': market.get('bestAsk', 0),
+                'best_bid': market.get('bestBid', 0),
+                'spread': market.get('spread', 0),
+                'neg_risk': market.get('negRisk', False),
+                'neg_risk_market_id': market.get('negRiskMarketID'),
+                'group_item_title': market.get('groupItemTitle'),
+                'group_item_threshold': market.get('groupItemThreshold'),
+                'restricted': market.get('restricted', False),
+                'active': market.get('active', True),
+                'event_slug': event_slug,
+            })
+
+    return market_data
+
+
+def prepare_outcome_rows(events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Build Outcome rows from the markets of Gamma API events."""
+    outcome_data = []
+
+    for event in events:
+        for market in event.get('markets', []):
+            condition_id = market.get('conditionId')
+            if not condition_id:
+                continue
+
+            # Parse outcomes.
+            outcomes_str = market.get('outcomes', '[]')
+            outcome_names = json.loads(outcomes_str) if isinstance(outcomes_str, str) else (outcomes_str or [])
+
+            prices_str = market.get('outcomePrices', '[]')
+            prices = json.loads(prices_str) if isinstance(prices_str, str) else (prices_str or [])
+
+            token_ids_str = market.get('clobTokenIds', '[]')
+            token_ids = json.loads(token_ids_str) if isinstance(token_ids_str, str) else (token_ids_str or [])
+
+            for i, outcome_name in enumerate(outcome_names):
+                outcome_data.append({
+                    'condition_id': condition_id,
+                    'outcome_index': i,
+                    'outcome_name': outcome_name,
+                    'current_price': prices[i] if i < len(prices) else 0.5,
+                    'token_id': token_ids[i] if i < len(token_ids) else '',
+                })
+
+    return outcome_data
+
+
+NULL_ADDRESS = '0x0000000000000000000000000000000000000000'
+
+
+def collect_user_profiles(trades: Iterable[Dict[str, Any]], skip: Set[str] = None) -> Dict[str, Dict[str, Any]]:
+    """One User profile per trader address from the trades (first trade wins)."""
+    user_profiles = {}
+
+    for trade in trades:
+        trader_addr = trade.get('from')
+        if not trader_addr or trader_addr == NULL_ADDRESS:
+            continue
+
+        if trader_addr not in user_profiles and not (skip and trader_addr in skip):
+            user_profiles[trader_addr] = {
+                'address': trader_addr,
+                'role': 'trader',
+                'name': trade.get('user_name', ''),
+                'pseudonym': trade.get('user_pseudonym', ''),
+                'bio': trade.get('user_bio', ''),
+                'profile_image': trade.get('user_profile_image', ''),
+                'profile_image_optimized': trade.get('user_profile_image_optimized', ''),
+            }
+
+    return user_profiles
+
+
+def prepare_trade_row(trade: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Build a Trade row from a fetched trade, or None if it can't be linked."""
+    tx_hash = trade.get('hash')
+    condition_id = trade.get('condition_id')
+    trader_address = trade.get('from')
+
+    if not tx_hash or not condition_id or not trader_address:
+        return None
+
+    # Parse timestamp.
+    timestamp_value = trade.get('timestamp')
+    if timestamp_value:
+        try:
+            timestamp_iso = datetime.fromtimestamp(int(timestamp_value)).isoformat()
+        except Exception:
+            timestamp_iso = datetime.now().isoformat()
+    else:
+        timestamp_iso = datetime.now().isoformat()
+
+    return {
+        'transaction_hash': tx_hash,
+        'fill_key': fill_key(trade),
+        'timestamp': timestamp_iso,
+        'side': trade.get('side', 'BUY'),
+        'size_usdc': trade.get('size', 0),
+        'price': trade.get('price', 0),
+        'outcome_name': trade.get('outcome', ''),
+        'outcome_index': trade.get('outcome_index', 0),
+        'market_title': trade.get('market_title', ''),
+        'market_slug': trade.get('market_slug', ''),
+        'event_slug': trade.get('event_slug', ''),
+        'trader_address': trader_address,
+        'condition_id': condition_id,
+    }
+
+
+# ============================================================================
+# Trade import
+# ============================================================================
+
+# Creates the Trade node and all three relationships in one statement, so the
+# Trade is looked up once per row instead of once per relationship type.
+TRADE_IMPORT_QUERY = '''
+    UNWIND $trades as trade
+    MERGE (t:Trade {transaction_hash: trade.transaction_hash, fill_key: trade.fill_key})
+    SET t.timestamp = datetime(trade.timestamp),
+        t.side = trade.side,
+        t.size_usdc = toFloat(trade.size_usdc),
+        t.price = toFloat(trade.price),
+        t.outcome_name = trade.outcome_name,
+        t.outcome_index = toInteger(trade.outcome_index),
+        t.market_title = trade.market_title,
+        t.market_slug = trade.market_slug,
+        t.event_slug = trade.event_slug
+    WITH t, trade
+    OPTIONAL MATCH (u:User {address: trade.trader_address})
+    OPTIONAL MATCH (m:Market {condition_id: trade.condition_id})
+    OPTIONAL MATCH (o:Outcome {condition_id: trade.condition_id, outcome_index: toInteger(trade.outcome_index)})
+    FOREACH (_ IN CASE WHEN u IS NULL THEN [] ELSE [1] END | MERGE (u)-[:PLACED_TRADE]->(t))
+    FOREACH (_ IN CASE WHEN m IS NULL THEN [] ELSE [1] END | MERGE (t)-[:ON_MARKET]->(m))
+    FOREACH (_ IN CASE WHEN o IS NULL THEN [] ELSE [1] END | MERGE (t)-[:FOR_OUTCOME]->(o))
+'''
+
+
+class TradeDeduplicator:
+    """Drop trade rows whose (transaction_hash, fill_key) was already written in this run.
+
+    Identities are kept as 16-byte digests, so overlapping or re-fetched
+    pages are filtered locally instead of being MERGEd again.
+    """
+
+    def __init__(self):
+        self.seen = set()
+        self.duplicates = 0
+
+    def filter(self, rows: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        unique = []
+        for row in rows:
+            identity = f'{row["transaction_hash"]}|{row["fill_key"]}'.encode('utf-8')
+            digest = hashlib.blake2b(identity, digest_size=16).digest()
+            if digest in self.seen:
+                self.duplicates += 1
+                continue
+            self.seen.add(digest)
+            unique.append(row)
+        return unique
+
+
+def write_users(driver, user_rows: List[Dict[str, Any]]):
+    """MERGE User nodes with their Polymarket profile data."""
+    with driver.session() as session:
+        session.run('''
+            UNWIND $users as user
+            MERGE (u:User {address: user.address})
+            SET u.role = user.role,
+                u.name = user.name,
+                u.pseudonym = user.pseudonym,
+                u.bio = user.bio,
+                u.profile_image = user.profile_image,
+                u.profile_image_optimized = user.profile_image_optimized
+        ''', {'users': user_rows})
+
+
+class AdaptiveBatchSizer:
+    """Grow or shrink the trade batch size towards a target commit latency."""
+
+    def __init__(self, initial: int = 500, minimum: int = 100, maximum: int = 10000,
+                 target_seconds: float = 1.0):
+        self.size = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.target_seconds = target_seconds
+
+    def record(self, batch_rows: int, elapsed: float):
+        """Adjust the next batch size from the latency of the last commit."""
+        if batch_rows == 0:
+            return
+
+        if elapsed <= 0:
+            ideal = self.size * 2
+        else:
+            ideal = batch_rows * self.target_seconds / elapsed
+
+        # Never more than double or halve at once, to ride out latency spikes.
+        ideal = max(self.size / 2, min(self.size * 2, ideal))
+        self.size = int(max(self.minimum, min(self.maximum, ideal)))
+
+
+def _write_trades_tx(tx, rows: List[Dict[str, Any]]):
+    tx.run(TRADE_IMPORT_QUERY, {'trades': rows}).consume()
+
+
+def write_trade_batch(session, rows: List[Dict[str, Any]], max_attempts: int = 5) -> float:
+    """Write one batch in an explicit write transaction and return its latency.
+
+    `execute_write` already retries transient errors for a while. Parallel
+    writers still share User nodes, so a deadlock can outlast that; those
+    batches are retried again after a jittered backoff.
+    """
+    start = time.perf_counter()
+
+    for attempt in range(1, max_attempts + 1):
+        try:
+            session.execute_write(_write_trades_tx, rows)
+            break
+        except TransientError:
+            if attempt == max_attempts:
+                raise
+            time.sleep(min(0.1 * 2 ** attempt, 5.0) * random.uniform(0.5, 1.5))
+
+    return time.perf_counter() - start
+
+
+def write_trades(driver, rows: List[Dict[str, Any]],
+                 on_batch: Callable[[int], None] = None) -> Dict[str, int]:
+    """Write prepared trade rows on one session in adaptively sized batches."""
+    batcher = AdaptiveBatchSizer()
+    round_trips = 0
+
+    with driver.session() as session:
+        start = 0
+        while start < len(rows):
+            batch = rows[start:start + batcher.size]
+            start += len(batch)
+
+            elapsed = write_trade_batch(session, batch)
+            batcher.record(len(batch), elapsed)
+            round_trips += 1
+
+            if on_batch:
+                on_batch(len(batch))
+
+    return {'imported': len(rows), 'round_trips': round_trips, 'batch_size': batcher.size}
+
+
+def partition_by_market(rows: List[Dict[str, Any]], workers: int) -> List[List[Dict[str, Any]]]:
+    """Spread whole markets over workers so no two workers touch the same Market/Outcome.
+
+    Markets are assigned largest first to the least loaded worker. Inside a
+    partition rows are sorted by trader, so concurrent transactions lock
+    shared User nodes in the same order, which keeps deadlocks rare.
+    """
+    by_market = defaultdict(list)
+    for row in rows:
+        by_market[row['condition_id']].append(row)
+
+    partitions = [[] for _ in range(workers)]
+    for market_rows in sorted(by_market.values(), key=len, reverse=True):
+        smallest = min(range(workers), key=lambda i: len(partitions[i]))
+        partitions[smallest].extend(market_rows)
+
+    return [sorted(partition, key=lambda row: row['trader_address']) for partition in partitions if partition]
+
+
+def write_trades_parallel(driver, rows: List[Dict[str, Any]], workers: int = 4,
+                          on_batch: Callable[[int], None] = None) -> Dict[str, int]:
+    """Write trade rows from a thread pool, one session per market partition."""
+    partitions = partition_by_market(rows, workers)
+
+    with ThreadPoolExecutor(max_workers=max(len(partitions), 1)) as pool:
+        results = list(pool.map(lambda partition: write_trades(driver, partition, on_batch), partitions))
+
+    return {
+        'imported': sum(result['imported'] for result in results),
+        'round_trips': sum(result['round_trips'] for result in results),
+        'batch_size': max((result['batch_size'] for result in results), default=0),
+    }
+
+
+def import_trade_stream(driver, trade_pages: Iterable[List[Dict[str, Any]]], chunk_size: int = 5000,
+                        workers: int = 1, on_chunk: Callable[[int], None] = None,
+                        failed_markets: Set[str] = None) -> Dict[str, Any]:
+    """Import a stream of trade pages in bounded chunks.
+
+    Each chunk writes its new users first, then its trades, and is dropped
+    before the next one is read. Peak memory depends on `chunk_size`, not on
+    how many markets are fetched.
+
+    Pages of a market are spread over several chunks, newest first, so the
+    watermarks are only advanced once the stream is exhausted, and never for
+    the markets in `failed_markets`. An interrupted import leaves them where
+    they were and the next sync fetches the missing trades again.
+    """
+    stats = {'trades': 0, 'skipped': 0, 'duplicates': 0, 'users': 0, 'round_trips': 0, 'volume': 0.0, 'markets': 0}
+    seen_users = set()
+    seen_markets = set()
+    newest_trades = {}
+    dedup = TradeDeduplicator()
+
+    def flush(chunk):
+        new_users = collect_user_profiles(chunk, skip=seen_users)
+        if new_users:
+            write_users(driver, list(new_users.values()))
+            seen_users.update(new_users)
+
+        prepared = [row for row in map(prepare_trade_row, chunk) if row is not None]
+        rows = dedup.filter(prepared)
+        if workers > 1:
+            result = write_trades_parallel(driver, rows, workers)
+        else:
+            result = write_trades(driver, rows)
+        _collect_newest_trades(chunk, newest_trades)
+
+        seen_markets.update(row['condition_id'] for row in rows)
+        stats['trades'] += result['imported']
+        stats['skipped'] += len(chunk) - len(prepared)
+        stats['duplicates'] += len(prepared) - len(rows)
+        stats['round_trips'] += result['round_trips']
+        stats['volume'] += sum(row['size_usdc'] or 0 for row in rows)
+
+        if on_chunk:
+            on_chunk(len(chunk))
+
+    chunk = []
+    for page in trade_pages:
+        chunk.extend(page)
+        if len(chunk) >= chunk_size:
+            flush(chunk)
+            chunk = []
+
+    if chunk:
+        flush(chunk)
+
+    _write_trade_watermarks(driver, newest_trades, failed_markets)
+
+    stats['users'] = len(seen_users)
+    stats['markets'] = len(seen_markets)
+    stats['market_ids'] = seen_markets
+    return stats
+
+
+def import_trade_pipeline(driver, trade_batches: Iterable[List[Dict[str, Any]]], workers: int = 4,
+                          max_pending: int = 8, on_batch: Callable[[int], None] = None,
+                          failed_markets: Set[str] = None) -> Dict[str, Any]:
+    """Import per-market trade batches on `workers` threads while they are still being fetched.
+
+    The calling thread reads `trade_batches` (a live fetch stream) into a
+    bounded queue and blocks while `max_pending` batches wait, so a database
+    slower than the API throttles the fetch instead of growing memory. Each
+    import worker writes a batch's users, trades and watermark on its own;
+    since a batch is one market, workers never contend for a Market or
+    Outcome. Markets in `failed_markets` keep their old watermark. Returns the import_trade_stream stats plus `wall_seconds` and
+    `blocked_seconds` (time the fetch side waited on full queues).
+    """
+    stats = {'trades': 0, 'skipped': 0, 'duplicates': 0, 'users': 0, 'round_trips': 0, 'volume': 0.0,
+             'markets': 0, 'batches': 0, 'wall_seconds': 0.0, 'blocked_seconds': 0.0}
+    written_users = set()
+    seen_markets = set()
+    dedup = TradeDeduplicator()
+    lock = threading.Lock()
+    pending = queue.Queue(maxsize=max_pending)
+    errors = []
+    start = time.perf_counter()
+
+    def import_batch(batch):
+        # Users count as written only once committed: a trade whose user isn't
+        # in the graph yet would lose its PLACED_TRADE edge.
+        with lock:
+            new_users = collect_user_profiles(batch, skip=written_users)
+        if new_users:
+            write_users(driver, list(new_users.values()))
+
+        prepared = [row for row in map(prepare_trade_row, batch) if row is not None]
+        with lock:
+            written_users.update(new_users)
+            rows = dedup.filter(prepared)
+
+        # Lock shared User nodes in the same order as the other workers.
+        rows.sort(key=lambda row: row['trader_address'])
+        result = write_trades(driver, rows)
+        update_trade_watermarks(driver, batch, failed_markets)
+
+        with lock:
+            seen_markets.update(row['condition_id'] for row in rows)
+            stats['trades'] += result['imported']
+            stats['skipped'] += len(batch) - len(prepared)
+            stats['duplicates'] += len(prepared) - len(rows)
+            stats['round_trips'] += result['round_trips']
+            stats['volume'] += sum(row['size_usdc'] or 0 for row in rows)
+            stats['batches'] += 1
+
+        if on_batch:
+            on_batch(len(batch))
+
+    def worker():
+        while True:
+            batch = pending.get()
+            if batch is None:
+                return
+            if errors:
+                continue  # Drain without importing so the reader never blocks.
+            try:
+                import_batch(batch)
+            except Exception as e:
+                errors.append(e)
+
+    def put(item):
+        blocked_at = time.perf_counter()
+        while True:
+            try:
+                pending.put(item, timeout=0.5)
+                break
+            except queue.Full:
+                if errors:
+                    raise errors[0]
+        stats['blocked_seconds'] += time.perf_counter() - blocked_at
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(max(workers, 1))]
+    for thread in threads:
+        thread.start()
+
+    try:
+        for batch in trade_batches:
+            if errors:
+                break
+            if batch:
+                put(batch)
+    finally:
+        for _ in threads:
+            pending.put(None)
+        for thread in threads:
+            thread.join()
+
+    if errors:
+        raise errors[0]
+
+    stats['users'] = len(written_users)
+    stats['markets'] = len(seen_markets)
+    stats['market_ids'] = seen_markets
+    stats['wall_seconds'] = time.perf_counter() - start
+    return stats
+
+
+# ============================================================================
+# Market groups
+# ============================================================================
+
+# Pairwise SAME_GROUP edges between all markets of a group, found through the
+# neg_risk_market_id index (also picks up markets imported by earlier runs).
+SAME_GROUP_QUERY = '''
+    UNWIND $group_ids as group_id
+    MATCH (m:Market {neg_risk_market_id: group_id})
+    WITH group_id, collect(m) as markets
+    WHERE size(markets) > 1
+    UNWIND markets as m1
+    UNWIND markets as m2
+    WITH group_id, m1, m2
+    WHERE m1 <> m2
+    MERGE (m1)-[:SAME_GROUP {group_id: group_id}]->(m2)
+'''
+
+# Compact alternative: one MarketGroup node per group and an IN_GROUP edge per market.
+MARKET_GROUP_QUERY = '''
+    UNWIND $group_ids as group_id
+    MERGE (g:MarketGroup {group_id: group_id})
+    WITH g, group_id
+    MATCH (m:Market {neg_risk_market_id: group_id})
+    MERGE (m)-[:IN_GROUP]->(g)
+    WITH g, count(m) as market_count
+    SET g.market_count = market_count
+'''
+
+
+def group_markets(market_rows: List[Dict[str, Any]]) -> Dict[str, List[str]]:
+    """condition_ids per neg-risk group."""
+    groups = defaultdict(list)
+    for row in market_rows:
+        if row.get('neg_risk_market_id') and row.get('condition_id'):
+            groups[row['neg_risk_market_id']].append(row['condition_id'])
+    return dict(groups)
+
+
+def write_market_groups(driver, market_rows: List[Dict[str, Any]], pairwise: bool = True,
+                        group_nodes: bool = False, batch_size: int = 500) -> Dict[str, int]:
+    """Link the markets of each neg-risk group in a few batched statements.
+
+    `pairwise` builds the SAME_GROUP clique the API reads; `group_nodes`
+    adds MarketGroup nodes, which need one edge per market instead of n².
+    """
+    groups = group_markets(market_rows)
+    group_ids = sorted(groups)
+    queries = ([SAME_GROUP_QUERY] if pairwise else []) + ([MARKET_GROUP_QUERY] if group_nodes else [])
+
+    with driver.session() as session:
+        for start in range(0, len(group_ids), batch_size):
+            for query in queries:
+                session.run(query, {'group_ids': group_ids[start:start + batch_size]}).consume()
+
+    return {'groups': len(group_ids), 'markets': sum(len(ids) for ids in groups.values())}
+
+
+# ============================================================================
+# Incremental sync
+# ============================================================================
+
+def row_fingerprint(row: Dict[str, Any]) -> str:
+    """Content hash of a prepared row, stored on the node as `content_hash`."""
+    payload = json.dumps(row, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def with_fingerprints(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Attach a `content_hash` to every row."""
+    for row in rows:
+        row['content_hash'] = row_fingerprint(row)
+    return rows
+
+
+def load_fingerprints(driver, label: str, key_fields: Tuple[str, ...]) -> Dict[Tuple, str]:
+    """Read the stored content hashes of all nodes with the given label."""
+    keys = ', '.join(f'n.{field} as {field}' for field in key_fields)
+
+    with driver.session() as session:
+        result = session.run(f'MATCH (n:{label}) RETURN {keys}, n.content_hash as content_hash')
+        return {tuple(record[field] for field in key_fields): record['content_hash'] for record in result}
+
+
+def changed_rows(rows: List[Dict[str, Any]], existing: Dict[Tuple, str],
+                 key_fn: Callable[[Dict[str, Any]], Tuple]) -> List[Dict[str, Any]]:
+    """Keep only rows that are new or whose content differs from the graph."""
+    return [row for row in rows if existing.get(key_fn(row)) != row['content_hash']]
+
+
+def load_trade_watermarks(driver) -> Dict[str, int]:
+    """Per-market high-water mark (newest imported trade timestamp, unix seconds)."""
+    with driver.session() as session:
+        result = session.run('''
+            MATCH (m:Market)
+            WHERE m.trade_watermark IS NOT NULL
+            RETURN m.condition_id as condition_id, m.trade_watermark as watermark
+        ''')
+        return {record['condition_id']: record['watermark'] for record in result}
+
+
+def _collect_newest_trades(trades: Iterable[Dict[str, Any]], newest: Dict[str, int]) -> Dict[str, int]:
+    """Fold the newest trade timestamp per market into `newest`."""
+    for trade in trades:
+        condition_id = trade.get('condition_id')
+        try:
+            timestamp = int(trade.get('timestamp') or 0)
+        except (TypeError, ValueError):
+            continue
+        if condition_id and timestamp > newest.get(condition_id, 0):
+            newest[condition_id] = timestamp
+    return newest
+
+
+def update_trade_watermarks(driver, trades: Iterable[Dict[str, Any]], failed_markets: Set[str] = None) -> int:
+    """Advance each market's high-water mark to its newest imported trade.
+
+    Only pass complete markets: a watermark is never moved back, so trades
+    older than it are not fetched again. Markets in `failed_markets` are
+    skipped.
+    """
+    return _write_trade_watermarks(driver, _collect_newest_trades(trades, {}), failed_markets)
+
+
+def _write_trade_watermarks(driver, newest: Dict[str, int], failed_markets: Set[str] = None) -> int:
+    failed_markets = failed_markets or set()
+    rows = [{'condition_id': cid, 'watermark': ts} for cid, ts in newest.items() if cid not in failed_markets]
+    if not rows:
+        return 0
+
+    with driver.session() as session:
+        session.run('''
+            UNWIND $rows as row
+            MATCH (m:Market {condition_id: row.condition_id})
+            SET m.trade_watermark = CASE
+                WHEN m.trade_watermark IS NULL OR row.watermark > m.trade_watermark THEN row.watermark
+                ELSE m.trade_watermark
+            END
+        ''', {'rows': rows})
+
+    return len(rows)
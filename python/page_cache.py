@@ -0,0 +1,47 @@
+"""On-disk page cache: reruns replay the pages they already fetched."""
+import hashlib
+import json
+import os
+from typing import Dict, Any, Optional
+
+
+class PageCache:
+    """Content-addressed cache of raw API pages, keyed by endpoint and params."""
+
+    def __init__(self, cache_dir: str):
+        self.pages_dir = os.path.join(cache_dir, 'pages')
+        os.makedirs(self.pages_dir, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(endpoint: str, params: Dict[str, Any]) -> str:
+        """Stable key for a request (params include limit and offset)."""
+        payload = json.dumps({'endpoint': endpoint, 'params': params}, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.pages_dir, key[:2], f'{key}.json')
+
+    def get(self, endpoint: str, params: Dict[str, Any]) -> Optional[Any]:
+        """Return the cached page, or None if it was never stored."""
+        path = self._path(self.key(endpoint, params))
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                page = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return page
+
+    def put(self, endpoint: str, params: Dict[str, Any], page: Any):
+        """Store a page atomically so a crash never leaves a truncated file."""
+        path = self._path(self.key(endpoint, params))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(page, f)
+        os.replace(tmp_path, path)
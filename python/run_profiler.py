@@ -0,0 +1,317 @@
+"""Per-stage timings, throughput, API and Neo4j counters for a pipeline run, as JSON or Prometheus text."""
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, Any, Iterator, Optional
+
+from api_client import ApiMetrics
+
+# SummaryCounters fields recorded from every consumed result.
+NEO4J_COUNTERS = [
+    'nodes_created', 'nodes_deleted', 'relationships_created', 'relationships_deleted',
+    'properties_set', 'labels_added', 'labels_removed', 'indexes_added', 'indexes_removed',
+    'constraints_added', 'constraints_removed',
+]
+
+PROMETHEUS_PREFIX = 'polymarket_pipeline'
+
+
+def _new_stage() -> Dict[str, Any]:
+    return {
+        'seconds': 0.0, 'calls': 0, 'rows': 0, 'api_requests': 0, 'api_retries': 0, 'api_bytes': 0,
+        'neo4j_round_trips': 0, 'neo4j_server_ms': 0, 'neo4j_counters': defaultdict(int),
+    }
+
+
+class StageHandle:
+    """Yielded by RunProfiler.stage() to report what the stage processed."""
+
+    def __init__(self, stats: Dict[str, Any], lock: threading.Lock):
+        self.stats = stats
+        self.lock = lock
+
+    def add_rows(self, count: int):
+        with self.lock:
+            self.stats['rows'] += count
+
+
+class RunProfiler:
+    """Collects stage wall times plus the API and Neo4j activity that happened in each stage.
+
+    Neo4j activity is attributed to the innermost open stage (also from
+    worker threads), so wrap the driver with `instrument(driver)`. API
+    requests, retries and bytes are the shared ApiMetrics' growth while a
+    stage was open.
+    """
+
+    def __init__(self, api_metrics: ApiMetrics = None, run_name: str = 'polymarket-import'):
+        self.api_metrics = api_metrics
+        self.run_name = run_name
+        self.started_at = datetime.now(timezone.utc)
+        self.start = time.perf_counter()
+        self.lock = threading.Lock()
+        self.stages = defaultdict(_new_stage)
+        self.active = []
+
+    @contextmanager
+    def stage(self, name: str, rows: int = None) -> Iterator[StageHandle]:
+        """Time a block of work; repeated stages with the same name accumulate."""
+        with self.lock:
+            stats = self.stages[name]
+            self.active.append(name)
+        handle = StageHandle(stats, self.lock)
+        if rows:
+            handle.add_rows(rows)
+
+        api_before = self.api_totals()
+        start = time.perf_counter()
+        try:
+            yield handle
+        finally:
+            elapsed = time.perf_counter() - start
+            api_after = self.api_totals()
+            with self.lock:
+                stats['seconds'] += elapsed
+                stats['calls'] += 1
+                for key in api_after:
+                    stats[f'api_{key}'] += api_after[key] - api_before[key]
+                self.active.remove(name)
+
+    def api_totals(self) -> Dict[str, int]:
+        summary = self.api_metrics.summary().values() if self.api_metrics else []
+        return {key: sum(stats[key] for stats in summary) for key in ['requests', 'retries', 'bytes']}
+
+    def current_stage(self) -> str:
+        with self.lock:
+            return self.active[-1] if self.active else 'unstaged'
+
+    def record_neo4j(self, summary: Any = None):
+        """One statement round-trip, with its ResultSummary when the result was consumed."""
+        stage = self.current_stage()
+        with self.lock:
+            stats = self.stages[stage]
+            stats['neo4j_round_trips'] += 1
+            if summary is None:
+                return
+            stats['neo4j_server_ms'] += (summary.result_available_after or 0) + (summary.result_consumed_after or 0)
+            for counter in NEO4J_COUNTERS:
+                value = getattr(summary.counters, counter, 0)
+                if value:
+                    stats['neo4j_counters'][counter] += value
+
+    def instrument(self, driver) -> 'InstrumentedDriver':
+        return InstrumentedDriver(driver, self)
+
+    # ------------------------------------------------------------------------
+    # Reports
+    # ------------------------------------------------------------------------
+
+    def report(self) -> Dict[str, Any]:
+        total_seconds = time.perf_counter() - self.start
+        with self.lock:
+            stages = {}
+            for name, stats in self.stages.items():
+                stages[name] = {
+                    **{key: value for key, value in stats.items() if key != 'neo4j_counters'},
+                    'neo4j_counters': dict(stats['neo4j_counters']),
+                    'rows_per_second': stats['rows'] / stats['seconds'] if stats['seconds'] else 0.0,
+                }
+
+        api = self.api_metrics.summary() if self.api_metrics else {}
+        return {
+            'run': self.run_name,
+            'started_at': self.started_at.isoformat(),
+            'total_seconds': total_seconds,
+            'stages': stages,
+            'api': api,
+            'totals': {
+                'api_requests': sum(stats['requests'] for stats in api.values()),
+                'api_retries': sum(stats['retries'] for stats in api.values()),
+                'api_failures': sum(stats['failures'] for stats in api.values()),
+                'api_bytes': sum(stats['bytes'] for stats in api.values()),
+                'neo4j_round_trips': sum(stats['neo4j_round_trips'] for stats in stages.values()),
+                'neo4j_server_ms': sum(stats['neo4j_server_ms'] for stats in stages.values()),
+            },
+        }
+
+    def write_json(self, path: str) -> Dict[str, Any]:
+        report = self.report()
+        _write_atomic(path, json.dumps(report, indent=2, default=str))
+        return report
+
+    def prometheus_text(self) -> str:
+        """Prometheus text exposition format, for node_exporter's textfile collector."""
+        report = self.report()
+        metrics = defaultdict(list)
+
+        for stage, stats in report['stages'].items():
+            labels = {'run': self.run_name, 'stage': stage}
+            metrics['stage_seconds'].append((labels, stats['seconds']))
+            metrics['stage_rows'].append((labels, stats['rows']))
+            metrics['stage_rows_per_second'].append((labels, stats['rows_per_second']))
+            metrics['stage_api_requests'].append((labels, stats['api_requests']))
+            metrics['stage_api_bytes'].append((labels, stats['api_bytes']))
+            metrics['neo4j_round_trips'].append((labels, stats['neo4j_round_trips']))
+            metrics['neo4j_server_seconds'].append((labels, stats['neo4j_server_ms'] / 1000))
+            for counter, value in stats['neo4j_counters'].items():
+                metrics['neo4j_counter'].append(({**labels, 'counter': counter}, value))
+
+        for endpoint, stats in report['api'].items():
+            labels = {'run': self.run_name, 'endpoint': endpoint}
+            for key in ['requests', 'retries', 'failures', 'bytes', 'seconds']:
+                metrics[f'api_{key}'].append((labels, stats[key]))
+
+        metrics['run_seconds'].append(({'run': self.run_name}, report['total_seconds']))
+        metrics['run_started_timestamp_seconds'].append(({'run': self.run_name}, self.started_at.timestamp()))
+
+        lines = []
+        for name, samples in metrics.items():
+            lines.append(f'# TYPE {PROMETHEUS_PREFIX}_{name} gauge')
+            for labels, value in samples:
+                label_text = ','.join(f'{key}="{_escape_label(str(val))}"' for key, val in labels.items())
+                lines.append(f'{PROMETHEUS_PREFIX}_{name}{{{label_text}}} {float(value)}')
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path: str):
+        _write_atomic(path, self.prometheus_text())
+
+    def print_summary(self):
+        report = self.report()
+        for name, stats in report['stages'].items():
+            line = f'  • {name}: {stats["seconds"]:.1f}s'
+            if stats['rows']:
+                line += f', {stats["rows"]:,} rows ({stats["rows_per_second"]:,.0f}/s)'
+            if stats['api_requests']:
+                line += f', {stats["api_requests"]:,} API requests ({stats["api_retries"]} retries, {stats["api_bytes"] / 1e6:,.1f} MB)'
+            if stats['neo4j_round_trips']:
+                line += f', {stats["neo4j_round_trips"]:,} Neo4j round-trips ({stats["neo4j_server_ms"] / 1000:.1f}s server)'
+            print(line)
+        totals = report['totals']
+        print(f'  • API: {totals["api_requests"]:,} requests, {totals["api_retries"]} retries, '
+              f'{totals["api_bytes"] / 1e6:,.1f} MB')
+
+
+def _escape_label(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _write_atomic(path: str, text: str):
+    # The textfile collector may read at any time; never expose a half-written file.
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+# ============================================================================
+# Neo4j driver instrumentation
+# ============================================================================
+
+class InstrumentedResult:
+    """Result proxy that records the ResultSummary once the records are consumed."""
+
+    def __init__(self, result, profiler: RunProfiler):
+        self._result = result
+        self._profiler = profiler
+        self._recorded = False
+
+    def _record(self, summary: Optional[Any]):
+        if not self._recorded:
+            self._recorded = True
+            self._profiler.record_neo4j(summary)
+
+    def consume(self):
+        summary = self._result.consume()
+        self._record(summary)
+        return summary
+
+    def single(self, *args, **kwargs):
+        record = self._result.single(*args, **kwargs)
+        self._record(self._result.consume())
+        return record
+
+    def data(self, *args, **kwargs):
+        data = self._result.data(*args, **kwargs)
+        self._record(self._result.consume())
+        return data
+
+    def __iter__(self):
+        for record in self._result:
+            yield record
+        self._record(self._result.consume())
+
+    def __getattr__(self, name):
+        return getattr(self._result, name)
+
+
+class InstrumentedTransaction:
+    def __init__(self, tx, profiler: RunProfiler):
+        self._tx = tx
+        self._profiler = profiler
+
+    def run(self, *args, **kwargs) -> InstrumentedResult:
+        return InstrumentedResult(self._tx.run(*args, **kwargs), self._profiler)
+
+    def __getattr__(self, name):
+        return getattr(self._tx, name)
+
+
+class InstrumentedSession:
+    def __init__(self, session, profiler: RunProfiler):
+        self._session = session
+        self._profiler = profiler
+        self._results = []
+
+    def run(self, *args, **kwargs) -> InstrumentedResult:
+        result = InstrumentedResult(self._session.run(*args, **kwargs), self._profiler)
+        self._results.append(result)
+        return result
+
+    def execute_write(self, work, *args, **kwargs):
+        return self._session.execute_write(
+            lambda tx, *a, **k: work(InstrumentedTransaction(tx, self._profiler), *a, **k), *args, **kwargs)
+
+    def execute_read(self, work, *args, **kwargs):
+        return self._session.execute_read(
+            lambda tx, *a, **k: work(InstrumentedTransaction(tx, self._profiler), *a, **k), *args, **kwargs)
+
+    def close(self):
+        # Fire-and-forget session.run() calls: closing would discard them anyway, so consume for the summary.
+        for result in self._results:
+            if not result._recorded:
+                try:
+                    result.consume()
+                except Exception:
+                    result._record(None)
+        self._results = []
+        self._session.close()
+
+    def __enter__(self) -> 'InstrumentedSession':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __getattr__(self, name):
+        return getattr(self._session, name)
+
+
+class InstrumentedDriver:
+    """Drop-in driver wrapper: every statement is counted against the active profiler stage."""
+
+    def __init__(self, driver, profiler: RunProfiler):
+        self._driver = driver
+        self._profiler = profiler
+
+    def session(self, *args, **kwargs) -> InstrumentedSession:
+        return InstrumentedSession(self._driver.session(*args, **kwargs), self._profiler)
+
+    def __getattr__(self, name):
+        return getattr(self._driver, name)
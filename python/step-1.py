@@ -1 +1 @@
-!pip install neo4j requests
\ No newline at end of file
+!pip install neo4j requests "httpx[http2]" pyarrow numpy scipy
\ No newline at end of file
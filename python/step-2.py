@@ -5,13 +5,116 @@ from neo4j import GraphDatabase
 import requests
 from datetime import datetime
 from typing import List, Dict, Any
+from api_client import ApiClient, ApiMetrics
+from page_cache import PageCache
+from run_profiler import RunProfiler
 
 # Neo4j credentials.
 NEO4J_URI = userdata.get('NEO4J_URI')
 NEO4J_USER = userdata.get('NEO4J_USER')
 NEO4J_PASSWORD = userdata.get('NEO4J_PASSWORD')
 
-# Polymarket Gamma API.
+# Polymarket Gamma API (or a local api_standin.py URL for both APIs).
 GAMMA_API_BASE = 'https://gamma-api.polymarket.com'
 
+# Event discovery: CRAWL_EVENTS pages through Gamma /events with several requests in
+# flight instead of one request. Outside streaming mode the crawl runs in step-6,
+# so trades are fetched for each page's markets while later pages are still crawled.
+CRAWL_EVENTS = False
+EVENTS_LIMIT = 150  # Max events (None = every matching event when crawling, else 150)
+EVENTS_CONCURRENCY = 4
+GAMMA_API_RATE_LIMIT = 5  # Requests per second
+EVENTS_FILTERS = {}  # e.g. {'end_date_min': '2025-01-01', 'end_date_max': '2025-06-30', 'tag_slug': 'politics'}
+
+# Polymarket Data API (trades).
+DATA_API_BASE = 'https://data-api.polymarket.com'
+FETCH_CONCURRENCY = 16  # Markets fetched at the same time
+DATA_API_RATE_LIMIT = 10  # Requests per second across all workers
+
+# Shared HTTP client: keep-alive pool, gzip, HTTP/2 (when `h2` is installed) and
+# Retry-After-aware backoff on 429/5xx. All API calls record per-endpoint metrics.
+USE_HTTP2 = True
+API_MAX_RETRIES = 5
+api_metrics = ApiMetrics()
+api_client = ApiClient(FETCH_CONCURRENCY, http2=USE_HTTP2, max_retries=API_MAX_RETRIES, metrics=api_metrics)
+
+# Run profile: per-stage wall time, throughput, API traffic and Neo4j round-trips/counters,
+# written as a JSON report after step-8 (plus a Prometheus textfile for node_exporter if set).
+run_profiler = RunProfiler(api_metrics)
+RUN_REPORT_PATH = 'run_report.json'
+PROMETHEUS_TEXTFILE = None  # e.g. '/var/lib/node_exporter/textfile_collector/polymarket.prom'
+
+# Per-market trade cap for offset paging; a sync takes every trade since a market's
+# watermark. WINDOWED_FETCH lifts the cap: each market is sliced into timestamp
+# windows that split adaptively and are fetched in parallel.
+MAX_TRADES_PER_MARKET = 2000
+WINDOWED_FETCH = False
+
+# Local page cache: re-runs on the same snapshot need no network, and a rerun after a crash
+# only requests the pages it did not get to. An incremental sync (trade watermarks) bypasses
+# it, since its pages shift as trades arrive.
+# Event pages are only replayed on FULL_REBUILD runs, so a sync sees new events and resolutions.
+USE_PAGE_CACHE = True
+CACHE_DIR = 'polymarket_cache'
+page_cache = PageCache(CACHE_DIR) if USE_PAGE_CACHE else None
+
+# Columnar snapshot (Arrow IPC, partitioned by category/date) written after each fetch;
+# an incremental sync appends its new trades, FULL_REBUILD rewrites it.
+# LOAD_SNAPSHOT replays it in step-4/step-6 instead of calling the APIs.
+SNAPSHOT_DIR = 'polymarket_snapshot'
+SAVE_SNAPSHOT = True
+LOAD_SNAPSHOT = False
+
+# Sync mode: incremental delta sync by default, full clear-and-reload on demand.
+FULL_REBUILD = False
+
+# Streaming: trades flow from fetch to import in bounded chunks instead of
+# being collected in `all_token_transfers` (constant memory for any number of markets).
+STREAM_TRADES = False
+STREAM_CHUNK_SIZE = 5000
+
+# Pipeline: fetch workers hand whole markets to IMPORT_WORKERS import threads through a
+# queue of at most PIPELINE_QUEUE_SIZE markets, so fetching and writing overlap and a slow
+# database throttles the fetch. Runs on the streaming path.
+PIPELINE_IMPORT = False
+PIPELINE_QUEUE_SIZE = 8
+STREAM_TRADES = STREAM_TRADES or PIPELINE_IMPORT
+
+# Neo4j import: parallel trade writers (1 = single session).
+IMPORT_WORKERS = 4
+
+# Market groups: SAME_GROUP edges between all markets of a neg-risk group, plus
+# optional MarketGroup nodes (one IN_GROUP edge per market instead of a clique).
+MARKET_GROUP_NODES = False
+
+# Import backend: 'driver' (transactional MERGE) or 'admin-csv' (files for neo4j-admin database import).
+IMPORT_BACKEND = 'driver'
+ADMIN_IMPORT_DIR = 'neo4j_admin_import'
+
+# Trader network (step-8): top TRADER_NETWORK_NEIGHBORS traders by shared markets for every
+# trader, from a sparse trader×market matrix. WRITE_TRADER_NETWORK stores them as weighted
+# CO_TRADES_WITH edges, which the API's trader network endpoint reads when present.
+TRADER_NETWORK_NEIGHBORS = 50
+TRADER_NETWORK_MIN_SHARED = 3
+TRADER_NETWORK_MAX_MARKET_TRADERS = None  # Leave out markets with more traders (None = all markets)
+WRITE_TRADER_NETWORK = False
+
+# Market correlation (step-8): resolved market pairs whose trader sets overlap by at least
+# MARKET_CORRELATION_THRESHOLD (Jaccard), found with MinHash/LSH and verified exactly. More
+# MARKET_CORRELATION_PERMUTATIONS miss fewer pairs near the threshold. WRITE_MARKET_CORRELATION
+# stores them as CORRELATED_WITH edges, which the API's market correlation endpoint reads.
+MARKET_CORRELATION_THRESHOLD = 0.2
+MARKET_CORRELATION_MIN_SHARED = 10
+MARKET_CORRELATION_PERMUTATIONS = 128
+WRITE_MARKET_CORRELATION = False
+
+# Category flow (step-8): every category switch of every trader, counted over trades sorted by
+# (trader, timestamp). Snapshot runs sort with an external merge sort of at most
+# CATEGORY_FLOW_MEMORY_ROWS trades in memory. WRITE_CATEGORY_FLOW stores CategoryTransition
+# nodes, which the API's category flow endpoint reads.
+CATEGORY_FLOW_MAX_GAP_DAYS = None  # Only count switches made within this many days (None = any)
+CATEGORY_FLOW_MIN_TRADES = 1
+CATEGORY_FLOW_MEMORY_ROWS = 20_000_000
+WRITE_CATEGORY_FLOW = False
+
 print('Configuration loaded successfully')
\ No newline at end of file
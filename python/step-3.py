@@ -1,10 +1,10 @@
-# Initialize Neo4j driver.
-neo4j_driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
+# Initialize Neo4j driver (instrumented: statements are counted per pipeline stage).
+neo4j_driver = run_profiler.instrument(GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD)))
 print('✓ Neo4j driver initialized')
 
 # Test Gamma API connection.
 try:
-    response = requests.get(f'{GAMMA_API_BASE}/markets', timeout=10)
+    response = api_client.get(f'{GAMMA_API_BASE}/markets', timeout=10)
     if response.status_code == 200:
         print('✓ Connected to Polymarket Gamma API')
     else:
@@ -14,7 +14,7 @@ except Exception as e:
 
 # Test Blockscout API connection.
 try:
-    response = requests.get('https://polygon.blockscout.com/api/v2/stats', timeout=10)
+    response = api_client.get('https://polygon.blockscout.com/api/v2/stats', timeout=10)
     if response.status_code == 200:
         print('✓ Connected to Blockscout API (Polygon)')
     else:
@@ -1,3 +1,6 @@
+from trade_store import load_events
+from events_crawler import EventCrawler
+
 def fetch_latest_events(limit: int = 50) -> List[Dict[str, Any]]:
     """Fetch the latest active events from Polymarket Gamma API."""
     try:
@@ -10,17 +13,57 @@ def fetch_latest_events(limit: int = 50) -> List[Dict[str, Any]]:
             'ascending': 'false'
         }
         
-        response = requests.get(url, params=params, timeout=10)
+        # Serve from the local page cache when this snapshot was fetched before.
+        if events_cache:
+            cached_events = events_cache.get(url, params)
+            if cached_events is not None:
+                return cached_events
+        
+        response = api_client.get(url, params=params, timeout=10)
         response.raise_for_status()
         
-        return response.json()
+        events = response.json()
+        if events_cache:
+            events_cache.put(url, params, events)
+        
+        return events
     
     except Exception as e:
         print(f'Error fetching events: {e}')
         return []
 
 # Fetch events (including closed ones since token transfers are historical).
-latest_events = fetch_latest_events(150)
+# Only a full rebuild replays cached event pages: a sync must see the events
+# (and resolutions) published since the pages were stored.
+events_cache = page_cache if FULL_REBUILD else None
+with run_profiler.stage('fetch_events') as stage:
+    event_crawler = None
+    if LOAD_SNAPSHOT:
+        latest_events = load_events(SNAPSHOT_DIR)
+    elif CRAWL_EVENTS:
+        event_crawler = EventCrawler(
+            GAMMA_API_BASE,
+            max_events=EVENTS_LIMIT,
+            concurrency=EVENTS_CONCURRENCY,
+            requests_per_second=GAMMA_API_RATE_LIMIT,
+            cache=events_cache,
+            http2=USE_HTTP2,
+            max_retries=API_MAX_RETRIES,
+            metrics=api_metrics,
+            **EVENTS_FILTERS,
+        )
+        # step-7 imports the events before it pulls the trade stream, so streaming mode crawls them all here.
+        if STREAM_TRADES:
+            event_crawler.run()
+        # Filled in place while the crawl runs.
+        latest_events = event_crawler.events
+    else:
+        # A single request, so every matching event (EVENTS_LIMIT = None) needs CRAWL_EVENTS.
+        latest_events = fetch_latest_events(EVENTS_LIMIT or 150)
+    stage.add_rows(len(latest_events))
 total_markets = sum(len(event.get('markets', [])) for event in latest_events)
 
-print(f'Fetched {len(latest_events)} events and {total_markets} markets (including closed events for historical trades)')
\ No newline at end of file
+if event_crawler and not event_crawler.finished:
+    print('Event crawl deferred: step-6 discovers events and fetches their trades at the same time')
+else:
+    print(f'Fetched {len(latest_events)} events and {total_markets} markets (including closed events for historical trades)')
\ No newline at end of file
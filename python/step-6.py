@@ -1,3 +1,8 @@
+from trade_fetcher import transform_trade, fetch_markets_concurrently, stream_trades, run_async
+from neo4j_import import load_trade_watermarks
+from trade_store import TradeStoreWriter, write_snapshot, iter_trade_dicts
+from trade_table import TradeTable
+
 def fetch_trades_from_data_api(condition_ids: List[str] = None, max_trades: int = None, batch_desc: str = '') -> List[Dict[str, Any]]:
     """Fetch ALL trades from Polymarket Data API with pagination."""
     import time as time_module
@@ -23,7 +28,7 @@ def fetch_trades_from_data_api(condition_ids: List[str] = None, max_trades: int
             if condition_ids:
                 params['market'] = ','.join(condition_ids)
             
-            response = requests.get(url, params=params, timeout=30)
+            response = api_client.get(url, params=params, timeout=30)
             
             if response.status_code != 200:
                 pbar.write(f'    ⚠ Error: HTTP {response.status_code}')
@@ -36,28 +41,7 @@ def fetch_trades_from_data_api(condition_ids: List[str] = None, max_trades: int
             
             # Transform to our format and extract ALL data from Polymarket API.
             for trade in trades:
-                all_trades.append({
-                    'hash': trade.get('transactionHash', ''),
-                    'from': trade.get('proxyWallet', ''),
-                    'to': '',
-                    'side': trade.get('side', ''),
-                    'condition_id': trade.get('conditionId', ''),
-                    'outcome': trade.get('outcome', ''),
-                    'outcome_index': trade.get('outcomeIndex', 0),
-                    'size': float(trade.get('size', 0)),
-                    'price': float(trade.get('price', 0)),
-                    'timestamp': trade.get('timestamp', 0),
-                    'asset': trade.get('asset', ''),
-                    'market_slug': trade.get('slug', ''),
-                    'market_title': trade.get('title', ''),
-                    'market_icon': trade.get('icon', ''),
-                    'event_slug': trade.get('eventSlug', ''),
-                    'user_name': trade.get('name', ''),
-                    'user_pseudonym': trade.get('pseudonym', ''),
-                    'user_bio': trade.get('bio', ''),
-                    'user_profile_image': trade.get('profileImage', ''),
-                    'user_profile_image_optimized': trade.get('profileImageOptimized', ''),
-                })
+                all_trades.append(transform_trade(trade))
             
             # Update progress bar with new trade count
             pbar.n = len(all_trades)
@@ -90,66 +74,167 @@ def fetch_trades_from_data_api(condition_ids: List[str] = None, max_trades: int
 from tqdm.notebook import tqdm
 
 print('Fetching ALL trades from Polymarket Data API...')
-print(f'Strategy: Fetch trades per market individually (max 2,000 trades per market)\n')
+if WINDOWED_FETCH:
+    print(f'Strategy: Fetch complete trade histories by time window ({FETCH_CONCURRENCY} markets in flight)\n')
+else:
+    print(f'Strategy: Fetch trades per market concurrently ({FETCH_CONCURRENCY} markets in flight, max {MAX_TRADES_PER_MARKET:,} trades per market)\n')
 
 # Fetch trades per market individually to ensure fair distribution
 condition_id_list = list(all_condition_ids)
-all_token_transfers = []
+# Trades are packed into compact columns as they arrive; the table iterates as trade dicts.
+all_token_transfers = TradeTable()
+
+# With a deferred event crawl the markets are discovered while their trades are fetched.
+crawling_events = event_crawler is not None and not event_crawler.finished
+if crawling_events:
+    print(f'Total markets: discovered by the event crawl ({EVENTS_CONCURRENCY} event pages in flight)')
+else:
+    print(f'Total markets: {len(condition_id_list)}')
+if WINDOWED_FETCH:
+    print('Limit: none (adaptive timestamp windows, deduplicated on transaction hash + fill)')
+else:
+    print(f'Limit: {MAX_TRADES_PER_MARKET:,} trades per market (to prevent single active markets from dominating)')
+print(f'Rate limit: {DATA_API_RATE_LIMIT} requests/second shared by all workers')
+if page_cache:
+    print(f'Page cache: pages fetched before are replayed from {CACHE_DIR}')
 
-print(f'Total markets: {len(condition_id_list)}')
-print(f'Limit: 2,000 trades per market (to prevent single active markets from dominating)\n')
+# Markets whose fetch ends on an error; step-7 leaves their watermarks alone.
+failed_markets = set()
 
-# Create progress bar for markets
-for i, condition_id in enumerate(tqdm(condition_id_list, desc='Fetching Markets', unit='market', position=0)):
-    market_desc = f'Market {i+1}/{len(condition_id_list)}'
-    
-    # Fetch trades for single market with 2,000 trade limit
-    trades = fetch_trades_from_data_api(condition_ids=[condition_id], max_trades=2000, batch_desc=market_desc)
-    all_token_transfers.extend(trades)
+# Incremental sync: only fetch trades newer than each market's high-water mark in Neo4j.
+trade_watermarks = {} if FULL_REBUILD else load_trade_watermarks(neo4j_driver)
+# Without watermarks every market's history is fetched, so this run sees every trade.
+full_fetch = not trade_watermarks
+if trade_watermarks:
+    print(f'Incremental sync: {len(trade_watermarks)} markets already imported, fetching new trades only')
+print()
+
+if LOAD_SNAPSHOT:
+    # Replay a local columnar snapshot instead of calling the Data API.
+    print(f'Loading trades from snapshot {SNAPSHOT_DIR}/ (no API calls)')
+    if STREAM_TRADES:
+        trade_stream = iter_trade_dicts(SNAPSHOT_DIR, STREAM_CHUNK_SIZE)
+    else:
+        all_token_transfers = TradeTable(trade for page in iter_trade_dicts(SNAPSHOT_DIR) for trade in page)
+        print(f'\n📊 Total: Loaded {len(all_token_transfers)} trades\n')
+elif STREAM_TRADES:
+    # Nothing is fetched yet: step-7 pulls pages from this stream and imports them in bounded chunks.
+    market_pbar = tqdm(total=len(condition_id_list), desc='Fetching Markets', unit='market', position=0)
+    trade_stream = stream_trades(
+        condition_id_list,
+        max_trades=None if WINDOWED_FETCH else MAX_TRADES_PER_MARKET,
+        concurrency=FETCH_CONCURRENCY,
+        requests_per_second=DATA_API_RATE_LIMIT,
+        base_url=DATA_API_BASE,
+        cache=page_cache,
+        watermarks=trade_watermarks,
+        on_market_done=lambda condition_id, trade_count: market_pbar.update(1),
+        windowed=WINDOWED_FETCH,
+        http2=USE_HTTP2,
+        max_retries=API_MAX_RETRIES,
+        metrics=api_metrics,
+        # The pipeline imports whole markets; the queue bound then counts markets.
+        market_batches=PIPELINE_IMPORT,
+        max_buffered_pages=PIPELINE_QUEUE_SIZE if PIPELINE_IMPORT else 32,
+        failed_markets=failed_markets,
+    )
+    if SAVE_SNAPSHOT:
+        # A sync adds its new trades to the existing snapshot instead of replacing it.
+        trade_stream = TradeStoreWriter(SNAPSHOT_DIR, latest_events, append=not FULL_REBUILD,
+                                        complete=full_fetch).wrap(trade_stream)
+    if PIPELINE_IMPORT:
+        print(f'Pipeline mode: step-7 imports each market on {IMPORT_WORKERS} workers as soon as it is fetched')
+    else:
+        print('Streaming mode: trades are fetched while step-7 imports them')
+else:
+    # Create progress bar for markets
+    market_pbar = tqdm(total=None if crawling_events else len(condition_id_list), desc='Fetching Markets', unit='market', position=0)
 
-print(f'\n✅ Completed!')
+    def pack_market_trades(condition_id, trades):
+        all_token_transfers.extend(trades)
+        market_pbar.update(1)
 
-print(f'\n📊 Total: Fetched {len(all_token_transfers)} trades\n')
+    with run_profiler.stage('fetch_trades') as stage:
+        run_async(fetch_markets_concurrently(
+            event_crawler.iter_condition_ids() if crawling_events else condition_id_list,
+            max_trades=None if WINDOWED_FETCH else MAX_TRADES_PER_MARKET,
+            concurrency=FETCH_CONCURRENCY,
+            requests_per_second=DATA_API_RATE_LIMIT,
+            base_url=DATA_API_BASE,
+            cache=page_cache,
+            watermarks=trade_watermarks,
+            on_market_done=pack_market_trades,
+            keep_trades=False,
+            windowed=WINDOWED_FETCH,
+            http2=USE_HTTP2,
+            max_retries=API_MAX_RETRIES,
+            metrics=api_metrics,
+            failed_markets=failed_markets,
+        ))
+        stage.add_rows(len(all_token_transfers))
+    market_pbar.close()
 
-if len(all_token_transfers) > 0:
-    # Get unique condition IDs from trades.
-    fetched_condition_ids = set(t['condition_id'] for t in all_token_transfers if t['condition_id'])
+    if crawling_events:
+        total_markets = event_crawler.market_count
+        print(f'\nCrawled {len(latest_events)} events and {total_markets} markets in {event_crawler.pages} pages')
+
+    print(f'\n✅ Completed!')
+    if page_cache:
+        print(f'   Page cache: {page_cache.hits} hits, {page_cache.misses} fetched from API')
+    if failed_markets:
+        print(f'   ⚠ {len(failed_markets)} markets stopped on an error; their watermarks stay put for the next sync')
+    print('   API requests:')
+    api_metrics.print_summary()
     
-    # Get unique users.
-    users = set(t['from'] for t in all_token_transfers if t['from'])
+    # Keep a compact columnar snapshot for re-imports, analytics and tests.
+    if SAVE_SNAPSHOT:
+        snapshot_count = write_snapshot(SNAPSHOT_DIR, latest_events, all_token_transfers,
+                                        append=not FULL_REBUILD, complete=full_fetch)
+        print(f'   Snapshot: {snapshot_count:,} {"trades written" if FULL_REBUILD else "new trades added"} to {SNAPSHOT_DIR}/')
+
+    print(f'\n📊 Total: Fetched {len(all_token_transfers)} trades\n')
+
+    if len(all_token_transfers) > 0:
+        # Get unique condition IDs from trades.
+        fetched_condition_ids = all_token_transfers.condition_ids()
     
-    # Calculate total volume.
-    total_volume = sum(t['size'] for t in all_token_transfers)
+        # Get unique users.
+        users = all_token_transfers.addresses()
     
-    print(f'📊 Trade Statistics:')
-    print(f'─' * 70)
-    print(f'  Total Trades:         {len(all_token_transfers):,}')
-    print(f'  Markets Requested:    {len(all_condition_ids)}')
-    print(f'  Markets with Trades:  {len(fetched_condition_ids)}')
-    print(f'  Unique Users:         {len(users):,}')
-    print(f'  Total Volume:         ${total_volume:,.2f} USDC')
-    if len(all_token_transfers) > 0:
-        print(f'  Average Trade Size:   ${total_volume / len(all_token_transfers):,.2f} USDC')
-    print(f'─' * 70)
+        # Calculate total volume.
+        total_volume = all_token_transfers.total_size()
     
-    # Check for markets with no trades
-    missing_condition_ids = all_condition_ids - fetched_condition_ids
-    if len(missing_condition_ids) > 0:
-        print(f'\n⚠️  Warning: {len(missing_condition_ids)} markets returned NO trades:')
-        print(f'   This could mean:')
-        print(f'   • Markets are too old (API might not have historical data)')
-        print(f'   • Markets had no trading activity')
-        print(f'   • API filtering issue with those condition IDs')
-        print(f'\n   Missing condition IDs (first 5):')
-        for cid in list(missing_condition_ids)[:5]:
-            print(f'   • {cid}')
-        if len(missing_condition_ids) > 5:
-            print(f'   ... and {len(missing_condition_ids) - 5} more')
+        print(f'📊 Trade Statistics:')
+        print(f'─' * 70)
+        print(f'  Total Trades:         {len(all_token_transfers):,}')
+        print(f'  Markets Requested:    {len(all_condition_ids)}')
+        print(f'  Markets with Trades:  {len(fetched_condition_ids)}')
+        print(f'  Unique Users:         {len(users):,}')
+        print(f'  Total Volume:         ${total_volume:,.2f} USDC')
+        if len(all_token_transfers) > 0:
+            print(f'  Average Trade Size:   ${total_volume / len(all_token_transfers):,.2f} USDC')
+        print(f'─' * 70)
     
-    print(f'\n✅ Successfully collected {len(all_token_transfers):,} trades for our markets!')
-else:
-    print('\n⚠️  WARNING: No trades fetched!')
-    print('    Possible reasons:')
-    print('    - Markets are too new/old')
-    print('    - API filter syntax issue')
-    print('    - Markets have no trading activity')
+        # Check for markets with no trades
+        missing_condition_ids = all_condition_ids - fetched_condition_ids
+        if trade_watermarks:
+            missing_condition_ids -= set(trade_watermarks)  # No new trades since the last sync
+        if len(missing_condition_ids) > 0:
+            print(f'\n⚠️  Warning: {len(missing_condition_ids)} markets returned NO trades:')
+            print(f'   This could mean:')
+            print(f'   • Markets are too old (API might not have historical data)')
+            print(f'   • Markets had no trading activity')
+            print(f'   • API filtering issue with those condition IDs')
+            print(f'\n   Missing condition IDs (first 5):')
+            for cid in list(missing_condition_ids)[:5]:
+                print(f'   • {cid}')
+            if len(missing_condition_ids) > 5:
+                print(f'   ... and {len(missing_condition_ids) - 5} more')
+    
+        print(f'\n✅ Successfully collected {len(all_token_transfers):,} trades for our markets!')
+    else:
+        print('\n⚠️  WARNING: No trades fetched!')
+        print('    Possible reasons:')
+        print('    - Markets are too new/old')
+        print('    - API filter syntax issue')
+        print('    - Markets have no trading activity')
@@ -1,6 +1,12 @@
-import json
-from datetime import datetime
 from tqdm.notebook import tqdm
+from neo4j_import import (
+    prepare_event_rows, prepare_market_rows, prepare_outcome_rows,
+    with_fingerprints, load_fingerprints, changed_rows, update_trade_watermarks,
+    prepare_trade_row, TradeDeduplicator, write_trades, write_trades_parallel, write_market_groups,
+    collect_user_profiles, write_users, import_trade_stream, import_trade_pipeline,
+)
+from admin_import import write_admin_import_csvs, admin_import_command
+from graph_aggregates import AGGREGATE_SCHEMA, refresh_aggregates, refresh_holdings
 
 print('=' * 70)
 print('Importing Data to Neo4j')
@@ -9,30 +15,14 @@ print()
 
 # Prepare user data from trades with Polymarket profile data.
 print('[0/10] Preparing user data...')
-user_profiles = {}
-null_address = '0x0000000000000000000000000000000000000000'
-
-for trade in all_token_transfers:
-    trader_addr = trade.get('from')
-    if not trader_addr or trader_addr == null_address:
-        continue
-    
-    if trader_addr not in user_profiles:
-        user_profiles[trader_addr] = {
-            'address': trader_addr,
-            'role': 'trader',
-            'name': trade.get('user_name', ''),
-            'pseudonym': trade.get('user_pseudonym', ''),
-            'bio': trade.get('user_bio', ''),
-            'profile_image': trade.get('user_profile_image', ''),
-            'profile_image_optimized': trade.get('user_profile_image_optimized', ''),
-        }
+# In streaming mode users are collected chunk by chunk while trades are imported.
+user_profiles = {} if STREAM_TRADES else collect_user_profiles(all_token_transfers)
 
 print(f'  ✓ Prepared {len(user_profiles)} users\n')
 
 def create_schema(driver):
     """Create constraints and indexes."""
-    print('[1/9] Creating schema...')
+    print('[1/10] Creating schema...')
     
     statements = [
         # Constraints.
@@ -40,16 +30,21 @@ def create_schema(driver):
         'CREATE CONSTRAINT event_slug IF NOT EXISTS FOR (e:Event) REQUIRE e.slug IS UNIQUE',
         'CREATE CONSTRAINT market_condition_id IF NOT EXISTS FOR (m:Market) REQUIRE m.condition_id IS UNIQUE',
         'CREATE CONSTRAINT outcome_id IF NOT EXISTS FOR (o:Outcome) REQUIRE (o.condition_id, o.outcome_index) IS UNIQUE',
-        'CREATE CONSTRAINT trade_hash IF NOT EXISTS FOR (t:Trade) REQUIRE t.transaction_hash IS UNIQUE',
+        # A transaction can settle several fills, so a Trade is a (hash, fill) pair.
+        'DROP CONSTRAINT trade_hash IF EXISTS',
+        'CREATE CONSTRAINT trade_id IF NOT EXISTS FOR (t:Trade) REQUIRE (t.transaction_hash, t.fill_key) IS UNIQUE',
+        'CREATE CONSTRAINT market_group_id IF NOT EXISTS FOR (g:MarketGroup) REQUIRE g.group_id IS UNIQUE',
         
         # Indexes.
         'CREATE INDEX event_category IF NOT EXISTS FOR (e:Event) ON (e.category)',
         'CREATE INDEX event_closed IF NOT EXISTS FOR (e:Event) ON (e.closed)',
         'CREATE INDEX market_slug IF NOT EXISTS FOR (m:Market) ON (m.slug)',
+        'CREATE INDEX market_neg_risk_market_id IF NOT EXISTS FOR (m:Market) ON (m.neg_risk_market_id)',
+        'CREATE INDEX trade_transaction_hash IF NOT EXISTS FOR (t:Trade) ON (t.transaction_hash)',
         'CREATE INDEX trade_timestamp IF NOT EXISTS FOR (t:Trade) ON (t.timestamp)',
         'CREATE INDEX trade_side IF NOT EXISTS FOR (t:Trade) ON (t.side)',
         'CREATE INDEX user_role IF NOT EXISTS FOR (u:User) ON (u.role)',
-    ]
+    ] + AGGREGATE_SCHEMA
     
     with driver.session() as session:
         for stmt in statements:
@@ -58,43 +53,33 @@ def create_schema(driver):
             except Exception:
                 pass  # Constraint/index may already exist
     
+    
+    # Trades imported before fill keys existed can't be matched by the new identity.
+    with driver.session() as session:
+        legacy_count = session.run('MATCH (t:Trade) WHERE t.fill_key IS NULL RETURN count(t) as count').single()['count']
+    if legacy_count:
+        print(f'  ⚠ {legacy_count} trades have no fill_key; run once with FULL_REBUILD = True to re-import them')
+    
     print('  ✓ Schema created\n')
 
 def clear_database(driver):
     """Clear all data."""
-    print('[2/9] Clearing database...')
+    print('[2/10] Clearing database...')
     with driver.session() as session:
         session.run('MATCH (n) DETACH DELETE n')
     print('  ✓ Database cleared\n')
 
-def import_events(driver, events):
+def import_events(driver, events, incremental=False):
     """Import Event nodes in batch."""
-    print('[3/9] Importing events...')
+    print('[3/10] Importing events...')
     
     # Prepare data.
-    event_data = []
-    for event in events:
-        tags = event.get('tags', [])
-        tag_labels = [tag.get('label', '') for tag in tags if tag.get('label')]
-        
-        event_data.append({
-            'slug': event.get('slug'),
-            'title': event.get('title', ''),
-            'description': event.get('description', ''),
-            'category': event.get('category', 'Unknown'),
-            'start_date': event.get('startDate', '2020-01-01T00:00:00Z'),
-            'end_date': event.get('endDate', '2030-01-01T00:00:00Z'),
-            'closed': event.get('closed', False),
-            'volume': event.get('volume', 0),
-            'liquidity': event.get('liquidity', 0) if event.get('liquidity') else 0,
-            'open_interest': event.get('openInterest', 0),
-            'icon': event.get('icon', ''),
-            'image': event.get('image', ''),
-            'comment_count': event.get('commentCount', 0),
-            'tags': tag_labels,
-            'restricted': event.get('restricted', False),
-            'featured': event.get('featured', False),
-        })
+    event_data = with_fingerprints(prepare_event_rows(events))
+    
+    # Only send new or changed events when syncing incrementally.
+    if incremental:
+        existing = load_fingerprints(driver, 'Event', ('slug',))
+        event_data = changed_rows(event_data, existing, lambda row: (row['slug'],))
     
     # Batch import using UNWIND.
     with driver.session() as session:
@@ -115,85 +100,24 @@ def import_events(driver, events):
                 e.comment_count = toInteger(event.comment_count),
                 e.tags = event.tags,
                 e.restricted = event.restricted,
-                e.featured = event.featured
+                e.featured = event.featured,
+                e.content_hash = event.content_hash
         ''', {'events': event_data})
     
-    print(f'  ✓ Imported {len(events)} events\n')
+    print(f'  ✓ Imported {len(event_data)} events ({len(events)} fetched)\n')
 
-def import_markets(driver, events):
+def import_markets(driver, events, incremental=False):
     """Import Market nodes in batches."""
-    print('[4/9] Importing markets...')
+    print('[4/10] Importing markets...')
     
     # Prepare market data.
-    market_data = []
+    market_data = with_fingerprints(prepare_market_rows(events))
+    total_count = len(market_data)
     
-    for event in events:
-        event_slug = event.get('slug')
-        
-        for market in event.get('markets', []):
-            condition_id = market.get('conditionId')
-            if not condition_id:
-                continue
-            
-            # Determine resolution status.
-            closed = market.get('closed', False)
-            uma_resolution_status = market.get('umaResolutionStatus', '')
-            resolved = uma_resolution_status == 'resolved'
-            winning_outcome = None
-            
-            if resolved:
-                outcome_prices_str = market.get('outcomePrices', '[]')
-                try:
-                    outcome_prices = json.loads(outcome_prices_str) if isinstance(outcome_prices_str, str) else outcome_prices_str
-                    outcomes_str = market.get('outcomes', '[]')
-                    outcome_names = json.loads(outcomes_str) if isinstance(outcomes_str, str) else outcomes_str
-                    
-                    for i, price in enumerate(outcome_prices):
-                        if float(price) >= 0.99:
-                            winning_outcome = outcome_names[i] if i < len(outcome_names) else None
-                            break
-                except Exception:
-                    pass
-            
-            # Convert closedTime format.
-            closed_time = market.get('closedTime', '')
-            if closed_time:
-                try:
-                    closed_time = closed_time.replace(' ', 'T').replace('+00', 'Z')
-                except Exception:
-                    closed_time = '2020-01-01T00:00:00Z'
-            else:
-                closed_time = '2020-01-01T00:00:00Z'
-            
-            market_data.append({
-                'condition_id': condition_id,
-                'question': market.get('question', ''),
-                'slug': market.get('slug', ''),
-                'description': market.get('description', ''),
-                'question_id': market.get('questionID', ''),
-                'start_date': market.get('startDate', '2020-01-01T00:00:00Z'),
-                'end_date': market.get('endDate', '2030-01-01T00:00:00Z'),
-                'closed': closed,
-                'closed_time': closed_time,
-                'resolved': resolved,
-                'winning_outcome': winning_outcome,
-                'resolved_by': market.get('resolvedBy', ''),
-                'uma_resolution_status': uma_resolution_status,
-                'volume': market.get('volumeNum', 0),
-                'volume_clob': market.get('volumeClob', 0),
-                'liquidity': market.get('liquidityNum', 0) if market.get('liquidityNum') else 0,
-                'last_trade_price': market.get('lastTradePrice', 0),
-                'best_ask': market.get('bestAsk', 0),
-                'best_bid': market.get('bestBid', 0),
-                'spread': market.get('spread', 0),
-                'neg_risk': market.get('negRisk', False),
-                'neg_risk_market_id': market.get('negRiskMarketID'),
-                'group_item_title': market.get('groupItemTitle'),
-                'group_item_threshold': market.get('groupItemThreshold'),
-                'restricted': market.get('restricted', False),
-                'active': market.get('active', True),
-                'event_slug': event_slug,
-            })
+    # Only send new or changed markets when syncing incrementally.
+    if incremental:
+        existing = load_fingerprints(driver, 'Market', ('condition_id',))
+        market_data = changed_rows(market_data, existing, lambda row: (row['condition_id'],))
     
     # Batch import markets.
     with driver.session() as session:
@@ -224,7 +148,8 @@ def import_markets(driver, events):
                 m.group_item_title = market.group_item_title,
                 m.group_item_threshold = market.group_item_threshold,
                 m.restricted = market.restricted,
-                m.active = market.active
+                m.active = market.active,
+                m.content_hash = market.content_hash
         ''', {'markets': market_data})
         
         # Create Market -> Event relationships.
@@ -235,39 +160,21 @@ def import_markets(driver, events):
             MERGE (m)-[:PART_OF_EVENT]->(e)
         ''', {'markets': market_data})
     
-    print(f'  ✓ Imported {len(market_data)} markets\n')
+    print(f'  ✓ Imported {len(market_data)} markets ({total_count} fetched)\n')
+    return {row['condition_id'] for row in market_data}
 
-def import_outcomes(driver, events):
+def import_outcomes(driver, events, incremental=False):
     """Import Outcome nodes in batches."""
-    print('[5/9] Importing outcomes...')
+    print('[5/10] Importing outcomes...')
     
     # Prepare outcome data.
-    outcome_data = []
-    
-    for event in events:
-        for market in event.get('markets', []):
-            condition_id = market.get('conditionId')
-            if not condition_id:
-                continue
-            
-            # Parse outcomes.
-            outcomes_str = market.get('outcomes', '[]')
-            outcome_names = json.loads(outcomes_str) if isinstance(outcomes_str, str) else (outcomes_str or [])
-            
-            prices_str = market.get('outcomePrices', '[]')
-            prices = json.loads(prices_str) if isinstance(prices_str, str) else (prices_str or [])
-            
-            token_ids_str = market.get('clobTokenIds', '[]')
-            token_ids = json.loads(token_ids_str) if isinstance(token_ids_str, str) else (token_ids_str or [])
-            
-            for i, outcome_name in enumerate(outcome_names):
-                outcome_data.append({
-                    'condition_id': condition_id,
-                    'outcome_index': i,
-                    'outcome_name': outcome_name,
-                    'current_price': prices[i] if i < len(prices) else 0.5,
-                    'token_id': token_ids[i] if i < len(token_ids) else '',
-                })
+    outcome_data = with_fingerprints(prepare_outcome_rows(events))
+    total_count = len(outcome_data)
+    
+    # Only send new or changed outcomes when syncing incrementally.
+    if incremental:
+        existing = load_fingerprints(driver, 'Outcome', ('condition_id', 'outcome_index'))
+        outcome_data = changed_rows(outcome_data, existing, lambda row: (row['condition_id'], row['outcome_index']))
     
     # Batch import outcomes.
     with driver.session() as session:
@@ -276,7 +183,8 @@ def import_outcomes(driver, events):
             MERGE (o:Outcome {condition_id: outcome.condition_id, outcome_index: outcome.outcome_index})
             SET o.outcome_name = outcome.outcome_name,
                 o.current_price = toFloat(outcome.current_price),
-                o.token_id = outcome.token_id
+                o.token_id = outcome.token_id,
+                o.content_hash = outcome.content_hash
         ''', {'outcomes': outcome_data})
         
         # Create Market -> Outcome relationships.
@@ -287,11 +195,12 @@ def import_outcomes(driver, events):
             MERGE (m)-[:HAS_OUTCOME]->(o)
         ''', {'outcomes': outcome_data})
     
-    print(f'  ✓ Imported {len(outcome_data)} outcomes\n')
+    print(f'  ✓ Imported {len(outcome_data)} outcomes ({total_count} fetched)\n')
+    return {row['condition_id'] for row in outcome_data}
 
 def import_users(driver, users):
     """Import User nodes with Polymarket profile data."""
-    print('[6/9] Importing users...')
+    print('[6/10] Importing users...')
     
     # Prepare user data.
     user_data = []
@@ -307,174 +216,165 @@ def import_users(driver, users):
         })
     
     # Batch import users.
-    with driver.session() as session:
-        session.run('''
-            UNWIND $users as user
-            MERGE (u:User {address: user.address})
-            SET u.role = user.role,
-                u.name = user.name,
-                u.pseudonym = user.pseudonym,
-                u.bio = user.bio,
-                u.profile_image = user.profile_image,
-                u.profile_image_optimized = user.profile_image_optimized
-        ''', {'users': user_data})
+    write_users(driver, user_data)
     
     print(f'  ✓ Imported {len(users)} users\n')
 
-def import_trades(driver, trades):
-    """Import Trade nodes in batches for speed."""
-    print('[7/9] Importing trades...')
+def import_trades(driver, trades, workers=1):
+    """Import Trade nodes and their relationships in fused, adaptively sized batches."""
+    print('[7/10] Importing trades...')
     
-    batch_size = 500  # Process 500 trades at a time
-    total_batches = (len(trades) + batch_size - 1) // batch_size
+    # Prepare trade data and drop fills that appear more than once.
+    with run_profiler.stage('transform_trades', rows=len(trades)):
+        prepared = [row for row in map(prepare_trade_row, trades) if row is not None]
+        skipped_count = len(trades) - len(prepared)
+        trade_data = TradeDeduplicator().filter(prepared)
+        duplicate_count = len(prepared) - len(trade_data)
     
-    imported_count = 0
-    skipped_count = 0
+    pbar = tqdm(total=len(trade_data), desc='  Trades', unit='trade')
     
-    with driver.session() as session:
-        for batch_idx in tqdm(range(0, len(trades), batch_size), desc='  Trade Batches', unit='batch', total=total_batches):
-            batch = trades[batch_idx:batch_idx + batch_size]
-            
-            # Prepare batch data.
-            trade_data = []
-            for trade in batch:
-                tx_hash = trade.get('hash')
-                condition_id = trade.get('condition_id')
-                trader_address = trade.get('from')
-                
-                if not tx_hash or not condition_id or not trader_address:
-                    skipped_count += 1
-                    continue
-                
-                # Parse timestamp.
-                timestamp_value = trade.get('timestamp')
-                if timestamp_value:
-                    try:
-                        timestamp_iso = datetime.fromtimestamp(int(timestamp_value)).isoformat()
-                    except Exception:
-                        timestamp_iso = datetime.now().isoformat()
-                else:
-                    timestamp_iso = datetime.now().isoformat()
-                
-                trade_data.append({
-                    'transaction_hash': tx_hash,
-                    'timestamp': timestamp_iso,
-                    'side': trade.get('side', 'BUY'),
-                    'size_usdc': trade.get('size', 0),
-                    'price': trade.get('price', 0),
-                    'outcome_name': trade.get('outcome', ''),
-                    'outcome_index': trade.get('outcome_index', 0),
-                    'market_title': trade.get('market_title', ''),
-                    'market_slug': trade.get('market_slug', ''),
-                    'event_slug': trade.get('event_slug', ''),
-                    'trader_address': trader_address,
-                    'condition_id': condition_id,
-                })
-            
-            if not trade_data:
-                continue
-            
-            # Batch import trades.
-            session.run('''
-                UNWIND $trades as trade
-                MERGE (t:Trade {transaction_hash: trade.transaction_hash})
-                SET t.timestamp = datetime(trade.timestamp),
-                    t.side = trade.side,
-                    t.size_usdc = toFloat(trade.size_usdc),
-                    t.price = toFloat(trade.price),
-                    t.outcome_name = trade.outcome_name,
-                    t.outcome_index = toInteger(trade.outcome_index),
-                    t.market_title = trade.market_title,
-                    t.market_slug = trade.market_slug,
-                    t.event_slug = trade.event_slug
-            ''', {'trades': trade_data})
-            
-            # Batch create User->Trade relationships.
-            session.run('''
-                UNWIND $trades as trade
-                MATCH (t:Trade {transaction_hash: trade.transaction_hash})
-                MATCH (u:User {address: trade.trader_address})
-                MERGE (u)-[:PLACED_TRADE]->(t)
-            ''', {'trades': trade_data})
-            
-            # Batch create Trade->Market relationships.
-            session.run('''
-                UNWIND $trades as trade
-                MATCH (t:Trade {transaction_hash: trade.transaction_hash})
-                MATCH (m:Market {condition_id: trade.condition_id})
-                MERGE (t)-[:ON_MARKET]->(m)
-            ''', {'trades': trade_data})
-            
-            # Batch create Trade->Outcome relationships.
-            session.run('''
-                UNWIND $trades as trade
-                MATCH (t:Trade {transaction_hash: trade.transaction_hash})
-                MATCH (o:Outcome {condition_id: trade.condition_id, outcome_index: trade.outcome_index})
-                MERGE (t)-[:FOR_OUTCOME]->(o)
-            ''', {'trades': trade_data})
-            
-            imported_count += len(trade_data)
-    
-    print(f'  ✓ Imported {imported_count} trades ({skipped_count} skipped)\n')
+    # Parallel writers each own a partition of markets and their own session.
+    with run_profiler.stage('write_trades', rows=len(trade_data)):
+        if workers > 1:
+            stats = write_trades_parallel(driver, trade_data, workers, on_batch=pbar.update)
+        else:
+            stats = write_trades(driver, trade_data, on_batch=pbar.update)
+    
+    pbar.close()
+    print(f'  ✓ Imported {stats["imported"]} trades ({skipped_count} skipped, {duplicate_count} duplicates) in {stats["round_trips"]} round-trips '
+          f'({workers} writer{"s" if workers > 1 else ""}, final batch size {stats["batch_size"]})\n')
 
 def create_group_market_relationships(driver, events):
     """Link markets in the same group."""
-    print('[8/9] Creating group market relationships...')
+    print('[8/10] Creating group market relationships...')
     
-    count = 0
+    counts = write_market_groups(driver, prepare_market_rows(events), group_nodes=MARKET_GROUP_NODES)
     
-    with driver.session() as session:
-        for event in events:
-            for market in event.get('markets', []):
-                neg_risk_market_id = market.get('negRiskMarketID')
-                condition_id = market.get('conditionId')
-                
-                if neg_risk_market_id and condition_id:
-                    session.run('''
-                        MATCH (m1:Market {condition_id: $condition_id})
-                        MATCH (m2:Market)
-                        WHERE m2.neg_risk_market_id = $neg_risk_market_id
-                          AND m1.condition_id <> m2.condition_id
-                        MERGE (m1)-[:SAME_GROUP {group_id: $neg_risk_market_id}]->(m2)
-                    ''', {
-                        'condition_id': condition_id,
-                        'neg_risk_market_id': neg_risk_market_id,
-                    })
-                    count += 1
-    
-    print(f'  ✓ Created relationships for {count} group markets\n')
+    print(f'  ✓ Linked {counts["markets"]} markets in {counts["groups"]} groups'
+          f'{" (with MarketGroup nodes)" if MARKET_GROUP_NODES else ""}\n')
 
-def create_holdings(driver):
-    """Calculate user holdings from BUY trades."""
-    print('[9/9] Creating holdings...')
+def create_holdings(driver, touched_markets=None):
+    """Net BUY/SELL positions per user and outcome, with realized and unrealized P&L."""
+    print('[9/10] Creating holdings...')
     
-    with driver.session() as session:
-        result = session.run('''
-            MATCH (u:User)-[:PLACED_TRADE]->(t:Trade)-[:FOR_OUTCOME]->(o:Outcome)
-            WHERE t.side = 'BUY'
-            WITH u, o, sum(t.size_usdc) as total_invested, max(t.timestamp) as last_trade
-            MERGE (u)-[h:HOLDS]->(o)
-            SET h.invested_usdc = total_invested,
-                h.last_updated = last_trade
-            RETURN count(*) as holdings_created
-        ''')
-        
-        count = result.single()['holdings_created']
+    pbar = tqdm(desc='  Markets', unit='market')
+    count = refresh_holdings(driver, touched_markets, on_batch=pbar.update)
+    pbar.close()
     
     print(f'  ✓ Created {count} holdings\n')
 
+def refresh_contrarian_aggregates(driver, touched_markets=None):
+    """Precompute trader/category contrarian stats, market trader counts and the timeline cube."""
+    print('[10/10] Refreshing contrarian aggregates...')
+    
+    counts = refresh_aggregates(driver, touched_markets)
+    
+    print(f'  ✓ Refreshed {counts["markets"]} markets, {counts["traders"]} traders and '
+          f'{counts["categories"]} categories')
+    print(f'  ✓ Updated {counts["timeline_buckets"]} timeline buckets\n')
+
+def export_admin_import_csvs(events, users, trades, out_dir, failed_markets=None):
+    """Write neo4j-admin import CSVs instead of importing through the driver."""
+    print(f'[3/10] Writing neo4j-admin import files to {out_dir}/...')
+    
+    counts = write_admin_import_csvs(
+        out_dir,
+        with_fingerprints(prepare_event_rows(events)),
+        with_fingerprints(prepare_market_rows(events)),
+        with_fingerprints(prepare_outcome_rows(events)),
+        users.values() if users is not None else None,
+        trades,
+        failed_markets,
+    )
+    
+    for name in ['Event', 'Market', 'Outcome', 'User', 'Trade']:
+        print(f'  ✓ {name}: {counts[name]:,} nodes')
+    for name in ['PART_OF_EVENT', 'HAS_OUTCOME', 'PLACED_TRADE', 'ON_MARKET', 'FOR_OUTCOME']:
+        print(f'  ✓ {name}: {counts[name]:,} relationships')
+    print(f'  ℹ {counts["duplicate_trades"]} duplicate and {counts["skipped_trades"]} unlinkable trades dropped\n')
+    
+    print('Build a fresh database offline (stop the database first):\n')
+    print(admin_import_command(out_dir))
+    print('\nThen start it and run create_schema, create_group_market_relationships, create_holdings and refresh_contrarian_aggregates.\n')
+
+def import_trade_stream_to_neo4j(driver, trade_pages, workers=1):
+    """Import users and trades from a page stream in bounded chunks."""
+    print('[6-7/10] Streaming users and trades...')
+    
+    pbar = tqdm(desc='  Trades', unit='trade')
+    stats = import_trade_stream(driver, trade_pages, chunk_size=STREAM_CHUNK_SIZE, workers=workers,
+                                on_chunk=pbar.update, failed_markets=failed_markets)
+    pbar.close()
+    
+    print(f'  ✓ Imported {stats["users"]} users')
+    print(f'  ✓ Imported {stats["trades"]} trades ({stats["skipped"]} skipped, {stats["duplicates"]} duplicates) from {stats["markets"]} markets '
+          f'in {stats["round_trips"]} round-trips')
+    print(f'  ✓ Volume: ${stats["volume"]:,.2f} USDC\n')
+    return stats
+
+def import_trade_pipeline_to_neo4j(driver, trade_batches, workers=4):
+    """Import users and trades per market on import workers while the fetch is still running."""
+    print(f'[6-7/10] Pipelining users and trades ({workers} import workers)...')
+    
+    pbar = tqdm(desc='  Trades', unit='trade')
+    stats = import_trade_pipeline(driver, trade_batches, workers=workers, max_pending=PIPELINE_QUEUE_SIZE,
+                                  on_batch=pbar.update, failed_markets=failed_markets)
+    pbar.close()
+    
+    print(f'  ✓ Imported {stats["users"]} users')
+    print(f'  ✓ Imported {stats["trades"]} trades ({stats["skipped"]} skipped, {stats["duplicates"]} duplicates) from {stats["markets"]} markets '
+          f'in {stats["round_trips"]} round-trips')
+    print(f'  ✓ Volume: ${stats["volume"]:,.2f} USDC')
+    # Fetch waiting on full queues means the database, not the API, set the pace.
+    print(f'  ℹ Fetch + import took {stats["wall_seconds"]:.1f}s; fetch waited {stats["blocked_seconds"]:.1f}s on the import workers\n')
+    return stats
+
 # Main execution.
 print('Starting Neo4j import...\n')
 
-create_schema(neo4j_driver)
-clear_database(neo4j_driver)
-import_events(neo4j_driver, latest_events)
-import_markets(neo4j_driver, latest_events)
-import_outcomes(neo4j_driver, latest_events)
-import_users(neo4j_driver, user_profiles)
-import_trades(neo4j_driver, all_token_transfers)
-create_group_market_relationships(neo4j_driver, latest_events)
-create_holdings(neo4j_driver)
+incremental = not FULL_REBUILD
+
+if IMPORT_BACKEND == 'admin-csv':
+    trade_source = (trade for page in trade_stream for trade in page) if STREAM_TRADES else all_token_transfers
+    with run_profiler.stage('admin_import_csv'):
+        export_admin_import_csvs(latest_events, None if STREAM_TRADES else user_profiles, trade_source, ADMIN_IMPORT_DIR,
+                                 failed_markets)
+else:
+    with run_profiler.stage('schema'):
+        create_schema(neo4j_driver)
+        if FULL_REBUILD:
+            clear_database(neo4j_driver)
+        else:
+            print('[2/10] Incremental sync (set FULL_REBUILD = True to clear and reload)\n')
+    with run_profiler.stage('import_events', rows=len(latest_events)):
+        import_events(neo4j_driver, latest_events, incremental)
+        touched_markets = import_markets(neo4j_driver, latest_events, incremental)
+        touched_markets |= import_outcomes(neo4j_driver, latest_events, incremental)
+    if STREAM_TRADES:
+        # Fetching and importing interleave here, so they share one stage.
+        with run_profiler.stage('stream_trades') as stage:
+            if PIPELINE_IMPORT:
+                stream_stats = import_trade_pipeline_to_neo4j(neo4j_driver, trade_stream, IMPORT_WORKERS)
+            else:
+                stream_stats = import_trade_stream_to_neo4j(neo4j_driver, trade_stream, IMPORT_WORKERS)
+            stage.add_rows(stream_stats['trades'])
+        touched_markets |= stream_stats['market_ids']
+    else:
+        with run_profiler.stage('import_users', rows=len(user_profiles)):
+            import_users(neo4j_driver, user_profiles)
+        with run_profiler.stage('import_trades'):
+            import_trades(neo4j_driver, all_token_transfers, IMPORT_WORKERS)
+            # Markets whose fetch failed keep their watermark, so the next sync retries them.
+            watermark_count = update_trade_watermarks(neo4j_driver, all_token_transfers, failed_markets)
+        print(f'  ✓ Advanced trade watermarks for {watermark_count} markets\n')
+        touched_markets |= {trade['condition_id'] for trade in all_token_transfers if trade.get('condition_id')}
+    with run_profiler.stage('market_groups'):
+        create_group_market_relationships(neo4j_driver, latest_events)
+    # A full rebuild recomputes every aggregate; a sync only those the touched markets feed into.
+    with run_profiler.stage('holdings'):
+        create_holdings(neo4j_driver, touched_markets if incremental else None)
+    with run_profiler.stage('aggregates'):
+        refresh_contrarian_aggregates(neo4j_driver, touched_markets if incremental else None)
 
 print('=' * 70)
 print('✅ Data import complete!')
@@ -484,6 +384,10 @@ print('Summary:')
 print(f'  • Events: {len(latest_events)}')
 print(f'  • Markets: {total_markets}')
 print(f'  • Outcomes: {len(all_outcomes)}')
-print(f'  • Trades: {len(all_token_transfers)}')
-print(f'  • Users: {len(user_profiles)}')
+if STREAM_TRADES and IMPORT_BACKEND != 'admin-csv':
+    print(f'  • Trades: {stream_stats["trades"]}{" (new since last sync)" if incremental else ""}')
+    print(f'  • Users: {stream_stats["users"]}')
+elif not STREAM_TRADES:
+    print(f'  • Trades: {len(all_token_transfers)}{" (new since last sync)" if incremental else ""}')
+    print(f'  • Users: {len(user_profiles)}')
 print('=' * 70)
@@ -1,5 +1,11 @@
 from tqdm.notebook import tqdm
 
+from category_flow import CategoryFlow, write_category_flow
+from contrarian_analytics import ContrarianAnalytics
+from market_correlation import MarketCorrelation, write_market_correlations
+from trader_network import TraderNetwork, write_co_trade_edges
+from trade_store import snapshot_complete
+
 print('=' * 70)
 print('Verifying Neo4j Database')
 print('=' * 70)
@@ -239,7 +245,144 @@ def verify_database(driver):
             print()
 
 # Run verification.
-verify_database(neo4j_driver)
+with run_profiler.stage('verify'):
+    verify_database(neo4j_driver)
+
+# ============================================================================
+# IN-PROCESS CONTRARIAN ANALYTICS
+# ============================================================================
+
+def run_contrarian_analytics(analytics: ContrarianAnalytics, max_entry_price: float = 0.2):
+    """Print the API's contrarian stats, computed from the fetched data instead of the graph."""
+    print('Contrarian Analytics (in-process)...')
+    print('-' * 70)
+
+    print(f'  Success Rate by Category (entry < {max_entry_price}):')
+    for row in analytics.success_rate_by_category(max_entry_price):
+        print(f'    • {row["category"]}: {row["success_rate"]:.1f}% '
+              f'({row["winning_bets"]:,}/{row["total_contrarian_bets"]:,} bets)')
+
+    print('\n  Top 5 Contrarian Traders:')
+    for idx, row in enumerate(analytics.top_contrarian_traders(limit=5, max_entry_price=max_entry_price), 1):
+        print(f'    {idx}. {row["trader_address"][:20]}... '
+              f'{row["contrarian_wins"]} wins | Profit: ${row["profit"]:,.2f}')
+    print()
+
+
+def run_trader_network(network: TraderNetwork):
+    """Print the strongest trader pairs over all traders and optionally store CO_TRADES_WITH edges."""
+    print('Trader Network (in-process)...')
+    print('-' * 70)
+
+    edges = network.edges(TRADER_NETWORK_NEIGHBORS, TRADER_NETWORK_MIN_SHARED)
+    print(f'  {network.n_traders:,} traders, {len(edges["trader1"]):,} pairs sharing '
+          f'{TRADER_NETWORK_MIN_SHARED}+ markets (top {TRADER_NETWORK_NEIGHBORS} per trader)')
+    if len(network.excluded_markets):
+        print(f'  ℹ {len(network.excluded_markets):,} markets with more than '
+              f'{TRADER_NETWORK_MAX_MARKET_TRADERS:,} traders left out')
+
+    print('\n  Top 5 Trader Pairs:')
+    addresses = network.trader_addresses
+    for idx, (t1, t2, shared) in enumerate(zip(edges['trader1'][:5], edges['trader2'][:5],
+                                               edges['shared_markets'][:5]), 1):
+        print(f'    {idx}. {addresses[t1][:12]}... & {addresses[t2][:12]}... {shared} shared markets')
+
+    if WRITE_TRADER_NETWORK and complete_trades:
+        count = write_co_trade_edges(neo4j_driver, network, edges)
+        print(f'\n  ✓ Stored {count:,} CO_TRADES_WITH edges')
+    elif WRITE_TRADER_NETWORK:
+        print('\n  ℹ Not storing CO_TRADES_WITH edges: the loaded trades are not the full history '
+              '(run once with FULL_REBUILD = True)')
+    print()
+
+
+def run_market_correlation(engine: MarketCorrelation):
+    """Print the resolved market pairs with the most shared traders and optionally store CORRELATED_WITH edges."""
+    print('Market Correlation (MinHash/LSH)...')
+    print('-' * 70)
+
+    pairs = engine.correlated_pairs(MARKET_CORRELATION_THRESHOLD, MARKET_CORRELATION_MIN_SHARED)
+    print(f'  {len(pairs["market1"]):,} market pairs with Jaccard >= {MARKET_CORRELATION_THRESHOLD} '
+          f'and {MARKET_CORRELATION_MIN_SHARED}+ shared traders ({pairs["candidates"]:,} LSH candidates verified)')
+
+    print('\n  Top 5 Market Pairs:')
+    for idx, row in enumerate(engine.market_correlation(MARKET_CORRELATION_MIN_SHARED, 5,
+                                                        MARKET_CORRELATION_THRESHOLD), 1):
+        print(f'    {idx}. {row["market1_question"][:30]}... & {row["market2_question"][:30]}... '
+              f'{row["shared_traders"]} shared traders')
+
+    if WRITE_MARKET_CORRELATION and complete_trades:
+        count = write_market_correlations(neo4j_driver, engine, pairs)
+        print(f'\n  ✓ Stored {count:,} CORRELATED_WITH edges')
+    elif WRITE_MARKET_CORRELATION:
+        print('\n  ℹ Not storing CORRELATED_WITH edges: the loaded trades are not the full history '
+              '(run once with FULL_REBUILD = True)')
+    print()
+
+
+def run_category_flow(flow: CategoryFlow):
+    """Print the most frequent category switches and optionally store CategoryTransition nodes."""
+    print('Category Flow (in-process)...')
+    print('-' * 70)
+    print(f'  {flow.transitions.sum():,} category switches by {flow.trader_count:,} traders '
+          f'({flow.trade_count:,} trades)')
+
+    print('\n  Top 5 Transitions:')
+    for idx, row in enumerate(flow.transition_rows(5), 1):
+        print(f'    {idx}. {row["from_category"]} → {row["to_category"]}: {row["transitions"]:,} '
+              f'({row["traders"]:,} traders, avg dwell {row["avg_dwell_seconds"] / 86400:.1f} days)')
+
+    if WRITE_CATEGORY_FLOW and complete_trades:
+        count = write_category_flow(neo4j_driver, flow)
+        print(f'\n  ✓ Stored {count:,} CategoryTransition nodes')
+    elif WRITE_CATEGORY_FLOW:
+        print('\n  ℹ Not storing CategoryTransition nodes: the loaded trades are not the full history '
+              '(run once with FULL_REBUILD = True)')
+    print()
+
+
+# all_token_transfers only holds the trades this run fetched, which on a sync is the delta.
+# The snapshot holds every trade (a sync appends to it), so it is read instead when available.
+# Write-backs replace what the API reads and only run on a complete set of trades.
+use_snapshot = LOAD_SNAPSHOT or (SAVE_SNAPSHOT and (STREAM_TRADES or not full_fetch))
+complete_trades = snapshot_complete(SNAPSHOT_DIR) if use_snapshot else full_fetch
+
+analytics = None
+with run_profiler.stage('analytics'):
+    if use_snapshot:
+        analytics = ContrarianAnalytics.from_snapshot(SNAPSHOT_DIR)
+    elif not STREAM_TRADES:
+        analytics = ContrarianAnalytics(latest_events, all_token_transfers)
+    if analytics is not None:
+        run_contrarian_analytics(analytics)
+
+if analytics is not None:
+    with run_profiler.stage('trader_network'):
+        run_trader_network(TraderNetwork.from_analytics(analytics, TRADER_NETWORK_MAX_MARKET_TRADERS))
+
+    with run_profiler.stage('market_correlation'):
+        run_market_correlation(MarketCorrelation.from_analytics(analytics, num_perm=MARKET_CORRELATION_PERMUTATIONS))
+
+flow_options = {
+    'max_gap_seconds': CATEGORY_FLOW_MAX_GAP_DAYS * 86400 if CATEGORY_FLOW_MAX_GAP_DAYS else None,
+    'min_trades': CATEGORY_FLOW_MIN_TRADES,
+}
+with run_profiler.stage('category_flow'):
+    if use_snapshot:
+        run_category_flow(CategoryFlow.from_snapshot(SNAPSHOT_DIR, CATEGORY_FLOW_MEMORY_ROWS, **flow_options))
+    elif analytics is not None:
+        run_category_flow(CategoryFlow.from_analytics(analytics, **flow_options))
+
+# Run profile of the whole pipeline (steps 4-9).
+print('Run profile:')
+print('-' * 70)
+run_profiler.print_summary()
+run_profiler.write_json(RUN_REPORT_PATH)
+print(f'  ✓ Run report written to {RUN_REPORT_PATH}')
+if PROMETHEUS_TEXTFILE:
+    run_profiler.write_prometheus(PROMETHEUS_TEXTFILE)
+    print(f'  ✓ Prometheus metrics written to {PROMETHEUS_TEXTFILE}')
+print()
 
 print('=' * 70)
 print('✅ Database Verification Complete!')
@@ -0,0 +1,296 @@
+"""Synthetic Polymarket events and trades in the Gamma/Data API shapes, for offline benchmarks."""
+import json
+from datetime import datetime, timezone
+from typing import List, Dict, Any, Iterator, Optional
+
+import numpy as np
+import pyarrow as pa
+
+from trade_fetcher import transform_trade
+from trade_table import TradeTable
+
+CATEGORIES = ['Politics', 'Sports', 'Crypto', 'Finance', 'Science', 'Entertainment']
+CATEGORY_WEIGHTS = [0.3, 0.3, 0.2, 0.1, 0.05, 0.05]
+
+DEFAULT_START_TIMESTAMP = 1735689600  # 2025-01-01
+
+
+def _hex_id(prefix: int, value: int, digits: int) -> str:
+    return f'0x{prefix:02x}{value:0{digits - 2}x}'
+
+
+def _gamma_time(timestamp: int) -> str:
+    return datetime.fromtimestamp(int(timestamp), timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def _zipf_weights(count: int, skew: float, rng: np.random.Generator) -> np.ndarray:
+    """Zipf-like popularity over `count` items in random order (skew 0 = uniform)."""
+    weights = 1.0 / np.arange(1, count + 1) ** skew
+    rng.shuffle(weights)
+    return weights / weights.sum()
+
+
+class SyntheticDataset:
+    """Reproducible events, markets, outcomes and trades with realistic skew.
+
+    - Market activity is Zipf-distributed (`market_skew`), so a few hot
+      markets hold most trades, as with live data.
+    - Trader activity is Zipf-distributed too (`trader_skew`); the most
+      active `whale_share` of traders also trade ~25x larger sizes.
+    - `neg_risk_share` of events are neg-risk groups of 3-8 markets that
+      share a `negRiskMarketID`; the rest have one or two binary markets.
+    - Prices scatter around each market's implied probability, and resolved
+      markets pick their winner with that probability, so cheap contrarian
+      wins happen at a plausible rate. A few percent of trades are extra
+      fills of the previous transaction (same hash, different fill).
+
+    `events` are Gamma /events dicts (step-4); `raw_trades()` returns Data
+    API /trades dicts newest first per market (step-6's input). Trades are
+    held as NumPy columns, so a million of them fit easily in memory.
+    """
+
+    def __init__(self, n_trades: int = 10000, n_events: int = None, n_traders: int = None,
+                 market_skew: float = 1.1, trader_skew: float = 1.2, whale_share: float = 0.01,
+                 neg_risk_share: float = 0.3, resolved_share: float = 0.85, multi_fill_share: float = 0.03,
+                 start_timestamp: int = DEFAULT_START_TIMESTAMP, duration_days: int = 180, seed: int = 0):
+        self.rng = np.random.default_rng(seed)
+        self.n_trades = n_trades
+        self.n_events = n_events if n_events is not None else max(10, n_trades // 200)
+        self.n_traders = n_traders if n_traders is not None else max(50, n_trades // 8)
+        self.start_timestamp = start_timestamp
+        self.end_timestamp = start_timestamp + duration_days * 86400
+
+        self._build_events(neg_risk_share, resolved_share)
+        self._build_trades(market_skew, trader_skew, whale_share, multi_fill_share)
+
+    # ------------------------------------------------------------------------
+    # Generation
+    # ------------------------------------------------------------------------
+
+    def _build_events(self, neg_risk_share: float, resolved_share: float):
+        rng = self.rng
+        self.events = []
+        self.condition_ids = []
+        self.market_meta = []  # Per market: (slug, question, event_slug)
+        probabilities = []
+
+        for e in range(self.n_events):
+            category = CATEGORIES[rng.choice(len(CATEGORIES), p=CATEGORY_WEIGHTS)]
+            start = int(rng.integers(self.start_timestamp, self.end_timestamp - 86400))
+            end = int(min(start + rng.integers(1, 60) * 86400, self.end_timestamp))
+            neg_risk = bool(rng.random() < neg_risk_share)
+            market_count = int(rng.integers(3, 9)) if neg_risk else int(rng.integers(1, 3))
+            event_slug = f'synthetic-{category.lower()}-event-{e}'
+            resolved = bool(rng.random() < resolved_share)
+
+            # Neg-risk groups: mutually exclusive markets, exactly one resolves Yes.
+            if neg_risk:
+                yes_prices = rng.dirichlet(np.ones(market_count))
+                winner = int(rng.choice(market_count, p=yes_prices))
+            else:
+                yes_prices = rng.beta(2, 2, size=market_count)
+                winner = None
+
+            markets = []
+            for k in range(market_count):
+                m = len(self.condition_ids)
+                condition_id = _hex_id(1, m, 64)
+                yes_price = float(np.clip(yes_prices[k], 0.01, 0.99))
+                yes_wins = (k == winner) if neg_risk else bool(rng.random() < yes_price)
+
+                if resolved:
+                    outcome_prices = ['1', '0'] if yes_wins else ['0', '1']
+                else:
+                    outcome_prices = [f'{yes_price:.3f}', f'{1 - yes_price:.3f}']
+
+                slug = f'{event_slug}-market-{k}'
+                question = f'Synthetic {category} question {e}.{k}?'
+                markets.append({
+                    'id': str(m),
+                    'conditionId': condition_id,
+                    'question': question,
+                    'slug': slug,
+                    'description': f'Synthetic market {k} of event {e}.',
+                    'questionID': _hex_id(2, m, 64),
+                    'startDate': _gamma_time(start),
+                    'endDate': _gamma_time(end),
+                    'closed': resolved,
+                    'closedTime': datetime.fromtimestamp(end, timezone.utc).strftime('%Y-%m-%d %H:%M:%S+00') if resolved else '',
+                    'umaResolutionStatus': 'resolved' if resolved else '',
+                    'resolvedBy': '0x0000000000000000000000000000000000000001' if resolved else '',
+                    'outcomes': json.dumps(['Yes', 'No']),
+                    'outcomePrices': json.dumps(outcome_prices),
+                    'clobTokenIds': json.dumps([str(2 * m + 1), str(2 * m + 2)]),
+                    'volumeNum': 0.0,
+                    'volumeClob': 0.0,
+                    'liquidityNum': float(rng.integers(1000, 100000)),
+                    'lastTradePrice': yes_price,
+                    'bestBid': max(yes_price - 0.01, 0.0),
+                    'bestAsk': min(yes_price + 0.01, 1.0),
+                    'spread': 0.02,
+                    'negRisk': neg_risk,
+                    'negRiskMarketID': _hex_id(3, e, 64) if neg_risk else None,
+                    'groupItemTitle': f'Option {k}' if neg_risk else None,
+                    'groupItemThreshold': str(k) if neg_risk else None,
+                    'restricted': False,
+                    'active': not resolved,
+                })
+                self.condition_ids.append(condition_id)
+                self.market_meta.append((slug, question, event_slug))
+                probabilities.append(yes_price)
+
+            self.events.append({
+                'id': str(e),
+                'slug': event_slug,
+                'title': f'Synthetic {category} event {e}',
+                'description': f'Synthetic {category} event {e}.',
+                'startDate': _gamma_time(start),
+                'endDate': _gamma_time(end),
+                'closed': resolved,
+                'volume': 0.0,
+                'liquidity': 0.0,
+                'openInterest': 0.0,
+                'icon': '',
+                'image': '',
+                'commentCount': int(rng.integers(0, 50)),
+                'tags': [{'label': category}, {'label': 'All'}],
+                'restricted': False,
+                'featured': False,
+                'markets': markets,
+            })
+
+        self.market_yes_price = np.array(probabilities, dtype=np.float64)
+        self.market_index = {condition_id: i for i, condition_id in enumerate(self.condition_ids)}
+
+    def _build_trades(self, market_skew: float, trader_skew: float, whale_share: float, multi_fill_share: float):
+        rng = self.rng
+        n = self.n_trades
+        n_markets = len(self.condition_ids)
+
+        market = rng.choice(n_markets, size=n, p=_zipf_weights(n_markets, market_skew, rng))
+
+        trader_weights = _zipf_weights(self.n_traders, trader_skew, rng)
+        trader = rng.choice(self.n_traders, size=n, p=trader_weights)
+        whale_count = max(1, int(self.n_traders * whale_share))
+        whales = np.zeros(self.n_traders, dtype=bool)
+        whales[np.argsort(-trader_weights)[:whale_count]] = True
+
+        outcome_index = rng.integers(0, 2, size=n)
+        yes_price = self.market_yes_price[market]
+        fair_price = np.where(outcome_index == 0, yes_price, 1.0 - yes_price)
+        price = np.round(np.clip(fair_price + rng.normal(0, 0.05, size=n), 0.001, 0.999), 3)
+
+        size = np.round(rng.lognormal(3.0, 1.2, size=n) * np.where(whales[trader], 25.0, 1.0), 2)
+        is_buy = rng.random(n) < 0.8
+        timestamp = rng.integers(self.start_timestamp, self.end_timestamp, size=n)
+
+        # Newest first inside each market, like /trades pages.
+        order = np.lexsort((-timestamp, market))
+        self.market = market[order].astype(np.int32)
+        self.trader = trader[order].astype(np.int32)
+        self.outcome_index = outcome_index[order].astype(np.int8)
+        self.price = price[order]
+        self.size = size[order]
+        self.is_buy = is_buy[order]
+        self.timestamp = timestamp[order].astype(np.int64)
+
+        # Extra fills reuse the previous trade's transaction (same market and second).
+        tx = np.arange(n, dtype=np.int64)
+        extra_fill = rng.random(n) < multi_fill_share
+        extra_fill[0] = False
+        extra_fill[1:] &= self.market[1:] == self.market[:-1]
+        self.timestamp[1:][extra_fill[1:]] = self.timestamp[:-1][extra_fill[1:]]
+        tx[extra_fill] = -1
+        self.tx = np.maximum.accumulate(tx)
+
+        self.market_start = np.searchsorted(self.market, np.arange(n_markets + 1)).astype(np.int64)
+
+    # ------------------------------------------------------------------------
+    # Data API shapes
+    # ------------------------------------------------------------------------
+
+    def trader_address(self, trader: int) -> str:
+        return f'0x{trader + 1:040x}'  # Never the null address
+
+    def raw_trade(self, row: int) -> Dict[str, Any]:
+        market = int(self.market[row])
+        slug, question, event_slug = self.market_meta[market]
+        outcome_index = int(self.outcome_index[row])
+        trader = int(self.trader[row])
+        return {
+            'proxyWallet': self.trader_address(trader),
+            'side': 'BUY' if self.is_buy[row] else 'SELL',
+            'asset': str(2 * market + 1 + outcome_index),
+            'conditionId': self.condition_ids[market],
+            'size': float(self.size[row]),
+            'price': float(self.price[row]),
+            'timestamp': int(self.timestamp[row]),
+            'title': question,
+            'slug': slug,
+            'icon': '',
+            'eventSlug': event_slug,
+            'outcome': 'Yes' if outcome_index == 0 else 'No',
+            'outcomeIndex': outcome_index,
+            'name': f'trader-{trader}',
+            'pseudonym': f'Synthetic-Trader-{trader}',
+            'bio': '',
+            'profileImage': '',
+            'profileImageOptimized': '',
+            'transactionHash': f'0x{int(self.tx[row]):064x}',
+        }
+
+    def market_trade_count(self, condition_id: str) -> int:
+        m = self.market_index.get(condition_id)
+        return 0 if m is None else int(self.market_start[m + 1] - self.market_start[m])
+
+    def market_rows(self, condition_id: str) -> np.ndarray:
+        """Row numbers of one market's trades, newest first."""
+        m = self.market_index.get(condition_id)
+        if m is None:
+            return np.arange(0)
+        return np.arange(self.market_start[m], self.market_start[m + 1])
+
+    def raw_trades(self, condition_id: str, offset: int = 0, limit: int = None,
+                   rows: Optional[np.ndarray] = None) -> List[Dict[str, Any]]:
+        """One market's trades as Data API dicts (newest first), paged like /trades."""
+        rows = self.market_rows(condition_id) if rows is None else rows
+        rows = rows[offset:] if limit is None else rows[offset:offset + limit]
+        return [self.raw_trade(int(row)) for row in rows]
+
+    # ------------------------------------------------------------------------
+    # Pipeline shapes
+    # ------------------------------------------------------------------------
+
+    def iter_raw_trades(self) -> Iterator[Dict[str, Any]]:
+        for row in range(self.n_trades):
+            yield self.raw_trade(row)
+
+    def trade_pages(self, page_size: int = 5000) -> Iterator[List[Dict[str, Any]]]:
+        """transform_trade dicts in pages, as step-6's trade stream yields them."""
+        for start in range(0, self.n_trades, page_size):
+            yield [transform_trade(self.raw_trade(row)) for row in range(start, min(start + page_size, self.n_trades))]
+
+    def trade_table(self) -> TradeTable:
+        return TradeTable(trade for page in self.trade_pages() for trade in page)
+
+    def user_profiles(self) -> Dict[str, Dict[str, Any]]:
+        """Profiles in the shape ContrarianAnalytics takes with an Arrow table."""
+        return {
+            self.trader_address(t): {'name': f'trader-{t}', 'pseudonym': f'Synthetic-Trader-{t}', 'profile_image': ''}
+            for t in range(self.n_traders)
+        }
+
+    def arrow_table(self) -> pa.Table:
+        """The columns ContrarianAnalytics reads (contrarian_analytics.TRADE_COLUMNS)."""
+        addresses = np.array([self.trader_address(t) for t in range(self.n_traders)], dtype=object)
+        condition_ids = np.array(self.condition_ids, dtype=object)
+        return pa.table({
+            'hash': pa.array([f'0x{tx:064x}' for tx in self.tx.tolist()], pa.string()),
+            'from': pa.DictionaryArray.from_arrays(pa.array(self.trader), pa.array(addresses, pa.string())),
+            'side': pa.array(np.where(self.is_buy, 'BUY', 'SELL'), pa.string()),
+            'condition_id': pa.DictionaryArray.from_arrays(pa.array(self.market), pa.array(condition_ids, pa.string())),
+            'outcome_index': pa.array(self.outcome_index.astype(np.int64)),
+            'size': pa.array(self.size),
+            'price': pa.array(self.price),
+            'timestamp': pa.array(self.timestamp),
+        })
@@ -0,0 +1,51 @@
+"""Minimal stand-in for a neo4j Driver that records every statement instead of running it."""
+import threading
+
+
+class RecordingTransaction:
+    def __init__(self, driver: 'RecordingDriver'):
+        self.driver = driver
+
+    def run(self, query, parameters=None, **kwargs):
+        with self.driver.lock:
+            self.driver.calls.append((query, parameters or kwargs))
+        return self
+
+    def consume(self):
+        return None
+
+    def single(self):
+        return None
+
+    def __iter__(self):
+        return iter([])
+
+
+class RecordingSession(RecordingTransaction):
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+    def execute_write(self, work, *args, **kwargs):
+        return work(RecordingTransaction(self.driver), *args, **kwargs)
+
+    execute_read = execute_write
+
+    def close(self):
+        pass
+
+
+class RecordingDriver:
+    def __init__(self):
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def session(self, **kwargs):
+        return RecordingSession(self)
+
+    def watermarks(self):
+        """Watermark rows written so far, by condition_id."""
+        return {row['condition_id']: row['watermark'] for query, parameters in self.calls
+                if 'trade_watermark' in query and 'rows' in parameters for row in parameters['rows']}
@@ -0,0 +1,55 @@
+import csv
+import os
+
+from admin_import import ARRAY_DELIMITER, admin_import_command, write_admin_import_csvs
+from events_crawler import extract_category_from_tags
+from neo4j_import import prepare_event_rows, prepare_market_rows, prepare_outcome_rows, with_fingerprints
+from synthetic_data import SyntheticDataset
+from trade_fetcher import transform_trade
+
+
+def read_csv(out_dir, name):
+    with open(os.path.join(out_dir, name), newline='', encoding='utf-8') as f:
+        return list(csv.DictReader(f))
+
+
+def test_export_round_trips_multiline_fields_and_arrays(tmp_path):
+    data = SyntheticDataset(400, seed=7)
+    events = data.events
+    for event in events:
+        event['category'] = extract_category_from_tags(event)
+    events[0]['description'] = 'First line,\n"quoted" second line'
+    events[0]['tags'].append({'label': f'odd{ARRAY_DELIMITER}tag'})
+
+    trades = [transform_trade(trade) for trade in data.iter_raw_trades()]
+    failed = {data.condition_ids[0]}
+    out_dir = str(tmp_path)
+    counts = write_admin_import_csvs(out_dir, with_fingerprints(prepare_event_rows(events)),
+                                     with_fingerprints(prepare_market_rows(events)),
+                                     with_fingerprints(prepare_outcome_rows(events)), None, iter(trades + trades[:10]),
+                                     failed)
+
+    assert counts['Trade'] == len(trades)
+    assert counts['duplicate_trades'] == 10
+    assert counts['ON_MARKET'] == len(trades)
+    assert counts['User'] == len({trade['from'] for trade in trades})
+
+    event_rows = {row['slug:ID(Event)']: row for row in read_csv(out_dir, 'nodes_event.csv')}
+    first = event_rows[events[0]['slug']]
+    assert first['description'] == events[0]['description']
+    assert first['tags:string[]'].split(ARRAY_DELIMITER)[-1] == 'oddtag'
+
+    newest = {}
+    for trade in trades:
+        newest[trade['condition_id']] = max(newest.get(trade['condition_id'], 0), int(trade['timestamp']))
+    watermarks = {row['condition_id:ID(Market)']: row['trade_watermark:long']
+                  for row in read_csv(out_dir, 'nodes_market.csv')}
+    assert watermarks[data.condition_ids[0]] == ''
+    for condition_id in data.condition_ids[1:]:
+        assert watermarks[condition_id] == str(newest.get(condition_id, ''))
+
+
+def test_command_reads_multiline_fields():
+    command = admin_import_command('out')
+    assert '--multiline-fields=true' in command
+    assert f'--array-delimiter="U+{ord(ARRAY_DELIMITER):04X}"' in command
@@ -0,0 +1,78 @@
+from collections import defaultdict
+
+import numpy as np
+import pytest
+
+from category_flow import CategoryFlow, _trader_key
+from events_crawler import extract_category_from_tags
+from synthetic_data import SyntheticDataset
+from trade_fetcher import transform_trade
+from trade_store import load_trades, write_snapshot
+
+
+@pytest.fixture(scope='module')
+def snapshot(tmp_path_factory):
+    data = SyntheticDataset(6000, seed=13)
+    for event in data.events:
+        event['category'] = extract_category_from_tags(event)
+    root = str(tmp_path_factory.mktemp('snapshot'))
+    write_snapshot(root, data.events, (transform_trade(trade) for trade in data.iter_raw_trades()))
+    return root
+
+
+def brute_force(addresses, timestamps, categories, category_names):
+    """Walk every trader's trades in time order and record each category switch."""
+    code = {name: i for i, name in enumerate(category_names)}
+    history = defaultdict(list)
+    for address, timestamp, category in zip(addresses, timestamps, categories):
+        history[address].append((timestamp, code[category]))
+
+    stats = defaultdict(lambda: {'transitions': 0, 'traders': set(), 'gap': 0, 'dwell': 0})
+    for address, trades in history.items():
+        trades.sort()
+        run_first = trades[0][0]
+        for (previous, source), (timestamp, target) in zip(trades, trades[1:]):
+            if source == target:
+                continue
+            cell = stats[category_names[source], category_names[target]]
+            cell['transitions'] += 1
+            cell['traders'].add(address)
+            cell['gap'] += timestamp - previous
+            cell['dwell'] += timestamp - run_first
+            run_first = timestamp
+    return {pair: (cell['transitions'], len(cell['traders']), cell['gap'] / cell['transitions'],
+                   cell['dwell'] / cell['transitions']) for pair, cell in stats.items()}
+
+
+def summary(flow):
+    return {(row['from_category'], row['to_category']):
+            (row['transitions'], row['traders'], row['avg_gap_seconds'], row['avg_dwell_seconds'])
+            for row in flow.transition_rows()}
+
+
+def test_snapshot_arrays_and_brute_force_agree(snapshot, tmp_path):
+    # A small memory budget forces spilled runs and the k-way merge.
+    spilled = CategoryFlow.from_snapshot(snapshot, memory_rows=500, spill_dir=str(tmp_path))
+    in_memory = CategoryFlow.from_snapshot(snapshot)
+    names = spilled.category_names
+    assert in_memory.category_names == names
+
+    table = load_trades(snapshot, columns=['from', 'timestamp', 'category'])
+    addresses = table.column('from').to_pylist()
+    timestamps = table.column('timestamp').to_pylist()
+    categories = table.column('category').to_pylist()
+    code = {name: i for i, name in enumerate(names)}
+    from_arrays = CategoryFlow.from_arrays(np.array([_trader_key(address) for address in addresses], dtype=np.uint64),
+                                           np.array(timestamps, dtype=np.int64),
+                                           np.array([code[category] for category in categories], dtype=np.int64),
+                                           names)
+
+    expected = brute_force(addresses, timestamps, categories, names)
+    assert expected
+    for flow in [spilled, in_memory, from_arrays]:
+        result = summary(flow)
+        assert set(result) == set(expected)
+        for pair, (transitions, traders, gap, dwell) in expected.items():
+            assert result[pair][:2] == (transitions, traders)
+            assert result[pair][2:] == pytest.approx((gap, dwell))
+    assert spilled.trade_count == from_arrays.trade_count == len(addresses)
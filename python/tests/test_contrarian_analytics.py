@@ -0,0 +1,85 @@
+from collections import defaultdict
+
+import pytest
+
+from contrarian_analytics import ContrarianAnalytics
+from events_crawler import extract_category_from_tags
+from neo4j_import import NULL_ADDRESS, prepare_market_rows, prepare_outcome_rows
+from synthetic_data import SyntheticDataset
+from trade_fetcher import transform_trade
+
+
+@pytest.fixture(scope='module')
+def data():
+    data = SyntheticDataset(5000, seed=11)
+    for event in data.events:
+        event['category'] = extract_category_from_tags(event)
+    return data
+
+
+def contrarian_bets(events, trades, max_entry_price):
+    """Brute-force walk of the User-Trade-Outcome-Market-Event join."""
+    categories = {event['slug']: event.get('category', 'Unknown') for event in events}
+    markets = {}
+    for row in prepare_market_rows(events):
+        markets.setdefault(row['condition_id'], row)
+    outcomes = {}
+    for row in prepare_outcome_rows(events):
+        outcomes.setdefault((row['condition_id'], row['outcome_index']), row['outcome_name'])
+
+    for trade in trades:
+        market = markets.get(trade['condition_id'])
+        outcome = outcomes.get((trade['condition_id'], trade['outcome_index']))
+        if market is None or outcome is None or not trade['hash'] or trade['from'] in ('', None, NULL_ADDRESS):
+            continue
+        if market['resolved'] and trade['side'] == 'BUY' and 0 < trade['price'] < max_entry_price:
+            yield trade, categories.get(market['event_slug'], 'Unknown'), market['winning_outcome'] == outcome
+
+
+def test_matches_brute_force(data):
+    trades = [transform_trade(trade) for trade in data.iter_raw_trades()]
+    engine = ContrarianAnalytics(data.events, trades)
+    bets = list(contrarian_bets(data.events, trades, 0.2))
+    assert bets
+
+    by_category = defaultdict(lambda: [0, 0])
+    by_trader = defaultdict(lambda: [0, 0.0, 0.0])
+    for trade, category, won in bets:
+        by_category[category][0] += 1
+        by_category[category][1] += won
+        if won:
+            by_trader[trade['from']][0] += 1
+            by_trader[trade['from']][1] += trade['size']
+            by_trader[trade['from']][2] += trade['size'] / trade['price']
+
+    rates = {row['category']: (row['total_contrarian_bets'], row['winning_bets'])
+             for row in engine.success_rate_by_category()}
+    assert rates == {category: tuple(counts) for category, counts in by_category.items()}
+
+    top = engine.top_contrarian_traders(limit=len(by_trader), min_wins=1)
+    assert {row['trader_address'] for row in top} == set(by_trader)
+    for row in top:
+        wins, investment, payout = by_trader[row['trader_address']]
+        assert row['contrarian_wins'] == wins
+        assert row['total_investment'] == pytest.approx(investment)
+        assert row['total_payout'] == pytest.approx(payout)
+
+    assert len(engine.leaderboard(limit=10 ** 6)) == sum(won for _, _, won in bets)
+
+
+def test_table_and_dicts_agree(data):
+    trades = [transform_trade(trade) for trade in data.iter_raw_trades()]
+    from_dicts = ContrarianAnalytics(data.events, trades)
+    from_table = ContrarianAnalytics(data.events, data.arrow_table())
+    assert from_dicts.success_rate_by_category() == from_table.success_rate_by_category()
+    assert from_dicts.roi_by_entry_bucket() == from_table.roi_by_entry_bucket()
+
+
+@pytest.mark.parametrize('with_events', [False, True])
+def test_no_trades(data, with_events):
+    engine = ContrarianAnalytics(data.events if with_events else [], [])
+    assert engine.leaderboard() == []
+    assert engine.success_rate_by_category() == []
+    assert engine.top_contrarian_traders() == []
+    assert engine.contrarian_timeline() == []
+    assert all(row['bets'] == 0 for row in engine.roi_by_entry_bucket())
@@ -0,0 +1,25 @@
+from api_standin import PolymarketStandIn
+from events_crawler import EventCrawler
+from page_cache import PageCache
+from synthetic_data import SyntheticDataset
+
+
+def crawl_slugs(base_url, cache=None):
+    crawler = EventCrawler(base_url, page_size=4, requests_per_second=1000, cache=cache, http2=False)
+    return {event['slug'] for event in crawler.run()}
+
+
+def test_sync_sees_new_event_and_rebuild_replays_cache(tmp_path):
+    data = SyntheticDataset(500, seed=3)
+    with PolymarketStandIn(data) as standin:
+        cache = PageCache(str(tmp_path))
+        first = crawl_slugs(standin.base_url, cache)
+        assert first == {event['slug'] for event in data.events}
+
+        newest = max(int(event['id']) for event in data.events) + 1
+        standin.events_by_id.append(dict(data.events[0], id=str(newest), slug='new-event', markets=[]))
+
+        # A sync crawls without the cache (step-4), so it sees the new event.
+        assert crawl_slugs(standin.base_url) == first | {'new-event'}
+        # FULL_REBUILD replays the stored pages.
+        assert crawl_slugs(standin.base_url, cache) == first
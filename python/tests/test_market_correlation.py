@@ -0,0 +1,53 @@
+from itertools import combinations
+
+import numpy as np
+
+from market_correlation import MarketCorrelation
+
+
+def planted_markets(n_markets=60, n_traders=2000, seed=0):
+    """Random trader sets; markets 1, 5, 9, ... share most of their traders with the market before them."""
+    rng = np.random.default_rng(seed)
+    sets = []
+    for m in range(n_markets):
+        if m % 4 == 1:
+            base = sets[-1]
+            keep = rng.choice(sorted(base), size=int(len(base) * 0.8), replace=False)
+            extra = rng.choice(n_traders, size=len(base) // 5)
+            sets.append(set(keep.tolist()) | set(extra.tolist()))
+        else:
+            sets.append(set(rng.choice(n_traders, size=int(rng.integers(20, 200)), replace=False).tolist()))
+    market = np.array([m for m, traders in enumerate(sets) for _ in traders], dtype=np.int64)
+    trader = np.array([t for traders in sets for t in traders], dtype=np.int64)
+    markets = [{'condition_id': f'm{m}', 'question': '', 'slug': '', 'category': ''} for m in range(n_markets)]
+    return sets, market, trader, markets
+
+
+def jaccard(a, b):
+    return len(a & b) / len(a | b)
+
+
+def test_matches_exact_jaccard():
+    sets, market, trader, markets = planted_markets()
+    # Duplicate (market, trader) pairs count once.
+    engine = MarketCorrelation(np.tile(market, 2), np.tile(trader, 2), markets, num_perm=256)
+
+    market1, market2 = map(np.array, zip(*combinations(range(len(sets)), 2)))
+    shared, exact = engine.exact_overlap(market1, market2)
+    expected = np.array([jaccard(sets[a], sets[b]) for a, b in zip(market1, market2)])
+    by_pair = {(int(a), int(b)): j for a, b, j in zip(market1, market2, expected)}
+    assert np.allclose(exact, expected)
+    assert (shared == [len(sets[a] & sets[b]) for a, b in zip(market1, market2)]).all()
+
+    # MinHash estimates within five standard errors.
+    estimate = engine.estimate_jaccard(market1, market2)
+    assert (np.abs(estimate - expected) <= 5 * np.sqrt(expected * (1 - expected) / 256) + 0.02).all()
+
+    threshold = 0.3
+    pairs = engine.correlated_pairs(threshold)
+    found = set(zip(pairs['market1'].tolist(), pairs['market2'].tolist()))
+    assert found <= {pair for pair, j in by_pair.items() if j >= threshold}
+    # Planted pairs sit far above the threshold, so LSH does not miss them.
+    planted = {pair for pair, j in by_pair.items() if j >= 0.5}
+    assert len(planted) == len(sets) // 4 and planted <= found
+    assert pairs['candidates'] < len(market1) / 4
@@ -0,0 +1,32 @@
+import pytest
+
+from api_standin import PolymarketStandIn
+from fake_neo4j import RecordingDriver
+from neo4j_import import import_trade_pipeline, import_trade_stream
+from synthetic_data import SyntheticDataset
+from trade_fetcher import stream_trades
+
+
+@pytest.fixture(scope='module')
+def data():
+    return SyntheticDataset(20000, seed=2)
+
+
+@pytest.mark.parametrize('pipeline', [False, True])
+def test_failed_markets_keep_their_watermark(data, pipeline):
+    failed = set()
+    driver = RecordingDriver()
+    # Without retries, injected 503s end some market fetches part way.
+    with PolymarketStandIn(data, error_rate=0.1, seed=1) as standin:
+        stream = stream_trades(data.condition_ids, base_url=standin.base_url, requests_per_second=1000,
+                               http2=False, max_retries=0, market_batches=pipeline, failed_markets=failed)
+        if pipeline:
+            import_trade_pipeline(driver, stream, workers=2, failed_markets=failed)
+        else:
+            import_trade_stream(driver, stream, chunk_size=2000, failed_markets=failed)
+
+    watermarks = driver.watermarks()
+    assert failed and watermarks
+    assert not failed & set(watermarks)
+    for condition_id, watermark in watermarks.items():
+        assert watermark == int(data.timestamp[data.market_rows(condition_id)].max())
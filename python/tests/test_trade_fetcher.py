@@ -0,0 +1,100 @@
+import numpy as np
+import pytest
+
+import trade_fetcher
+from api_standin import PolymarketStandIn
+from page_cache import PageCache
+from synthetic_data import SyntheticDataset
+from trade_fetcher import fetch_markets_concurrently, run_async, trade_identity, transform_trade
+
+
+@pytest.fixture(scope='module')
+def data():
+    return SyntheticDataset(6000, seed=5)
+
+
+def expected_identities(data, condition_id, since=None):
+    rows = data.market_rows(condition_id)
+    if since is not None:
+        rows = rows[data.timestamp[rows] >= since]
+    return sorted(trade_identity(transform_trade(data.raw_trade(int(row)))) for row in rows)
+
+
+def fetch(base_url, condition_ids, **kwargs):
+    return run_async(fetch_markets_concurrently(condition_ids, base_url=base_url, requests_per_second=1000,
+                                                http2=False, **kwargs))
+
+
+def identities(trades):
+    return sorted(trade_identity(trade) for trade in trades)
+
+
+def test_sync_is_not_capped(data):
+    # Watermarks halfway through each market's history leave more new trades than the cap.
+    watermarks = {cid: int(np.median(data.timestamp[data.market_rows(cid)])) for cid in data.condition_ids}
+    with PolymarketStandIn(data) as standin:
+        trades = fetch(standin.base_url, data.condition_ids, max_trades=20, watermarks=watermarks)
+
+    expected = {cid: expected_identities(data, cid, watermarks[cid]) for cid in data.condition_ids}
+    assert any(len(market_trades) > 20 for market_trades in expected.values())
+    assert {cid: identities(trades.get(cid, [])) for cid in data.condition_ids} == expected
+
+
+class TradesUntil:
+    """A dataset as it looked at `cutoff`: newer trades have not happened yet."""
+
+    def __init__(self, data, cutoff):
+        self.data = data
+        self.cutoff = cutoff
+
+    def market_rows(self, condition_id):
+        rows = self.data.market_rows(condition_id)
+        return rows[self.data.timestamp[rows] <= self.cutoff]
+
+    def __getattr__(self, name):
+        return getattr(self.data, name)
+
+
+def test_windowed_fetch_matches_history(data):
+    with PolymarketStandIn(data) as standin:
+        trades = fetch(standin.base_url, data.condition_ids, windowed=True)
+        assert standin.stats['/trades']['requests'] > len(data.condition_ids)  # Hot markets were split
+
+    for cid in data.condition_ids:
+        assert identities(trades.get(cid, [])) == expected_identities(data, cid)
+
+
+def test_windowed_fetch_falls_back_when_windows_are_ignored(data, monkeypatch):
+    # The stand-in only reads the real window params; these are ignored like an old API would.
+    monkeypatch.setattr(trade_fetcher, 'WINDOW_START_PARAM', 'ignored_start')
+    monkeypatch.setattr(trade_fetcher, 'WINDOW_END_PARAM', 'ignored_end')
+    failed = set()
+    with PolymarketStandIn(data) as standin:
+        trades = fetch(standin.base_url, data.condition_ids, windowed=True, failed_markets=failed)
+
+    assert not failed
+    for cid in data.condition_ids:
+        assert identities(trades.get(cid, [])) == expected_identities(data, cid)
+
+
+def test_windowed_rerun_reuses_older_windows(tmp_path):
+    data = SyntheticDataset(40000, seed=5)
+    hot = sorted(data.condition_ids, key=lambda cid: -len(data.market_rows(cid)))[:4]
+    view = TradesUntil(data, int(data.timestamp.max()) - 6 * 3600)
+
+    def requests(cache=None):
+        before = standin.stats['/trades']['requests']
+        trades = fetch(standin.base_url, hot, windowed=True, cache=cache)
+        assert {cid: identities(trades[cid]) for cid in hot} == \
+            {cid: sorted(trade_identity(transform_trade(data.raw_trade(int(row)))) for row in view.market_rows(cid))
+             for cid in hot}
+        return standin.stats['/trades']['requests'] - before
+
+    with PolymarketStandIn(view) as standin:
+        requests(PageCache(str(tmp_path)))
+        # The run is retried after six more hours of trades.
+        view.cutoff = int(data.timestamp.max())
+        cold = requests()
+        rerun = requests(PageCache(str(tmp_path)))
+
+    assert rerun < cold / 2
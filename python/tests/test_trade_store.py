@@ -0,0 +1,62 @@
+import pytest
+
+from synthetic_data import SyntheticDataset
+from trade_fetcher import trade_identity, transform_trade
+from trade_store import (TradeStoreWriter, iter_trade_dicts, load_events, load_trades, load_users,
+                         snapshot_complete, write_snapshot)
+
+
+@pytest.fixture(scope='module')
+def data():
+    return SyntheticDataset(3000, seed=17)
+
+
+@pytest.fixture(scope='module')
+def trades(data):
+    return [transform_trade(trade) for trade in data.iter_raw_trades()]
+
+
+def stored_identities(root):
+    return sorted(trade_identity(trade) for page in iter_trade_dicts(root) for trade in page)
+
+
+def test_append_skips_stored_trades_and_stays_complete(data, trades, tmp_path):
+    root = str(tmp_path)
+    first, second = trades[:2000], trades[1500:]
+    assert write_snapshot(root, data.events[:6], first) == 2000
+    assert snapshot_complete(root)
+
+    # A sync's delta overlaps what is stored; only the new trades are written.
+    writer = TradeStoreWriter(root, data.events[4:], chunk_size=300, append=True, complete=False)
+    writer.add(second)
+    assert writer.close() == len(trades) - 2000
+    assert writer.duplicates == 500
+
+    assert snapshot_complete(root)
+    assert stored_identities(root) == sorted(trade_identity(trade) for trade in trades)
+    assert {event['slug'] for event in load_events(root)} == {event['slug'] for event in data.events}
+    assert load_users(root).num_rows == len({trade['from'] for trade in trades})
+
+
+def test_delta_snapshot_is_incomplete(data, trades, tmp_path):
+    root = str(tmp_path)
+    write_snapshot(root, data.events, trades[:100], complete=False)
+    assert not snapshot_complete(root)
+    write_snapshot(root, data.events, trades[100:200], append=True, complete=False)
+    assert not snapshot_complete(root)
+    assert load_trades(root, columns=['hash']).num_rows == 200
+
+    # A full rewrite makes it complete again.
+    write_snapshot(root, data.events, trades)
+    assert snapshot_complete(root)
+    assert load_trades(root, columns=['hash']).num_rows == len(trades)
+
+
+def test_interrupted_write_is_incomplete(data, trades, tmp_path):
+    root = str(tmp_path)
+    write_snapshot(root, data.events, trades[:100])
+    writer = TradeStoreWriter(root, data.events, append=True)
+    writer.add(trades[100:200])
+    assert not snapshot_complete(root)
+    writer.close()
+    assert snapshot_complete(root)
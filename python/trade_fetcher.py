@@ -0,0 +1,533 @@
+"""Concurrent trade fetching from the Polymarket Data API."""
+import asyncio
+import queue
+import threading
+import time
+from typing import List, Dict, Any, Optional, Callable, AsyncIterable, AsyncIterator, Iterable, Iterator, Set, Tuple, Union
+
+from api_client import AsyncApiClient, ApiMetrics
+from page_cache import PageCache
+
+DATA_API_BASE = 'https://data-api.polymarket.com'
+PAGE_SIZE = 500  # Polymarket API hard limit is 500 per request
+
+# Fields that tell the fills of one transaction apart (with the transaction hash).
+FILL_KEY_FIELDS = ['from', 'asset', 'outcome_index', 'side', 'size', 'price']
+
+# Time-window bounds for /trades (unix seconds, inclusive) used by the windowed fetch.
+WINDOW_START_PARAM = 'start'
+WINDOW_END_PARAM = 'end'
+
+# Window splits snap to the coarsest of these steps (day, hour, minute, second) that
+# still splits the window, so older windows keep their bounds when new trades arrive.
+WINDOW_SPLIT_STEPS = [86400, 3600, 60, 1]
+
+
+def transform_trade(trade: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a raw Data API trade into our trade format."""
+    return {
+        'hash': trade.get('transactionHash', ''),
+        'from': trade.get('proxyWallet', ''),
+        'to': '',
+        'side': trade.get('side', ''),
+        'condition_id': trade.get('conditionId', ''),
+        'outcome': trade.get('outcome', ''),
+        'outcome_index': trade.get('outcomeIndex', 0),
+        'size': float(trade.get('size', 0)),
+        'price': float(trade.get('price', 0)),
+        'timestamp': trade.get('timestamp', 0),
+        'asset': trade.get('asset', ''),
+        'market_slug': trade.get('slug', ''),
+        'market_title': trade.get('title', ''),
+        'market_icon': trade.get('icon', ''),
+        'event_slug': trade.get('eventSlug', ''),
+        'user_name': trade.get('name', ''),
+        'user_pseudonym': trade.get('pseudonym', ''),
+        'user_bio': trade.get('bio', ''),
+        'user_profile_image': trade.get('profileImage', ''),
+        'user_profile_image_optimized': trade.get('profileImageOptimized', ''),
+    }
+
+
+def fill_key(trade: Dict[str, Any]) -> str:
+    """Identity of one fill inside a transaction; a single transaction can settle several fills."""
+    return ':'.join(str(trade.get(field, '')) for field in FILL_KEY_FIELDS)
+
+
+def trade_identity(trade: Dict[str, Any]) -> Tuple[str, str]:
+    """(transaction hash, fill key) of a transformed trade."""
+    return trade.get('hash', ''), fill_key(trade)
+
+
+class TokenBucket:
+    """Token-bucket rate limiter shared by all fetch workers."""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Wait until a request token is available and take it."""
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+async def iter_market_pages(client: AsyncApiClient, limiter: TokenBucket, condition_id: str,
+                            max_trades: int = None, base_url: str = DATA_API_BASE,
+                            cache: PageCache = None, since_timestamp: int = None,
+                            failed: Set[str] = None) -> AsyncIterator[List[Dict[str, Any]]]:
+    """Yield the trades of a single market one transformed page at a time.
+
+    Pages already in `cache` are replayed without touching the network, so an
+    interrupted run only requests the pages it did not get to.
+
+    With `since_timestamp` only trades at or after that high-water mark are
+    returned. The API lists newest trades first, so paging stops at the first
+    older trade. Those pages shift as new trades arrive, so they bypass the
+    cache. `max_trades` does not apply either: the watermark moves to the
+    newest trade, so a capped delta would lose the rest for good.
+
+    A market whose fetch stops on an error is added to `failed`, so its
+    watermark is not advanced past the trades that were never fetched.
+    """
+    url = f'{base_url}/trades'
+    trade_count = 0
+    offset = 0
+
+    if since_timestamp is not None:
+        cache = None
+        max_trades = None
+
+    try:
+        while True:
+            params = {
+                'limit': PAGE_SIZE,
+                'offset': offset,
+                'takerOnly': 'true',
+                'market': condition_id,
+            }
+
+            trades = cache.get(url, params) if cache else None
+
+            if trades is None:
+                await limiter.acquire()
+                response = await client.get(url, params=params)
+
+                if response.status_code != 200:
+                    # Retries are exhausted; the next run replays the cached pages and requests this one again.
+                    print(f'    ⚠ Error: HTTP {response.status_code} for market {condition_id[:12]}... '
+                          f'after retries, stopped at offset {offset}')
+                    if failed is not None:
+                        failed.add(condition_id)
+                    break
+
+                trades = response.json()
+
+                if cache:
+                    cache.put(url, params, trades)
+
+            reached_watermark = False
+            trades_to_keep = trades
+            if since_timestamp is not None:
+                trades_to_keep = [trade for trade in trades if int(trade.get('timestamp') or 0) >= since_timestamp]
+                reached_watermark = len(trades_to_keep) < len(trades)
+
+            # Stop on an empty page, the max trades limit, a short page (end of data) or the watermark.
+            reached_limit = bool(max_trades) and trade_count + len(trades_to_keep) >= max_trades
+            done = len(trades) == 0 or reached_limit or len(trades) < PAGE_SIZE or reached_watermark
+
+            if reached_limit:
+                trades_to_keep = trades_to_keep[:max_trades - trade_count]
+
+            if trades_to_keep:
+                trade_count += len(trades_to_keep)
+                yield [transform_trade(trade) for trade in trades_to_keep]
+
+            if done:
+                break
+
+            offset += len(trades)
+
+    except Exception as e:
+        print(f'    ⚠ Error for market {condition_id[:12]}...: {e}')
+        if failed is not None:
+            failed.add(condition_id)
+
+
+def _split_window(window_start: int, window_end: int, oldest: int) -> Tuple[Tuple[int, int], Tuple[int, int]]:
+    """Halves of a full window whose trades after `oldest` are complete, on the coarsest step that splits it.
+
+    The upper half ends at the end of `oldest`'s step instead of at `oldest`,
+    so its bounds stay put while new trades move `oldest` within that step.
+    """
+    middle = (window_start + oldest) // 2
+    for step in WINDOW_SPLIT_STEPS:
+        boundary = middle - middle % step
+        if window_start < boundary <= oldest:
+            upper = min(window_end, oldest - oldest % step + step - 1)
+            return (window_start, boundary - 1), (boundary, upper)
+    return (window_start, window_start), (window_start + 1, oldest)
+
+
+async def iter_market_windows(client: AsyncApiClient, limiter: TokenBucket, condition_id: str,
+                              base_url: str = DATA_API_BASE, cache: PageCache = None,
+                              since_timestamp: int = None, until_timestamp: int = None,
+                              failed: Set[str] = None) -> AsyncIterator[List[Dict[str, Any]]]:
+    """Yield the complete trade history of a market, sliced into timestamp windows.
+
+    Each window request returns the newest trades inside it. When a page
+    comes back full, everything newer than its oldest trade is complete, and
+    the rest of the window is split in two halves that are fetched
+    concurrently. A second with more than a page of trades falls back to
+    offset paging inside that second. No offset ever gets deep, so hot
+    markets come back in bounded time without the per-market cap.
+
+    Windows overlap at their edges, so trades are deduplicated on
+    transaction hash plus fill identity. Split points snap to whole days
+    (then hours, minutes, seconds), so a window's bounds don't depend on the
+    newest trades: a rerun after new trades arrived requests the same older
+    windows and finds them in `cache`. Only windows ending before
+    `until_timestamp` are cached. A market with a failed window is added to
+    `failed`.
+
+    Trades outside the requested window are dropped. A full page that
+    reaches outside its window means the server ignores the window bounds;
+    splitting would then never shrink the page, so the market is fetched
+    with offset paging (`iter_market_pages`) instead.
+    """
+    url = f'{base_url}/trades'
+    start = int(since_timestamp or 0)
+    end = int(until_timestamp or time.time())
+    pages = asyncio.Queue(maxsize=8)
+    finished = object()
+    seen: Set[Tuple[str, str]] = set()
+    windows_ignored = False
+
+    if since_timestamp is not None:
+        cache = None
+
+    async def get_page(window_start: int, window_end: int, offset: int = 0) -> Optional[List[Dict[str, Any]]]:
+        params = {
+            'limit': PAGE_SIZE,
+            'offset': offset,
+            'takerOnly': 'true',
+            'market': condition_id,
+            WINDOW_START_PARAM: window_start,
+            WINDOW_END_PARAM: window_end,
+        }
+        # The newest window is still filling up, so only closed windows are cached.
+        use_cache = cache is not None and window_end < end
+        trades = cache.get(url, params) if use_cache else None
+
+        if trades is None:
+            await limiter.acquire()
+            response = await client.get(url, params=params)
+
+            if response.status_code != 200:
+                print(f'    ⚠ Error: HTTP {response.status_code} for market {condition_id[:12]}... '
+                      f'window {window_start}-{window_end}')
+                if failed is not None:
+                    failed.add(condition_id)
+                return None
+
+            trades = response.json()
+            if use_cache:
+                cache.put(url, params, trades)
+
+        return trades
+
+    async def emit(trades: Iterable[Dict[str, Any]]):
+        page = []
+        for trade in trades:
+            identity = trade_identity(trade)
+            if identity not in seen:
+                seen.add(identity)
+                page.append(trade)
+        if page:
+            await pages.put(page)
+
+    async def fetch_second(second: int, offset: int):
+        # More than a page of trades in one second: page by offset inside it.
+        nonlocal windows_ignored
+        while not windows_ignored:
+            trades = await get_page(second, second, offset)
+            if not trades:
+                return
+            kept = in_window(trades, second, second)
+            await emit(map(transform_trade, kept))
+            if len(trades) < PAGE_SIZE:
+                return
+            if len(kept) < len(trades):
+                windows_ignored = True
+                return
+            offset += len(trades)
+
+    def in_window(trades: List[Dict[str, Any]], window_start: int, window_end: int) -> List[Dict[str, Any]]:
+        return [trade for trade in trades if window_start <= int(trade.get('timestamp') or 0) <= window_end]
+
+    async def fetch_window(window_start: int, window_end: int):
+        nonlocal windows_ignored
+        if window_start > window_end or windows_ignored:
+            return
+
+        trades = await get_page(window_start, window_end)
+        if not trades:
+            return
+        kept = in_window(trades, window_start, window_end)
+        await emit(map(transform_trade, kept))
+
+        if len(trades) < PAGE_SIZE:
+            return  # The whole window fit in one page.
+        if len(kept) < len(trades):
+            windows_ignored = True  # A full page from outside the window: the bounds are ignored.
+            return
+
+        timestamps = [int(trade.get('timestamp') or 0) for trade in trades]
+        oldest, newest = min(timestamps), max(timestamps)
+
+        if oldest == newest:
+            # The page is a single second; the rest of that second needs offsets.
+            await asyncio.gather(fetch_second(oldest, len(trades)),
+                                 fetch_window(window_start, oldest - 1))
+            return
+
+        # Trades newer than `oldest` are complete; split what's left (including `oldest` itself).
+        await asyncio.gather(*(fetch_window(*half) for half in _split_window(window_start, window_end, oldest)))
+
+    async def run():
+        try:
+            await fetch_window(start, end)
+            if windows_ignored:
+                print(f'    ℹ Market {condition_id[:12]}... ignores time windows, falling back to offset paging')
+                async for page in iter_market_pages(client, limiter, condition_id, None, base_url, cache,
+                                                    since_timestamp=since_timestamp, failed=failed):
+                    await emit(trade for trade in page if int(trade.get('timestamp') or 0) <= end)
+        except Exception as e:
+            print(f'    ⚠ Error for market {condition_id[:12]}...: {e}')
+            if failed is not None:
+                failed.add(condition_id)
+        finally:
+            await pages.put(finished)
+
+    task = asyncio.create_task(run())
+    try:
+        while True:
+            page = await pages.get()
+            if page is finished:
+                break
+            yield page
+    finally:
+        if not task.done():
+            task.cancel()
+
+
+async def fetch_market_trades(client: AsyncApiClient, limiter: TokenBucket, condition_id: str,
+                              max_trades: int = None, base_url: str = DATA_API_BASE,
+                              cache: PageCache = None, since_timestamp: int = None, windowed: bool = False,
+                              failed: Set[str] = None) -> List[Dict[str, Any]]:
+    """Fetch all trades of a single market (see `iter_market_pages` / `iter_market_windows`)."""
+    market_trades = []
+    async for page in _market_pages(client, limiter, condition_id, max_trades, base_url,
+                                    cache, since_timestamp, windowed, failed):
+        market_trades.extend(page)
+    return market_trades
+
+
+def _market_pages(client, limiter, condition_id, max_trades, base_url, cache, since_timestamp,
+                  windowed, failed=None) -> AsyncIterator[List[Dict[str, Any]]]:
+    if windowed:
+        return iter_market_windows(client, limiter, condition_id, base_url, cache, since_timestamp, failed=failed)
+    return iter_market_pages(client, limiter, condition_id, max_trades, base_url, cache, since_timestamp, failed)
+
+
+# A fixed list of markets, or an async iterator that is still discovering them (e.g. EventCrawler).
+MarketSource = Union[List[str], AsyncIterable[str]]
+
+
+def _worker_count(condition_ids: MarketSource, concurrency: int) -> int:
+    if hasattr(condition_ids, '__aiter__'):
+        return concurrency
+    return min(concurrency, len(condition_ids)) or 1
+
+
+async def _feed_markets(condition_ids: MarketSource, pending: asyncio.Queue, workers: int):
+    """Queue the markets for the workers, then one stop marker per worker."""
+    try:
+        if hasattr(condition_ids, '__aiter__'):
+            async for condition_id in condition_ids:
+                await pending.put(condition_id)
+        else:
+            for condition_id in condition_ids:
+                await pending.put(condition_id)
+    finally:
+        for _ in range(workers):
+            await pending.put(None)
+
+
+async def fetch_markets_concurrently(condition_ids: MarketSource, max_trades: int = None, concurrency: int = 16,
+                                     requests_per_second: float = 10.0, base_url: str = DATA_API_BASE,
+                                     cache: PageCache = None, watermarks: Dict[str, int] = None,
+                                     on_market_done: Callable[[str, List[Dict[str, Any]]], None] = None,
+                                     keep_trades: bool = True, windowed: bool = False, http2: bool = True,
+                                     max_retries: int = 5, metrics: ApiMetrics = None,
+                                     failed_markets: Set[str] = None) -> Dict[str, List[Dict[str, Any]]]:
+    """Fetch trades for many markets at once over a pooled HTTP client.
+
+    All workers share one token bucket, so the total request rate stays under
+    `requests_per_second` no matter how many markets are in flight. Markets
+    with an entry in `watermarks` only return trades newer than it.
+    `windowed=True` fetches complete histories by time window instead of by
+    offset (`max_trades` does not apply).
+
+    `condition_ids` may also be an async iterator (e.g.
+    `EventCrawler.iter_condition_ids()`); markets are then fetched as they
+    are discovered.
+
+    With `keep_trades=False` each market's trades are only handed to
+    `on_market_done` (e.g. to pack them into a TradeTable) and the returned
+    dict stays empty. Markets whose fetch ended on an error are added to
+    `failed_markets`.
+    """
+    watermarks = watermarks or {}
+    limiter = TokenBucket(requests_per_second)
+    workers = _worker_count(condition_ids, concurrency)
+    pending = asyncio.Queue(maxsize=2 * workers)
+
+    trades_by_market = {}
+    async with AsyncApiClient(concurrency, http2, max_retries, metrics=metrics) as client:
+
+        async def worker():
+            while True:
+                condition_id = await pending.get()
+                if condition_id is None:
+                    return
+
+                trades = await fetch_market_trades(client, limiter, condition_id, max_trades, base_url,
+                                                   cache, watermarks.get(condition_id), windowed,
+                                                   failed_markets)
+                if keep_trades:
+                    trades_by_market[condition_id] = trades
+
+                if on_market_done:
+                    on_market_done(condition_id, trades)
+
+        await asyncio.gather(_feed_markets(condition_ids, pending, workers), *(worker() for _ in range(workers)))
+
+    return trades_by_market
+
+
+def stream_trades(condition_ids: MarketSource, max_trades: int = None, concurrency: int = 16,
+                  requests_per_second: float = 10.0, base_url: str = DATA_API_BASE,
+                  cache: PageCache = None, watermarks: Dict[str, int] = None, max_buffered_pages: int = 32,
+                  on_market_done: Callable[[str, int], None] = None,
+                  windowed: bool = False, http2: bool = True, max_retries: int = 5,
+                  metrics: ApiMetrics = None, market_batches: bool = False,
+                  failed_markets: Set[str] = None) -> Iterator[List[Dict[str, Any]]]:
+    """Yield trade pages as they arrive, without collecting all trades in memory.
+
+    The fetch engine runs on a background thread and hands pages over through
+    a bounded queue. When the consumer falls behind, the fetch workers block,
+    so at most `max_buffered_pages` pages (plus one per worker) are held.
+    An async iterator of condition_ids is consumed on that thread's loop.
+
+    With `market_batches=True` each item is all trades of one market instead
+    of a single page (for import_trade_pipeline); the queue bound then counts
+    markets. A market is added to `failed_markets` before `on_market_done`
+    runs for it and, with `market_batches`, before its batch is queued.
+    """
+    pages = queue.Queue(maxsize=max_buffered_pages)
+    finished = object()
+    watermarks = watermarks or {}
+
+    async def produce():
+        limiter = TokenBucket(requests_per_second)
+        workers = _worker_count(condition_ids, concurrency)
+        pending = asyncio.Queue(maxsize=2 * workers)
+
+        loop = asyncio.get_running_loop()
+
+        async with AsyncApiClient(concurrency, http2, max_retries, metrics=metrics) as client:
+
+            async def worker():
+                while True:
+                    condition_id = await pending.get()
+                    if condition_id is None:
+                        return
+
+                    trade_count = 0
+                    market_trades = []
+                    async for page in _market_pages(client, limiter, condition_id, max_trades, base_url,
+                                                    cache, watermarks.get(condition_id), windowed,
+                                                    failed_markets):
+                        trade_count += len(page)
+                        if market_batches:
+                            market_trades.extend(page)
+                        else:
+                            # Blocks (off the event loop) while the queue is full.
+                            await loop.run_in_executor(None, pages.put, page)
+
+                    if market_trades:
+                        await loop.run_in_executor(None, pages.put, market_trades)
+
+                    if on_market_done:
+                        on_market_done(condition_id, trade_count)
+
+            await asyncio.gather(_feed_markets(condition_ids, pending, workers),
+                                 *(worker() for _ in range(workers)))
+
+    def run():
+        try:
+            asyncio.run(produce())
+        except BaseException as e:
+            pages.put(e)
+        pages.put(finished)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+
+    while True:
+        page = pages.get()
+        if page is finished:
+            break
+        if isinstance(page, BaseException):
+            raise page
+        yield page
+
+    thread.join()
+
+
+def run_async(coro):
+    """Run a coroutine to completion, also from inside a running event loop (Jupyter/Colab)."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+
+    # A notebook kernel already runs a loop, so run ours on a separate thread.
+    outcome = {}
+
+    def runner():
+        try:
+            outcome['result'] = asyncio.run(coro)
+        except BaseException as e:
+            outcome['error'] = e
+
+    thread = threading.Thread(target=runner)
+    thread.start()
+    thread.join()
+
+    if 'error' in outcome:
+        raise outcome['error']
+    return outcome['result']
@@ -0,0 +1,265 @@
+"""Columnar trade snapshots (Arrow IPC or Parquet), partitioned by category and date."""
+import hashlib
+import json
+import os
+import shutil
+import time
+from datetime import datetime, timezone
+from typing import List, Dict, Any, Iterable, Iterator, Optional
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.fs as pafs
+
+from trade_fetcher import trade_identity
+
+# String columns that repeat on every row are dictionary-encoded.
+TRADE_SCHEMA = pa.schema([
+    ('hash', pa.string()),
+    ('from', pa.dictionary(pa.int32(), pa.string())),
+    ('side', pa.dictionary(pa.int8(), pa.string())),
+    ('condition_id', pa.dictionary(pa.int32(), pa.string())),
+    ('outcome', pa.dictionary(pa.int32(), pa.string())),
+    ('outcome_index', pa.int32()),
+    ('size', pa.float64()),
+    ('price', pa.float64()),
+    ('timestamp', pa.int64()),
+    ('asset', pa.dictionary(pa.int32(), pa.string())),
+    ('market_slug', pa.dictionary(pa.int32(), pa.string())),
+    ('market_title', pa.dictionary(pa.int32(), pa.string())),
+    ('market_icon', pa.dictionary(pa.int32(), pa.string())),
+    ('event_slug', pa.dictionary(pa.int32(), pa.string())),
+    ('category', pa.string()),
+    ('date', pa.string()),
+])
+
+# Profile fields are stored once per user instead of once per trade.
+USER_FIELDS = ['user_name', 'user_pseudonym', 'user_bio', 'user_profile_image', 'user_profile_image_optimized']
+
+PARTITIONING = ['category', 'date']
+
+# Snapshot columns a trade's fill key is computed from (trade_fetcher.FILL_KEY_FIELDS).
+FILL_KEY_COLUMNS = ['hash', 'from', 'asset', 'outcome_index', 'side', 'size', 'price']
+FORMATS = {'arrow': 'ipc', 'parquet': 'parquet'}
+
+
+def _trade_date(timestamp: Any) -> str:
+    try:
+        return datetime.fromtimestamp(int(timestamp), tz=timezone.utc).strftime('%Y-%m-%d')
+    except (TypeError, ValueError, OverflowError, OSError):
+        return '1970-01-01'
+
+
+def market_categories(events: List[Dict[str, Any]]) -> Dict[str, str]:
+    """Map each condition_id to its event's category."""
+    categories = {}
+    for event in events:
+        for market in event.get('markets', []):
+            if market.get('conditionId'):
+                categories[market['conditionId']] = event.get('category', 'Unknown')
+    return categories
+
+
+def _identity_digest(trade: Dict[str, Any]) -> bytes:
+    """16-byte digest of a trade's (transaction hash, fill key), like TradeDeduplicator."""
+    transaction_hash, key = trade_identity(trade)
+    return hashlib.blake2b(f'{transaction_hash}|{key}'.encode('utf-8'), digest_size=16).digest()
+
+
+def _merge_events(previous: List[Dict[str, Any]], events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Earlier events plus the current ones; an event fetched again replaces its old copy."""
+    merged = {event.get('slug'): event for event in previous}
+    merged.update((event.get('slug'), event) for event in events)
+    return list(merged.values())
+
+
+def _write_manifest(root: str, complete: bool):
+    with open(os.path.join(root, 'snapshot.json'), 'w', encoding='utf-8') as f:
+        json.dump({'complete': complete}, f)
+
+
+def snapshot_complete(root: str) -> bool:
+    """Whether the snapshot holds every trade of its markets, not just a sync's delta.
+
+    Snapshots from before this flag existed may be deltas and count as incomplete.
+    """
+    try:
+        with open(os.path.join(root, 'snapshot.json'), 'r', encoding='utf-8') as f:
+            return bool(json.load(f).get('complete'))
+    except (OSError, ValueError):
+        return False
+
+
+class TradeStoreWriter:
+    """Append trades to a partitioned columnar snapshot in fixed-size chunks.
+
+    With `append=True` an existing snapshot is extended instead of replaced:
+    trades already in it (same transaction hash and fill key) are skipped,
+    events are merged by slug and the user table keeps earlier traders. An
+    incremental sync only fetches new trades, so it must append.
+
+    `complete` says the trades written hold every trade of the markets (a
+    full fetch). A snapshot stays complete when a sync appends to a complete
+    one; it is flagged incomplete until `close()`, so an interrupted write
+    never counts as complete (see `snapshot_complete`).
+    """
+
+    def __init__(self, root: str, events: List[Dict[str, Any]], file_format: str = 'arrow',
+                 chunk_size: int = 100000, append: bool = False, complete: bool = True):
+        self.root = root
+        self.trades_dir = os.path.join(root, 'trades')
+        self.format = FORMATS[file_format]
+        self.extension = 'arrow' if file_format == 'arrow' else 'parquet'
+        self.chunk_size = chunk_size
+        self.columns = {field.name: [] for field in TRADE_SCHEMA}
+        self.users = {}
+        self.seen = set()
+        self.duplicates = 0
+        self.chunk_index = 0
+        self.row_count = 0
+        # Keeps this run's files apart from the chunks of earlier runs.
+        self.run_id = int(time.time() * 1000)
+
+        if append and os.path.isdir(self.trades_dir):
+            self.complete = complete or snapshot_complete(root)
+            self._load_existing()
+            events = _merge_events(load_events(root), events)
+        else:
+            self.complete = complete
+            shutil.rmtree(self.trades_dir, ignore_errors=True)
+        self.categories = market_categories(events)
+
+        os.makedirs(root, exist_ok=True)
+        _write_manifest(root, complete=False)
+        with open(os.path.join(root, 'events.json'), 'w', encoding='utf-8') as f:
+            json.dump(events, f)
+
+    def _load_existing(self):
+        """Remember the identities and users already in the snapshot."""
+        columns = ['hash'] + [name for name in FILL_KEY_COLUMNS if name != 'hash']
+        for batch in trade_dataset(self.root).to_batches(columns=columns):
+            for trade in batch.to_pylist():
+                self.seen.add(_identity_digest(trade))
+        if os.path.exists(os.path.join(self.root, 'users.arrow')):
+            self.users = {row['address']: row for row in load_users(self.root).to_pylist()}
+
+    def add(self, trades: Iterable[Dict[str, Any]]):
+        """Buffer trades and flush a partition chunk whenever it is full."""
+        for trade in trades:
+            digest = _identity_digest(trade)
+            if digest in self.seen:
+                self.duplicates += 1
+                continue
+            self.seen.add(digest)
+
+            for name, values in self.columns.items():
+                if name == 'category':
+                    values.append(self.categories.get(trade.get('condition_id'), 'Unknown'))
+                elif name == 'date':
+                    values.append(_trade_date(trade.get('timestamp')))
+                else:
+                    values.append(trade.get(name))
+
+            address = trade.get('from')
+            if address and address not in self.users:
+                self.users[address] = {'address': address, **{field: trade.get(field, '') for field in USER_FIELDS}}
+
+            if len(self.columns['hash']) >= self.chunk_size:
+                self.flush()
+
+    def wrap(self, trade_pages: Iterable[List[Dict[str, Any]]]) -> Iterator[List[Dict[str, Any]]]:
+        """Pass a page stream through unchanged while writing it to the snapshot."""
+        for page in trade_pages:
+            self.add(page)
+            yield page
+        self.close()
+
+    def flush(self):
+        if not self.columns['hash']:
+            return
+
+        table = pa.table({name: pa.array(values, type=TRADE_SCHEMA.field(name).type)
+                          for name, values in self.columns.items()}, schema=TRADE_SCHEMA)
+        # Grouped by partition, every partition of the chunk is written as one file. A chunk
+        # can span more than pyarrow's default 1024 partitions (categories x days of history),
+        # but never more partitions than rows.
+        table = table.sort_by([(name, 'ascending') for name in PARTITIONING])
+        ds.write_dataset(
+            table,
+            self.trades_dir,
+            format=self.format,
+            partitioning=PARTITIONING,
+            partitioning_flavor='hive',
+            basename_template=f'part-{self.run_id}-{self.chunk_index}-{{i}}.{self.extension}',
+            existing_data_behavior='overwrite_or_ignore',
+            max_partitions=max(table.num_rows, 1024),
+        )
+
+        self.row_count += table.num_rows
+        self.chunk_index += 1
+        self.columns = {name: [] for name in self.columns}
+
+    def close(self) -> int:
+        """Flush the last chunk and write the user table; returns the number of trades."""
+        self.flush()
+
+        users = pa.Table.from_pylist(list(self.users.values()),
+                                     schema=pa.schema([('address', pa.string())] + [(f, pa.string()) for f in USER_FIELDS]))
+        with pa.OSFile(os.path.join(self.root, 'users.arrow'), 'wb') as sink:
+            with pa.ipc.new_file(sink, users.schema) as writer:
+                writer.write_table(users)
+
+        _write_manifest(self.root, self.complete)
+        return self.row_count
+
+
+def write_snapshot(root: str, events: List[Dict[str, Any]], trades: Iterable[Dict[str, Any]],
+                   file_format: str = 'arrow', append: bool = False, complete: bool = True) -> int:
+    """Write events and trades as a snapshot (or add them to it); returns the number of trades written."""
+    writer = TradeStoreWriter(root, events, file_format, append=append, complete=complete)
+    writer.add(trades)
+    return writer.close()
+
+
+def trade_dataset(root: str) -> ds.Dataset:
+    """Open the trade partitions lazily (memory-mapped for Arrow IPC files)."""
+    trades_dir = os.path.join(root, 'trades')
+    file_format = 'ipc' if any(name.endswith('.arrow') for _, _, names in os.walk(trades_dir) for name in names) else 'parquet'
+
+    return ds.dataset(
+        trades_dir,
+        format=file_format,
+        partitioning=ds.HivePartitioning.discover(infer_dictionary=True),
+        filesystem=pafs.LocalFileSystem(use_mmap=True),
+    )
+
+
+def load_trades(root: str, columns: Optional[List[str]] = None, row_filter: Optional[ds.Expression] = None) -> pa.Table:
+    """Read trades as an Arrow table. Uncompressed Arrow IPC partitions are read zero-copy."""
+    return trade_dataset(root).to_table(columns=columns, filter=row_filter)
+
+
+def load_users(root: str) -> pa.Table:
+    source = pa.memory_map(os.path.join(root, 'users.arrow'), 'r')
+    return pa.ipc.open_file(source).read_all()
+
+
+def load_events(root: str) -> List[Dict[str, Any]]:
+    with open(os.path.join(root, 'events.json'), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def iter_trade_dicts(root: str, batch_size: int = 5000) -> Iterator[List[Dict[str, Any]]]:
+    """Yield pages of trades in the step-6 dict format, rebuilt from a snapshot."""
+    profiles = {row['address']: row for row in load_users(root).to_pylist()}
+    columns = [name for name in TRADE_SCHEMA.names if name not in PARTITIONING]
+
+    for batch in trade_dataset(root).to_batches(columns=columns, batch_size=batch_size):
+        page = []
+        for row in batch.to_pylist():
+            profile = profiles.get(row['from'], {})
+            row['to'] = ''
+            for field in USER_FIELDS:
+                row[field] = profile.get(field, '')
+            page.append(row)
+        yield page
@@ -0,0 +1,198 @@
+"""Compact, array-backed trade storage that still iterates as step-6 trade dicts."""
+from array import array
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Set, Union
+
+# Per-market and per-user fields are stored once in lookup tables, not per trade.
+MARKET_FIELDS = ['market_slug', 'market_title', 'market_icon', 'event_slug']
+USER_FIELDS = ['user_name', 'user_pseudonym', 'user_bio', 'user_profile_image', 'user_profile_image_optimized']
+
+HASH_BYTES = 32
+
+
+class StringTable:
+    """Dictionary encoding: each distinct string is stored once and referenced by code."""
+
+    __slots__ = ('values', 'codes')
+
+    def __init__(self):
+        self.values = []
+        self.codes = {}
+
+    def code(self, value: Optional[str]) -> int:
+        value = value if value is not None else ''
+        code = self.codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self.codes[value] = code
+            self.values.append(value)
+        return code
+
+    def __getitem__(self, code: int) -> str:
+        return self.values[code]
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+def _int(value: Any) -> int:
+    try:
+        return int(value or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _float(value: Any) -> float:
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class TradeTable:
+    """Trades as parallel typed arrays with dictionary-encoded strings.
+
+    Transaction hashes are packed as 32 raw bytes, numbers live in `array`
+    columns and every repeated string (condition_id, outcome, side, asset)
+    is a code into a StringTable. Market metadata and user profiles are kept
+    once per market/address (first trade wins, like collect_user_profiles).
+
+    Iterating or indexing yields the same dicts transform_trade builds, so
+    the table can stand in for a list of trades. Trades need roughly a
+    tenth of the memory of the dict list.
+    """
+
+    def __init__(self, trades: Iterable[Dict[str, Any]] = ()):
+        self.hashes = bytearray()
+        self.odd_hashes = {}  # Row -> hash for hashes that aren't 0x + 64 hex digits.
+        self.trader = array('i')
+        self.market = array('i')
+        self.side = array('b')
+        self.outcome = array('i')
+        self.outcome_index = array('h')
+        self.asset = array('i')
+        self.size = array('d')
+        self.price = array('d')
+        self.timestamp = array('q')
+
+        self.traders = StringTable()
+        self.markets = StringTable()
+        self.sides = StringTable()
+        self.outcomes = StringTable()
+        self.assets = StringTable()
+
+        self.market_info = []  # Per market code: tuple of MARKET_FIELDS.
+        self.user_profiles = {}  # Address -> tuple of USER_FIELDS.
+
+        self.extend(trades)
+
+    def append(self, trade: Dict[str, Any]):
+        row = len(self.timestamp)
+        tx_hash = trade.get('hash') or ''
+        packed = None
+        if len(tx_hash) == 2 + 2 * HASH_BYTES and tx_hash.startswith('0x'):
+            try:
+                packed = bytes.fromhex(tx_hash[2:])
+            except ValueError:
+                pass
+            # Only lowercase hex survives the round trip unchanged.
+            if packed is not None and packed.hex() != tx_hash[2:]:
+                packed = None
+        if packed is None:
+            self.odd_hashes[row] = tx_hash
+            packed = bytes(HASH_BYTES)
+        self.hashes += packed
+
+        address = trade.get('from') or ''
+        self.trader.append(self.traders.code(address))
+        if address not in self.user_profiles:
+            self.user_profiles[address] = tuple(trade.get(field) or '' for field in USER_FIELDS)
+
+        market = self.markets.code(trade.get('condition_id'))
+        if market == len(self.market_info):
+            self.market_info.append(tuple(trade.get(field) or '' for field in MARKET_FIELDS))
+        self.market.append(market)
+
+        self.side.append(self.sides.code(trade.get('side')))
+        self.outcome.append(self.outcomes.code(trade.get('outcome')))
+        self.outcome_index.append(_int(trade.get('outcome_index')))
+        self.asset.append(self.assets.code(trade.get('asset')))
+        self.size.append(_float(trade.get('size')))
+        self.price.append(_float(trade.get('price')))
+        self.timestamp.append(_int(trade.get('timestamp')))
+
+    def extend(self, trades: Iterable[Dict[str, Any]]):
+        for trade in trades:
+            self.append(trade)
+
+    def __len__(self) -> int:
+        return len(self.timestamp)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for row in range(len(self)):
+            yield self._row(row)
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[Dict[str, Any], List[Dict[str, Any]]]:
+        if isinstance(index, slice):
+            return [self._row(row) for row in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('trade index out of range')
+        return self._row(index)
+
+    def tx_hash(self, row: int) -> str:
+        if row in self.odd_hashes:
+            return self.odd_hashes[row]
+        return '0x' + self.hashes[row * HASH_BYTES:(row + 1) * HASH_BYTES].hex()
+
+    def _row(self, row: int) -> Dict[str, Any]:
+        """Rebuild the transform_trade dict of one trade."""
+        address = self.traders[self.trader[row]]
+        market = self.market[row]
+        market_slug, market_title, market_icon, event_slug = self.market_info[market]
+        user_name, user_pseudonym, user_bio, user_profile_image, user_profile_image_optimized = \
+            self.user_profiles[address]
+
+        return {
+            'hash': self.tx_hash(row),
+            'from': address,
+            'to': '',
+            'side': self.sides[self.side[row]],
+            'condition_id': self.markets[market],
+            'outcome': self.outcomes[self.outcome[row]],
+            'outcome_index': self.outcome_index[row],
+            'size': self.size[row],
+            'price': self.price[row],
+            'timestamp': self.timestamp[row],
+            'asset': self.assets[self.asset[row]],
+            'market_slug': market_slug,
+            'market_title': market_title,
+            'market_icon': market_icon,
+            'event_slug': event_slug,
+            'user_name': user_name,
+            'user_pseudonym': user_pseudonym,
+            'user_bio': user_bio,
+            'user_profile_image': user_profile_image,
+            'user_profile_image_optimized': user_profile_image_optimized,
+        }
+
+    # ------------------------------------------------------------------------
+    # Column-level helpers (no per-trade dicts)
+    # ------------------------------------------------------------------------
+
+    def condition_ids(self) -> Set[str]:
+        """Markets that have at least one trade."""
+        return {value for value in self.markets.values if value}
+
+    def addresses(self) -> Set[str]:
+        """Distinct trader addresses."""
+        return {value for value in self.traders.values if value}
+
+    def total_size(self) -> float:
+        return sum(self.size)
+
+    def nbytes(self) -> int:
+        """Approximate memory held by the trade columns (excluding lookup tables)."""
+        columns = [self.trader, self.market, self.side, self.outcome, self.outcome_index,
+                   self.asset, self.size, self.price, self.timestamp]
+        return len(self.hashes) + sum(column.itemsize * len(column) for column in columns)
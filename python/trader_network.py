@@ -0,0 +1,212 @@
+"""Shared-market counts between every pair of traders, from a sparse trader×market matrix (getTraderNetwork at full scale)."""
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+
+# Trader-market-trader products per block; bounds the memory of one block's product.
+DEFAULT_BLOCK_PAIRS = 20_000_000
+
+BATCH_SIZE = 5000
+
+NETWORK_SCHEMA = [
+    'CREATE INDEX co_trades_shared_markets IF NOT EXISTS FOR ()-[r:CO_TRADES_WITH]-() ON (r.shared_markets)',
+]
+
+CLEAR_CO_TRADES_QUERY = '''
+    MATCH ()-[r:CO_TRADES_WITH]->()
+    CALL { WITH r DELETE r } IN TRANSACTIONS OF 10000 ROWS
+'''
+
+# Edges point from the lower to the higher address, like `u1.address < u2.address` in the API.
+CO_TRADES_QUERY = '''
+    UNWIND $edges as edge
+    MATCH (u1:User {address: edge.trader1})
+    MATCH (u2:User {address: edge.trader2})
+    MERGE (u1)-[r:CO_TRADES_WITH]->(u2)
+    SET r.shared_markets = edge.shared_markets,
+        r.jaccard = edge.jaccard
+'''
+
+
+class TraderNetwork:
+    """Binary trader×market incidence matrix over all linked trades.
+
+    Row i of `incidence @ incidence.T` holds trader i's shared-market count
+    with every other trader. It is computed for a block of traders at a
+    time, with blocks sized so their product stays under `block_pairs`
+    entries, and each block is cut down to its top-k neighbors right away,
+    so the full product never exists. Blocks run on a thread pool (scipy's
+    sparse kernels release the GIL).
+
+    Markets traded by more than `max_market_traders` traders can be left
+    out: a market with n traders alone adds n² pairs.
+    """
+
+    def __init__(self, trader: np.ndarray, market: np.ndarray, trader_addresses: List[str], n_markets: int = None,
+                 users: Optional[Dict[str, Dict[str, Any]]] = None, max_market_traders: int = None):
+        n_traders = len(trader_addresses)
+        if n_markets is None:
+            n_markets = int(market.max()) + 1 if len(market) else 0
+        self.trader_addresses = trader_addresses
+        self.users = users or {}
+        self.trade_count = np.bincount(trader, minlength=n_traders)
+
+        incidence = sp.csr_matrix((np.ones(len(trader), dtype=np.int32), (trader, market)),
+                                  shape=(n_traders, n_markets))
+        incidence.sum_duplicates()
+        incidence.data[:] = 1
+
+        self.market_traders = np.bincount(incidence.indices, minlength=n_markets)
+        if max_market_traders is not None:
+            self.excluded_markets = np.nonzero(self.market_traders > max_market_traders)[0]
+            incidence = incidence[:, np.nonzero(self.market_traders <= max_market_traders)[0]]
+            self.market_traders = np.bincount(incidence.indices, minlength=incidence.shape[1])
+        else:
+            self.excluded_markets = np.arange(0)
+
+        self.incidence = incidence
+        self.incidence_t = incidence.T.tocsr()
+        self.market_count = np.diff(incidence.indptr)
+
+        # Position of each trader in address order, to orient pairs like the API.
+        self.address_rank = np.empty(n_traders, dtype=np.int64)
+        self.address_rank[np.argsort(np.array(trader_addresses, dtype=object), kind='stable')] = np.arange(n_traders)
+
+    @classmethod
+    def from_analytics(cls, analytics, max_market_traders: int = None) -> 'TraderNetwork':
+        """Reuse the trades already loaded by a ContrarianAnalytics engine."""
+        return cls(analytics.trader, analytics.market, analytics.trader_addresses, len(analytics.market_ids),
+                   analytics.users, max_market_traders)
+
+    @classmethod
+    def from_snapshot(cls, root: str, max_market_traders: int = None) -> 'TraderNetwork':
+        from contrarian_analytics import ContrarianAnalytics
+
+        return cls.from_analytics(ContrarianAnalytics.from_snapshot(root), max_market_traders)
+
+    @property
+    def n_traders(self) -> int:
+        return self.incidence.shape[0]
+
+    # ------------------------------------------------------------------------
+    # Sparse products
+    # ------------------------------------------------------------------------
+
+    def blocks(self, block_pairs: int = DEFAULT_BLOCK_PAIRS) -> List[Tuple[int, int]]:
+        """Trader row ranges whose products each hold about `block_pairs` entries (at least one row)."""
+        work = np.cumsum(self.incidence @ self.market_traders.astype(np.int64))
+        if not len(work):
+            return []
+        cuts = np.searchsorted(work, np.arange(block_pairs, work[-1], block_pairs), side='right')
+        bounds = np.unique(np.concatenate([[0], cuts, [self.n_traders]]))
+        return list(zip(bounds[:-1].tolist(), bounds[1:].tolist()))
+
+    def _block_neighbors(self, start: int, stop: int, k: int,
+                         min_shared_markets: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        shared = self.incidence[start:stop] @ self.incidence_t
+        shared.data[shared.data < min_shared_markets] = 0
+        shared.eliminate_zeros()
+        shared.sort_indices()
+
+        trader = np.repeat(np.arange(start, stop, dtype=np.int64), np.diff(shared.indptr))
+        neighbor = shared.indices.astype(np.int64)
+        count = shared.data.astype(np.int64)
+        keep = trader != neighbor
+        trader, neighbor, count = trader[keep], neighbor[keep], count[keep]
+
+        # Rank neighbors within each trader: most shared markets first, then trader code.
+        order = np.argsort(trader * (int(count.max(initial=0)) + 1) - count, kind='stable')
+        trader, neighbor, count = trader[order], neighbor[order], count[order]
+        rank = np.arange(len(trader)) - np.searchsorted(trader, trader, side='left')
+        keep = rank < k
+        return trader[keep], neighbor[keep], count[keep]
+
+    def neighbors(self, k: int = 10, min_shared_markets: int = 3, workers: int = None,
+                  block_pairs: int = DEFAULT_BLOCK_PAIRS) -> Dict[str, np.ndarray]:
+        """Top-k traders by shared markets for every trader, as trader-code arrays sorted by trader and rank."""
+        workers = workers or os.cpu_count() or 1
+        blocks = self.blocks(block_pairs)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            parts = list(executor.map(lambda block: self._block_neighbors(*block, k, min_shared_markets), blocks))
+
+        # Blocks are contiguous trader ranges, so concatenating keeps the trader order.
+        trader, neighbor, count = (np.concatenate([part[i] for part in parts]) if parts else np.arange(0)
+                                   for i in range(3))
+        return {'trader': trader, 'neighbor': neighbor, 'shared_markets': count.astype(np.int64)}
+
+    def edges(self, k: int = 10, min_shared_markets: int = 3, workers: int = None,
+              block_pairs: int = DEFAULT_BLOCK_PAIRS) -> Dict[str, np.ndarray]:
+        """Every pair in someone's top-k, once, oriented from the lower to the higher address.
+
+        The `limit` strongest pairs overall are all included when `limit <= k`.
+        """
+        top = self.neighbors(k, min_shared_markets, workers, block_pairs)
+        swap = self.address_rank[top['trader']] > self.address_rank[top['neighbor']]
+        trader1 = np.where(swap, top['neighbor'], top['trader'])
+        trader2 = np.where(swap, top['trader'], top['neighbor'])
+
+        pair_key = trader1 * self.n_traders + trader2
+        _, first = np.unique(pair_key, return_index=True)
+        trader1, trader2, shared = trader1[first], trader2[first], top['shared_markets'][first]
+
+        union = self.market_count[trader1] + self.market_count[trader2] - shared
+        order = np.lexsort((self.address_rank[trader2], self.address_rank[trader1], -shared))
+        return {
+            'trader1': trader1[order],
+            'trader2': trader2[order],
+            'shared_markets': shared[order],
+            'jaccard': (shared / np.maximum(union, 1))[order],
+        }
+
+    # ------------------------------------------------------------------------
+    # Queries (same output shape as neo4j.service.ts)
+    # ------------------------------------------------------------------------
+
+    def _user(self, prefix: str, trader_code: int) -> Dict[str, Any]:
+        address = self.trader_addresses[trader_code]
+        profile = self.users.get(address, {})
+        return {
+            f'{prefix}_address': address,
+            f'{prefix}_name': profile.get('name'),
+            f'{prefix}_pseudonym': profile.get('pseudonym'),
+            f'{prefix}_image': profile.get('profile_image'),
+        }
+
+    def trader_network(self, min_shared_markets: int = 3, limit: int = 50,
+                       workers: int = None) -> List[Dict[str, Any]]:
+        """getTraderNetwork: the trader pairs with the most shared markets, over all traders and markets."""
+        edges = self.edges(limit, min_shared_markets, workers)
+        results = []
+        for t1, t2, shared in zip(edges['trader1'][:limit], edges['trader2'][:limit], edges['shared_markets'][:limit]):
+            results.append({
+                **self._user('trader1', t1),
+                'u1_trades': int(self.trade_count[t1]),
+                **self._user('trader2', t2),
+                'u2_trades': int(self.trade_count[t2]),
+                'shared_markets': int(shared),
+            })
+        return results
+
+
+def _edge_rows(network: TraderNetwork, edges: Dict[str, np.ndarray]) -> Iterable[Dict[str, Any]]:
+    addresses = network.trader_addresses
+    for t1, t2, shared, jaccard in zip(edges['trader1'].tolist(), edges['trader2'].tolist(),
+                                       edges['shared_markets'].tolist(), edges['jaccard'].tolist()):
+        yield {'trader1': addresses[t1], 'trader2': addresses[t2], 'shared_markets': shared, 'jaccard': jaccard}
+
+
+def write_co_trade_edges(driver, network: TraderNetwork, edges: Dict[str, np.ndarray],
+                         replace: bool = True, batch_size: int = BATCH_SIZE) -> int:
+    """Store the edges as weighted CO_TRADES_WITH relationships; `replace` drops the previous set first."""
+    rows = list(_edge_rows(network, edges))
+    with driver.session() as session:
+        for stmt in NETWORK_SCHEMA:
+            session.run(stmt).consume()
+        if replace:
+            session.run(CLEAR_CO_TRADES_QUERY).consume()
+        for i in range(0, len(rows), batch_size):
+            session.run(CO_TRADES_QUERY, {'edges': rows[i:i + batch_size]}).consume()
+    return len(rows)